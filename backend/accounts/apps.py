@@ -3,3 +3,13 @@ from django.apps import AppConfig
 
 class AccountsConfig(AppConfig):
     name = 'accounts'
+
+    def ready(self):
+        from django.contrib.auth import get_user_model
+        from django.db.models.signals import post_delete, post_save
+
+        from .authentication import forget_status
+
+        User = get_user_model()
+        post_save.connect(forget_status, sender=User, dispatch_uid="accounts.forget_status")
+        post_delete.connect(forget_status, sender=User, dispatch_uid="accounts.forget_status_delete")
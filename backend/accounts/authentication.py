@@ -0,0 +1,133 @@
+"""
+احراز هویت JWT بدون خواندن ردیف User در هر درخواست.
+
+توکن‌های ورود claimهای username و email را دارند (ClaimsTokenObtainPairSerializer)؛ از روی آن‌ها
+یک User با فیلدهای deferred ساخته می‌شود (مثل only()) و فقط دسترسی به فیلدهای دیگر به دیتابیس می‌رود.
+فعال بودن کاربر و hash رمز (باطل شدن توکن بعد از تغییر رمز، CHECK_REVOKE_TOKEN) در یک cache
+درون‌پروسه با TTL است: ذخیره یا حذف User در همین پروسه آن را فوراً پاک می‌کند و workerهای دیگر
+حداکثر بعد از STATUS_TTL ثانیه تغییر را می‌بینند. توکن‌های قدیمی بدون claim مثل قبل از دیتابیس خوانده می‌شوند.
+تنظیمات: settings.TOKEN_USER
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+CLAIMS = ("username", "email")
+MISSING = object()
+
+
+def conf(name):
+    return settings.TOKEN_USER[name]
+
+
+class StatusCache:
+    """
+    user_id -> (is_active, hash رمز) یا None برای کاربر حذف‌شده؛ LRU با TTL.
+    """
+    def __init__(self):
+        self._data = OrderedDict()  # user_id -> (status, expires_at)
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            item = self._data.get(user_id)
+            if item is None:
+                return MISSING
+            if item[1] < time.monotonic():
+                del self._data[user_id]
+                return MISSING
+            self._data.move_to_end(user_id)
+            return item[0]
+
+    def set(self, user_id, status):
+        with self._lock:
+            self._data[user_id] = (status, time.monotonic() + conf("STATUS_TTL"))
+            self._data.move_to_end(user_id)
+            while len(self._data) > conf("STATUS_MAX_ENTRIES"):
+                self._data.popitem(last=False)
+
+    def delete(self, user_id):
+        with self._lock:
+            self._data.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+statuses = StatusCache()
+
+
+def load_status(pk):
+    row = get_user_model()._default_manager.filter(pk=pk).values_list("is_active", "password").first()
+    status = (row[0], get_md5_hash_password(row[1])) if row else None
+    statuses.set(pk, status)
+    return status
+
+
+def forget_status(sender, instance, **kwargs):
+    """
+    post_save/post_delete روی User (accounts/apps.py).
+    """
+    statuses.delete(instance.pk)
+
+
+def user_id(token):
+    # simplejwt شناسه را به صورت رشته در توکن می‌گذارد
+    return get_user_model()._meta.pk.to_python(token[api_settings.USER_ID_CLAIM])
+
+
+def has_claims(token):
+    return api_settings.USER_ID_CLAIM in token and all(claim in token for claim in CLAIMS)
+
+
+def lazy_user(token):
+    """
+    User با id و claimها؛ بقیه‌ی فیلدها deferred هستند. is_active قبلاً از cache بررسی شده است.
+    """
+    User = get_user_model()
+    values = {"id": user_id(token), "is_active": True}
+    values.update((claim, token[claim]) for claim in CLAIMS)
+    names = [f.attname for f in User._meta.concrete_fields if f.attname in values]
+    return User.from_db(None, names, [values[name] for name in names])
+
+
+class TokenUserAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        if not has_claims(validated_token):
+            return super().get_user(validated_token)
+        pk = user_id(validated_token)
+        status = statuses.get(pk)
+        if status is MISSING:
+            status = load_status(pk)
+        return self.token_user(validated_token, status)
+
+    def get_cached_user(self, validated_token):
+        """
+        بدون I/O (viewهای async)؛ None یعنی get_user لازم است.
+        """
+        if not has_claims(validated_token):
+            return None
+        status = statuses.get(user_id(validated_token))
+        if status is MISSING:
+            return None
+        return self.token_user(validated_token, status)
+
+    def token_user(self, validated_token, status):
+        # همان بررسی‌های JWTAuthentication.get_user، روی وضعیت cache شده
+        if status is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        is_active, password_hash = status
+        if api_settings.CHECK_USER_IS_ACTIVE and not is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != password_hash:
+            raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+        return lazy_user(validated_token)
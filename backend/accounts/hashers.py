@@ -0,0 +1,84 @@
+"""
+hash رمز عبور با هزینه‌ی قابل تنظیم و اجرای آن روی یک pool محدود.
+
+- hasherها همان hasherهای Django هستند با هزینه از settings.PASSWORD_HASHING؛ اولین عضو
+  PASSWORD_HASHERS (سیاست فعلی) برای hash جدید است. hash با الگوریتم یا هزینه‌ی دیگر در ورود
+  موفق بازنویسی می‌شود (verify پایین)، فقط اگر REHASH_ON_LOGIN روشن باشد: hash تازه توکن‌های
+  کاربر را روی همه‌ی دستگاه‌ها باطل می‌کند (CHECK_REVOKE_TOKEN).
+- scrypt، PBKDF2 (OpenSSL) و argon2-cffi هنگام hash قفل GIL را آزاد می‌کنند؛ پس POOL_SIZE thread
+  همان‌قدر هسته می‌گیرد و بقیه‌ی درخواست‌های worker (و event loop در ASGI) آزاد می‌مانند.
+  صف پشت pool را admission control محدود می‌کند (THROTTLE["SCOPES"]["auth"]["concurrency"]).
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+def cost(name):
+    return settings.PASSWORD_HASHING[name]
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    def __init__(self):
+        self.time_cost = cost("ARGON2")["time_cost"]
+        self.memory_cost = cost("ARGON2")["memory_cost"]
+        self.parallelism = cost("ARGON2")["parallelism"]
+
+
+class ScryptPasswordHasher(hashers.ScryptPasswordHasher):
+    def __init__(self):
+        self.work_factor = cost("SCRYPT")["work_factor"]
+        self.block_size = cost("SCRYPT")["block_size"]
+        self.parallelism = cost("SCRYPT")["parallelism"]
+        # حافظه‌ی لازم scrypt حدود 128 * n * r بایت است؛ سقف پیش‌فرض OpenSSL (32MB) برای n بزرگ کم است
+        self.maxmem = 2 * 128 * self.work_factor * self.block_size
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    def __init__(self):
+        self.iterations = cost("PBKDF2")["iterations"]
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(cost("POOL_SIZE"), thread_name_prefix="password-hash")
+    return _pool
+
+
+def make_password(password):
+    return pool().submit(hashers.make_password, password).result()
+
+
+async def amake_password(password):
+    return await asyncio.wrap_future(pool().submit(hashers.make_password, password))
+
+
+def verify(user, password):
+    """
+    مثل user.check_password ولی روی pool؛ hash قدیمی در صورت درست بودن رمز بازنویسی می‌شود.
+    """
+    is_correct, must_update = pool().submit(hashers.verify_password, password, user.password).result()
+    if is_correct and must_update and cost("REHASH_ON_LOGIN"):
+        user.password = make_password(password)
+        user.save(update_fields=["password"])
+    return is_correct
+
+
+async def averify(user, password):
+    is_correct, must_update = await asyncio.wrap_future(
+        pool().submit(hashers.verify_password, password, user.password)
+    )
+    if is_correct and must_update and cost("REHASH_ON_LOGIN"):
+        user.password = await amake_password(password)
+        await user.asave(update_fields=["password"])
+    return is_correct
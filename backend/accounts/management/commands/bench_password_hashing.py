@@ -0,0 +1,67 @@
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers as django_hashers
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts import hashers
+
+POLICIES = {
+    "scrypt": hashers.ScryptPasswordHasher,
+    "argon2": hashers.Argon2PasswordHasher,
+    "pbkdf2": hashers.PBKDF2PasswordHasher,
+    # پیش‌فرض Django (1,000,000 دور) برای مقایسه
+    "django-pbkdf2": django_hashers.PBKDF2PasswordHasher,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Logins per second per core for each password hashing policy (settings.PASSWORD_HASHING), "
+        "plus wall-clock throughput with --threads concurrent verifications (hashing releases the GIL)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--policies", default=",".join(POLICIES))
+        parser.add_argument("--logins", type=int, default=20, help="Verifications per policy.")
+        parser.add_argument("--threads", type=int, default=settings.PASSWORD_HASHING["POOL_SIZE"])
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"current policy: {settings.PASSWORD_HASHING['POLICY']}, pool size {settings.PASSWORD_HASHING['POOL_SIZE']}"
+        )
+        self.stdout.write(
+            f"{'policy':<14} {'p50 ms':>8} {'cpu ms':>8} {'logins/s/core':>14} {'logins/s x' + str(options['threads']):>14}"
+        )
+        for name in options["policies"].split(","):
+            if name not in POLICIES:
+                raise CommandError(f"Unknown policy: {name}")
+            hasher = POLICIES[name]()
+            try:
+                encoded = hasher.encode("correct horse battery", hasher.salt())
+            except ValueError as e:
+                # argon2-cffi نصب نیست
+                self.stdout.write(f"{name:<14} skipped: {e}")
+                continue
+            self.measure(name, hasher, encoded, options)
+
+    def measure(self, name, hasher, encoded, options):
+        wall = []
+        cpu_start = time.process_time()
+        for _ in range(options["logins"]):
+            start = time.perf_counter()
+            assert hasher.verify("correct horse battery", encoded)
+            wall.append(time.perf_counter() - start)
+        cpu = (time.process_time() - cpu_start) / options["logins"]
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(options["threads"]) as pool:
+            list(pool.map(lambda _: hasher.verify("correct horse battery", encoded), range(options["logins"])))
+        parallel = options["logins"] / (time.perf_counter() - start)
+
+        self.stdout.write(
+            f"{name:<14} {statistics.median(wall) * 1000:>8.1f} {cpu * 1000:>8.1f} "
+            f"{1 / cpu:>14.1f} {parallel:>14.1f}"
+        )
@@ -1,5 +1,12 @@
-from django.contrib.auth.models import User
-from rest_framework import serializers
+from asgiref.sync import sync_to_async
+from django.contrib.auth import aauthenticate
+from django.contrib.auth.models import User, update_last_login
+from rest_framework import exceptions, serializers
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.settings import api_settings
+
+from . import hashers
+from .authentication import CLAIMS
 
 class RegisterSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, min_length=6)
@@ -9,9 +16,48 @@ class RegisterSerializer(serializers.ModelSerializer):
         fields = ["username", "email", "password"]
 
     def create(self, validated_data):
-        user = User.objects.create_user(
-            username=validated_data["username"],
-            email=validated_data.get("email", ""),
-            password=validated_data["password"],
-        )
+        user = self.build_user(validated_data)
+        user.password = hashers.make_password(validated_data["password"])
+        user.save()
         return user
+
+    async def acreate(self, validated_data):
+        user = self.build_user(validated_data)
+        user.password = await hashers.amake_password(validated_data["password"])
+        await user.asave()
+        return user
+
+    def build_user(self, validated_data):
+        # مثل create_user؛ hash رمز جدا روی pool (accounts/hashers.py)
+        return User(
+            username=User.normalize_username(validated_data["username"]),
+            email=User.objects.normalize_email(validated_data.get("email", "")),
+        )
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """
+    username و email داخل توکن (access از refresh کپی می‌کند) تا TokenUserAuthentication
+    کاربر را بدون کوئری بسازد. تغییر email تا ورود بعدی در توکن‌های قبلی دیده نمی‌شود.
+    """
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        for claim in CLAIMS:
+            token[claim] = getattr(user, claim)
+        return token
+
+    async def avalidate(self):
+        """
+        مسیر async ورود (LoginAsyncView): همان validate با aauthenticate.
+        """
+        attrs = self.to_internal_value(self.initial_data)
+        self.user = await aauthenticate(
+            self.context.get("request"),
+            **{self.username_field: attrs[self.username_field], "password": attrs["password"]},
+        )
+        if not api_settings.USER_AUTHENTICATION_RULE(self.user):
+            raise exceptions.AuthenticationFailed(self.error_messages["no_active_account"], "no_active_account")
+        refresh = self.get_token(self.user)
+        if api_settings.UPDATE_LAST_LOGIN:
+            await sync_to_async(update_last_login)(None, self.user)
+        return {"refresh": str(refresh), "access": str(refresh.access_token)}
@@ -1,3 +1,194 @@
-from django.test import TestCase
+import json
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth.hashers import identify_hasher, make_password
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import AsyncRequestFactory, TestCase, override_settings
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .authentication import TokenUserAuthentication, statuses
+from .views import LoginAsyncView, RegisterAsyncView
+
+
+class TokenUserTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("buyer", email="buyer@example.com", password="secret-1")
+
+    def setUp(self):
+        cache.clear()  # سطل throttle ورود
+        statuses.clear()
+        self.addCleanup(statuses.clear)
+        self.client = APIClient()
+
+    def login(self):
+        r = self.client.post("/api/auth/login/", {"username": "buyer", "password": "secret-1"}, format="json")
+        self.assertEqual(r.status_code, 200)
+        return r.json()["access"]
+
+    def me(self, token):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        return self.client.get("/api/auth/me/")
+
+    def test_me_reads_claims_without_queries_once_status_is_cached(self):
+        token = self.login()
+        statuses.clear()
+        with self.assertNumQueries(1):
+            r = self.me(token)
+        self.assertEqual(r.json(), {"id": self.user.id, "username": "buyer", "email": "buyer@example.com"})
+        with self.assertNumQueries(0):
+            self.assertEqual(self.me(token).status_code, 200)
+
+    def test_deactivated_user_is_rejected_immediately(self):
+        token = self.login()
+        self.assertEqual(self.me(token).status_code, 200)
+        self.user.is_active = False
+        self.user.save(update_fields=["is_active"])
+        self.assertEqual(self.me(token).status_code, 401)
+
+    def test_password_change_revokes_token(self):
+        token = self.login()
+        self.assertEqual(self.me(token).status_code, 200)
+        self.user.set_password("secret-2")
+        self.user.save()
+        r = self.me(token)
+        self.assertEqual(r.status_code, 401)
+        self.assertEqual(r.json()["code"], "password_changed")
+
+    def test_other_fields_load_lazily(self):
+        token = self.login()
+        request = APIRequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {token}")
+        user, _ = TokenUserAuthentication().authenticate(request)
+        with self.assertNumQueries(0):
+            self.assertEqual((user.pk, user.username, user.is_active), (self.user.pk, "buyer", True))
+        with self.assertNumQueries(1):
+            self.assertEqual(user.date_joined, self.user.date_joined)
+
+    def test_token_without_claims_falls_back_to_database(self):
+        token = str(AccessToken.for_user(self.user))
+        with self.assertNumQueries(1):
+            self.assertEqual(self.me(token).json()["username"], "buyer")
+
+
+class PasswordHashingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def login(self, password):
+        return self.client.post("/api/auth/login/", {"username": "buyer", "password": password}, format="json")
+
+    def test_register_hashes_with_current_policy(self):
+        r = self.client.post(
+            "/api/auth/register/", {"username": "new", "email": "NEW@Example.com", "password": "secret-1"}, format="json",
+        )
+        self.assertEqual(r.status_code, 201)
+        user = User.objects.get(username="new")
+        self.assertEqual(user.email, "NEW@example.com")
+        self.assertEqual(identify_hasher(user.password).algorithm, "scrypt")
+        self.assertEqual(self.client.post("/api/auth/register/", {"username": "new", "password": "secret-1"},
+                                          format="json").status_code, 400)
+
+    def test_login_keeps_old_hash_while_tokens_are_revocable(self):
+        legacy = make_password("secret-1", hasher="pbkdf2_sha1")
+        User.objects.create(username="buyer", password=legacy)
+        first = self.login("secret-1").json()["access"]
+        self.assertEqual(self.login("secret-1").status_code, 200)
+        request = AsyncRequestFactory().post(
+            "/", {"username": "buyer", "password": "secret-1"}, content_type="application/json",
+        )
+        self.assertEqual(async_to_sync(LoginAsyncView.as_view())(request).status_code, 200)  # averify
+        self.assertEqual(User.objects.get().password, legacy)
+        # ورود دوباره کاربر را از دستگاه دیگر بیرون نمی‌اندازد
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {first}")
+        self.assertEqual(self.client.get("/api/auth/me/").status_code, 200)
+
+    @override_settings(PASSWORD_HASHING={**settings.PASSWORD_HASHING, "REHASH_ON_LOGIN": True})
+    def test_login_rehashes_old_hash(self):
+        legacy = make_password("secret-1", hasher="pbkdf2_sha1")
+        User.objects.create(username="buyer", password=legacy)
+        self.assertEqual(self.login("wrong").status_code, 401)
+        self.assertEqual(User.objects.get().password, legacy)
+        self.assertEqual(self.login("secret-1").status_code, 200)
+        self.assertEqual(identify_hasher(User.objects.get().password).algorithm, "scrypt")
+        self.assertEqual(self.login("secret-1").status_code, 200)
+
+    def test_unknown_user_is_401(self):
+        self.assertEqual(self.login("secret-1").status_code, 401)
+
+
+class AsyncAuthViewTests(TestCase):
+    """
+    RegisterAsyncView/LoginAsyncView مستقیم، مستقل از DJANGO_ASYNC_VIEWS؛ خروجی خطا مثل viewهای sync.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("buyer", email="buyer@example.com", password="secret-1")
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        statuses.clear()
+        self.addCleanup(statuses.clear)
+
+    def post(self, view, data):
+        request = AsyncRequestFactory().post("/", data, content_type="application/json")
+        response = async_to_sync(view.as_view())(request)
+        return response, json.loads(response.content)
+
+    def login(self, password):
+        return self.post(LoginAsyncView, {"username": "buyer", "password": password})
+
+    def test_login_returns_tokens_with_claims(self):
+        r, body = self.login("secret-1")
+        self.assertEqual(r.status_code, 200)
+        token = AccessToken(body["access"])
+        self.assertEqual((token["user_id"], token["username"]), (str(self.user.id), "buyer"))
+
+    def test_bad_credentials_match_sync_view(self):
+        expected = APIClient().post("/api/auth/login/", {"username": "buyer", "password": "wrong"}, format="json")
+        for data in ({"username": "buyer", "password": "wrong"}, {"username": "nobody", "password": "secret-1"}):
+            r, body = self.post(LoginAsyncView, data)
+            self.assertEqual(r.status_code, 401)
+            self.assertEqual(body, expected.json())
+        r, body = self.post(LoginAsyncView, {"username": "buyer"})
+        self.assertEqual(r.status_code, 400)
+        self.assertIn("password", body)
+
+    def test_inactive_user_cannot_log_in(self):
+        self.user.is_active = False
+        self.user.save(update_fields=["is_active"])
+        r, body = self.login("secret-1")
+        self.assertEqual(r.status_code, 401)
+        self.assertNotIn("access", body)
+
+    def test_register_creates_user(self):
+        r, body = self.post(RegisterAsyncView, {"username": "new", "email": "NEW@Example.com", "password": "secret-1"})
+        self.assertEqual(r.status_code, 201)
+        user = User.objects.get(username="new")
+        self.assertEqual(body, {"id": user.id, "username": "new"})
+        self.assertEqual(user.email, "NEW@example.com")
+        self.assertEqual(identify_hasher(user.password).algorithm, "scrypt")
+        self.assertEqual(self.post(LoginAsyncView, {"username": "new", "password": "secret-1"})[0].status_code, 200)
+
+    def test_register_rejects_taken_username(self):
+        r, body = self.post(RegisterAsyncView, {"username": "buyer", "password": "secret-1"})
+        self.assertEqual(r.status_code, 400)
+        self.assertIn("username", body)
+
+    def test_auth_scope_is_throttled(self):
+        with self.settings(THROTTLE={**settings.THROTTLE, "SCOPES": {
+            "auth": {"ip": {"rate": "1/min", "burst": 2}},
+        }}):
+            codes = [self.login("wrong")[0].status_code for _ in range(2)]
+            r, body = self.login("secret-1")
+            register, _ = self.post(RegisterAsyncView, {"username": "new", "password": "secret-1"})
+        self.assertEqual(codes, [401, 401])
+        self.assertEqual(r.status_code, 429)
+        self.assertGreaterEqual(int(r["Retry-After"]), 1)
+        self.assertIn("detail", body)
+        self.assertEqual(register.status_code, 429)
+        self.assertFalse(User.objects.filter(username="new").exists())
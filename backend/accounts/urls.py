@@ -1,10 +1,11 @@
+from django.conf import settings
 from django.urls import path
-from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
-from .views import RegisterAPIView, MeAPIView
+from rest_framework_simplejwt.views import TokenRefreshView
+from .views import LoginAPIView, LoginAsyncView, RegisterAPIView, RegisterAsyncView, MeAPIView
 
 urlpatterns = [
-    path("auth/register/", RegisterAPIView.as_view()),
-    path("auth/login/", TokenObtainPairView.as_view()),
+    path("auth/register/", RegisterAsyncView.as_view() if settings.ASYNC_VIEWS else RegisterAPIView.as_view()),
+    path("auth/login/", LoginAsyncView.as_view() if settings.ASYNC_VIEWS else LoginAPIView.as_view()),
     path("auth/refresh/", TokenRefreshView.as_view()),
     path("auth/me/", MeAPIView.as_view()),
 ]
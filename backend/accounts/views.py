@@ -1,18 +1,49 @@
+from asgiref.sync import sync_to_async
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 from django.contrib.auth.models import User
+from rest_framework_simplejwt.views import TokenObtainPairView
 
-from .serializers import RegisterSerializer
+from config.async_views import AsyncAPIView, render_json
+
+from .serializers import ClaimsTokenObtainPairSerializer, RegisterSerializer
 
 class RegisterAPIView(APIView):
+    throttle_scope = "auth"  # hash رمز عبور گران است
+
     def post(self, request):
         s = RegisterSerializer(data=request.data)
         s.is_valid(raise_exception=True)
         user = s.save()
         return Response({"id": user.id, "username": user.username}, status=201)
 
+class RegisterAsyncView(AsyncAPIView):
+    """
+    ثبت‌نام زیر ASGI: hash رمز روی pool است و event loop منتظر آن نمی‌ماند.
+    """
+    http_method_names = ["post", "options"]
+    throttle_scope = "auth"
+
+    async def post(self, request):
+        s = RegisterSerializer(data=request.data)
+        # یکتایی username کوئری می‌زند
+        await sync_to_async(s.is_valid)(raise_exception=True)
+        user = await s.acreate(s.validated_data)
+        return render_json({"id": user.id, "username": user.username}, status=201)
+
+class LoginAPIView(TokenObtainPairView):
+    throttle_scope = "auth"
+
+class LoginAsyncView(AsyncAPIView):
+    http_method_names = ["post", "options"]
+    throttle_scope = "auth"
+
+    async def post(self, request):
+        s = ClaimsTokenObtainPairSerializer(data=request.data, context={"request": request})
+        return render_json(await s.avalidate())
+
 class MeAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
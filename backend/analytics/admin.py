@@ -0,0 +1,58 @@
+from django.contrib import admin
+
+from config.admin import LargeTableAdmin
+from .models import (
+    BrandDailySales, CategoryDailySales, ProductDailySales, RolledUpOrder, RollupWatermark, VariantDailySales,
+)
+
+
+class ReadOnlyAdmin(LargeTableAdmin):
+    # فقط analytics/rollups.py می‌نویسد؛ اصلاح با manage.py verify_sales_rollups --repair
+    date_hierarchy = "day"
+    sortable_by = ("day",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(VariantDailySales)
+class VariantDailySalesAdmin(ReadOnlyAdmin):
+    list_display = ("day", "variant_id", "sku", "units", "revenue", "orders")
+    search_fields = ("=sku", "=variant_id")
+
+
+@admin.register(ProductDailySales)
+class ProductDailySalesAdmin(ReadOnlyAdmin):
+    list_display = ("day", "product_id", "units", "revenue", "orders")
+    search_fields = ("=product_id",)
+
+
+@admin.register(BrandDailySales)
+class BrandDailySalesAdmin(ReadOnlyAdmin):
+    list_display = ("day", "brand_id", "units", "revenue", "orders")
+    search_fields = ("=brand_id",)
+
+
+@admin.register(CategoryDailySales)
+class CategoryDailySalesAdmin(ReadOnlyAdmin):
+    list_display = ("day", "category_id", "units", "revenue", "orders")
+    search_fields = ("=category_id",)
+
+
+@admin.register(RolledUpOrder)
+class RolledUpOrderAdmin(ReadOnlyAdmin):
+    list_display = ("order_id", "day", "created_at")
+    sortable_by = ("order_id", "day")
+    search_fields = ("=order_id",)
+
+
+@admin.register(RollupWatermark)
+class RollupWatermarkAdmin(ReadOnlyAdmin):
+    date_hierarchy = None
+    list_display = ("name", "paid_before", "updated_at")
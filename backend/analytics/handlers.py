@@ -0,0 +1,12 @@
+"""
+handler outbox: rollup سفارش بعد از تسویه (payments/settlement.py رویداد "order.paid" را منتشر می‌کند).
+جمع زدن بیرون از transaction تسویه است تا ردیف‌های داغ روزانه (مثلاً برند پرفروش امروز)
+قفل callback درگاه را طولانی نکنند. ledger اجرای دوباره را بی‌اثر می‌کند.
+"""
+from outbox.events import handler
+from .rollups import rollup_orders
+
+
+@handler("order.paid")
+def rollup_paid_order(payload, event):
+    rollup_orders([payload["order_id"]])
@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from analytics.rollups import backfill, catch_up, unrolled_count
+
+
+class Command(BaseCommand):
+    help = (
+        "Add paid orders to the daily sales rollups. By default catches up from the watermark "
+        "(orders whose outbox event has not run yet); --backfill walks the whole order history in "
+        "chunks and can be interrupted and resumed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None, help="Defaults to ANALYTICS['BATCH_SIZE'].")
+        parser.add_argument("--backfill", action="store_true", help="All paid orders, by id.")
+        parser.add_argument("--after-id", type=int, default=0, help="Resume a backfill after this order id.")
+        parser.add_argument("--loop", action="store_true", help="Keep catching up in the background.")
+        parser.add_argument("--interval", type=float, default=60.0, help="Seconds between runs with --loop.")
+
+    def handle(self, *args, **options):
+        if options["backfill"]:
+            total = 0
+            for last_id, n in backfill(options["batch_size"], options["after_id"]):
+                total += n
+                self.stdout.write(f"up to order #{last_id}: +{n} (total {total})")
+            self.stdout.write(f"Backfilled {total} order(s); {unrolled_count()} paid order(s) still missing.")
+            return
+
+        while True:
+            n = catch_up(options["batch_size"])
+            if n or not options["loop"]:
+                self.stdout.write(f"Rolled up {n} order(s).")
+            if not options["loop"]:
+                return
+            close_old_connections()
+            time.sleep(options["interval"])
@@ -0,0 +1,45 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from analytics.rollups import rebuild, unrolled_count, verify
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the daily sales rollups with a full recompute from the order ledger for a day range. "
+        "Exits with an error on drift unless --repair rebuilds the affected days."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--from", dest="day_from", type=date.fromisoformat, default=None,
+                            help="YYYY-MM-DD; defaults to 30 days before --to.")
+        parser.add_argument("--to", dest="day_to", type=date.fromisoformat, default=None,
+                            help="YYYY-MM-DD; defaults to today.")
+        parser.add_argument("--batch-size", type=int, default=None)
+        parser.add_argument("--repair", action="store_true", help="Rebuild the days that differ.")
+        parser.add_argument("--show", type=int, default=10, help="Differences to print per table.")
+
+    def handle(self, *args, **options):
+        day_to = options["day_to"] or timezone.localdate()
+        day_from = options["day_from"] or day_to - timedelta(days=30)
+        diffs = verify(day_from, day_to, options["batch_size"])
+
+        drifted = set()
+        for name, rows in diffs.items():
+            self.stdout.write(f"{name}: {len(rows)} difference(s)")
+            for day, key, expected, actual in rows[:options["show"]]:
+                self.stdout.write(f"  {day} {name}={key} expected={expected} actual={actual}")
+            drifted.update(day for day, *_ in rows)
+
+        missing = unrolled_count()
+        if missing:
+            self.stdout.write(f"{missing} paid order(s) are not rolled up yet (manage.py rollup_sales [--backfill]).")
+        if not drifted:
+            self.stdout.write(f"Rollups match {day_from}..{day_to}.")
+            return
+        if not options["repair"]:
+            raise CommandError(f"Rollups drifted on {len(drifted)} day(s); rerun with --repair.")
+        rebuilt = sum(rebuild(day, day, options["batch_size"]) for day in sorted(drifted))
+        self.stdout.write(f"Rebuilt {len(drifted)} day(s), {rebuilt} row(s).")
@@ -0,0 +1,101 @@
+from django.db import models
+
+
+class DailySales(models.Model):
+    """
+    جمع فروش پرداخت‌شده‌ی یک روز برای یک کلید (variant، محصول، برند یا دسته).
+    فقط analytics/rollups.py می‌نویسد؛ روز همان روز paid_at سفارش در TIME_ZONE است.
+    """
+    day = models.DateField()
+    units = models.PositiveIntegerField(default=0)
+    revenue = models.PositiveBigIntegerField(default=0)
+    orders = models.PositiveIntegerField(default=0)  # سفارش‌های متمایز
+    updated_at = models.DateTimeField(auto_now=True)
+
+    key = None  # نام فیلد کلید
+
+    class Meta:
+        abstract = True
+
+
+# کلیدها id ساده‌اند نه ForeignKey: حذف از catalog تاریخچه‌ی فروش را پاک نمی‌کند
+class VariantDailySales(DailySales):
+    variant_id = models.IntegerField()
+    sku = models.CharField(max_length=64)  # آخرین sku دیده‌شده در OrderItem
+
+    key = "variant_id"
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["day", "variant_id"], name="variant_daily_sales_uniq")]
+        indexes = [models.Index(fields=["variant_id", "day"], name="variant_daily_sales_key_idx")]
+
+    def __str__(self):
+        return f"{self.day} {self.sku}: {self.units}"
+
+
+class ProductDailySales(DailySales):
+    product_id = models.IntegerField()
+
+    key = "product_id"
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["day", "product_id"], name="product_daily_sales_uniq")]
+        indexes = [models.Index(fields=["product_id", "day"], name="product_daily_sales_key_idx")]
+
+    def __str__(self):
+        return f"{self.day} product={self.product_id}: {self.units}"
+
+
+class BrandDailySales(DailySales):
+    brand_id = models.IntegerField()
+
+    key = "brand_id"
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["day", "brand_id"], name="brand_daily_sales_uniq")]
+        indexes = [models.Index(fields=["brand_id", "day"], name="brand_daily_sales_key_idx")]
+
+    def __str__(self):
+        return f"{self.day} brand={self.brand_id}: {self.units}"
+
+
+class CategoryDailySales(DailySales):
+    category_id = models.IntegerField()
+
+    key = "category_id"
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["day", "category_id"], name="category_daily_sales_uniq")]
+        indexes = [models.Index(fields=["category_id", "day"], name="category_daily_sales_key_idx")]
+
+    def __str__(self):
+        return f"{self.day} category={self.category_id}: {self.units}"
+
+
+class RolledUpOrder(models.Model):
+    """
+    ledger: هر سفارش دقیقاً یک بار در rollupها جمع می‌شود؛ ردیف در همان transaction افزایش‌ها
+    ساخته می‌شود، پس handler outbox و catch-up می‌توانند بی‌خطر روی هم بیفتند.
+    """
+    order_id = models.IntegerField(primary_key=True)
+    day = models.DateField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["day"], name="rolled_up_order_day_idx")]
+
+    def __str__(self):
+        return f"Order#{self.order_id} -> {self.day}"
+
+
+class RollupWatermark(models.Model):
+    """
+    high-water mark catch-up: سفارش‌هایی با paid_at قبل از paid_before جمع شده‌اند
+    (به جز آن‌هایی که commitشان دیرتر از OVERLAP_SECONDS رسیده).
+    """
+    name = models.CharField(max_length=32, primary_key=True)
+    paid_before = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name}: {self.paid_before}"
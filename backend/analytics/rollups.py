@@ -0,0 +1,258 @@
+"""
+rollup افزایشی فروش روزانه (تعداد، مبلغ، سفارش) به تفکیک variant، محصول، برند و دسته.
+
+هر سفارش paid یک بار جمع می‌شود (ledger: RolledUpOrder) و سه مسیر به rollup_orders می‌رسند:
+  - handler outbox روی "order.paid" (analytics/handlers.py)، چند لحظه بعد از تسویه
+  - catch_up با watermark روی paid_at (manage.py rollup_sales)، برای رویدادهای جامانده
+  - backfill به ترتیب id و دسته به دسته (manage.py rollup_sales --backfill)، برای تاریخچه
+ledger و افزایش ردیف‌های روزانه در یک transaction هستند؛ اجرای همزمان دو مسیر روی یک سفارش
+به IntegrityError می‌خورد و یکی rollback می‌شود.
+روز فروش تاریخ محلی paid_at است (سفارش‌های قدیمی بدون paid_at: created_at)؛ محصول/برند/دسته
+از Variant در لحظه‌ی rollup خوانده می‌شوند. verify جمع‌ها را با محاسبه‌ی کامل از ledger مقایسه می‌کند.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from catalog.models import Variant
+from orders.models import Order, OrderItem
+from .models import (
+    BrandDailySales, CategoryDailySales, ProductDailySales, RolledUpOrder, RollupWatermark, VariantDailySales,
+)
+
+DIMENSIONS = {
+    "variant": VariantDailySales,
+    "product": ProductDailySales,
+    "brand": BrandDailySales,
+    "category": CategoryDailySales,
+}
+COUNTERS = ("units", "revenue", "orders")
+WATERMARK = "orders"
+
+
+def conf(name):
+    return settings.ANALYTICS[name]
+
+
+def sale_day(paid_at, created_at):
+    return timezone.localdate(paid_at or created_at)
+
+
+def aggregate(orders):
+    """
+    orders: {order_id: day}. خروجی: {dimension: {(day, key): {"units", "revenue", "orders"[, "sku"]}}}
+    دو کوئری برای کل دسته: آیتم‌ها و نگاشت variant -> (محصول، برند، دسته).
+    """
+    totals = {name: {} for name in DIMENSIONS}
+    if not orders:
+        return totals
+    items = list(
+        OrderItem.objects.filter(order_id__in=list(orders))
+        .order_by("id")
+        .values_list("order_id", "variant_id", "sku", "quantity", "line_total")
+    )
+    parents = {
+        variant_id: rest
+        for variant_id, *rest in Variant.objects.filter(id__in={item[1] for item in items})
+        .values_list("id", "product_id", "product__brand_id", "product__category_id")
+    }
+    counted = set()
+    for order_id, variant_id, sku, quantity, line_total in items:
+        day = orders[order_id]
+        keys = {"variant": variant_id}
+        if variant_id in parents:  # variant حذف‌شده فقط در سطح variant می‌ماند
+            keys.update(zip(("product", "brand", "category"), parents[variant_id]))
+        for name, key in keys.items():
+            row = totals[name].setdefault((day, key), {"units": 0, "revenue": 0, "orders": 0})
+            row["units"] += quantity
+            row["revenue"] += line_total
+            if (name, key, order_id) not in counted:
+                counted.add((name, key, order_id))
+                row["orders"] += 1
+            if name == "variant":
+                row["sku"] = sku
+    return totals
+
+
+def merge(totals, more):
+    for name, rows in more.items():
+        for slot, delta in rows.items():
+            row = totals[name].setdefault(slot, {"units": 0, "revenue": 0, "orders": 0})
+            for field in COUNTERS:
+                row[field] += delta[field]
+            if "sku" in delta:
+                row["sku"] = delta["sku"]
+    return totals
+
+
+def apply(totals):
+    """
+    افزودن جمع‌ها به ردیف‌های روزانه: برای هر جدول یک SELECT ... FOR UPDATE (به ترتیب id تا
+    اجرای همزمان deadlock نشود)، یک bulk_update و یک bulk_create. داخل transaction.
+    """
+    now = timezone.now()
+    for name, rows in totals.items():
+        if not rows:
+            continue
+        model = DIMENSIONS[name]
+        existing = {
+            (row.day, getattr(row, model.key)): row
+            for row in model.objects.select_for_update().filter(
+                day__in={day for day, _ in rows}, **{f"{model.key}__in": {key for _, key in rows}},
+            ).order_by("id")
+        }
+        changed, created = [], []
+        for (day, key), delta in rows.items():
+            row = existing.get((day, key))
+            if row is None:
+                created.append(model(day=day, **{model.key: key}, **delta))
+                continue
+            for field in COUNTERS:
+                setattr(row, field, getattr(row, field) + delta[field])
+            if "sku" in delta:
+                row.sku = delta["sku"]
+            row.updated_at = now
+            changed.append(row)
+        fields = [*COUNTERS, "updated_at", *(["sku"] if name == "variant" else [])]
+        model.objects.bulk_update(changed, fields, batch_size=500)
+        model.objects.bulk_create(created, batch_size=500)
+
+
+def rollup_orders(order_ids):
+    """
+    سفارش‌های paid از order_ids را که در ledger نیستند جمع می‌کند. خروجی: تعداد سفارش‌های جمع‌شده.
+    IntegrityError یعنی اجرای همزمان همین سفارش‌ها را برداشته است؛ تلاش دوباره بی‌خطر است.
+    """
+    order_ids = list(order_ids)
+    with transaction.atomic():
+        orders = {
+            order_id: sale_day(paid_at, created_at)
+            for order_id, paid_at, created_at in Order.objects
+            .filter(id__in=order_ids, status="paid")
+            .exclude(id__in=RolledUpOrder.objects.filter(order_id__in=order_ids).values("order_id"))
+            .values_list("id", "paid_at", "created_at")
+        }
+        if not orders:
+            return 0
+        RolledUpOrder.objects.bulk_create(RolledUpOrder(order_id=order_id, day=day) for order_id, day in orders.items())
+        apply(aggregate(orders))
+    return len(orders)
+
+
+def _drain(pending, batch_size):
+    """
+    pending: کوئری سفارش‌های جمع‌نشده؛ هر دور ledger را جلو می‌برد پس کوئری بعدی جلوتر است.
+    """
+    total, conflicts = 0, 0
+    while True:
+        ids = list(pending.values_list("id", flat=True)[:batch_size])
+        if not ids:
+            return total
+        try:
+            total += rollup_orders(ids)
+        except IntegrityError:
+            conflicts += 1
+            if conflicts > 3:
+                raise
+
+
+def _unrolled():
+    return Order.objects.filter(status="paid").exclude(id__in=RolledUpOrder.objects.values("order_id"))
+
+
+def horizon(now=None):
+    # paid_atهایی که transactionشان ممکن است هنوز commit نشده باشد کنار می‌مانند
+    return (now or timezone.now()) - timedelta(seconds=conf("LAG_SECONDS"))
+
+
+def catch_up(batch_size=None, now=None):
+    """
+    سفارش‌های paid از watermark (منهای OVERLAP_SECONDS) تا now - LAG_SECONDS؛ بعد watermark جلو می‌رود.
+    خروجی: تعداد سفارش‌های جمع‌شده.
+    """
+    until = horizon(now)
+    mark, _ = RollupWatermark.objects.get_or_create(name=WATERMARK)
+    pending = _unrolled().filter(paid_at__lt=until)
+    if mark.paid_before is not None:
+        pending = pending.filter(paid_at__gte=mark.paid_before - timedelta(seconds=conf("OVERLAP_SECONDS")))
+    total = _drain(pending.order_by("paid_at", "id"), batch_size or conf("BATCH_SIZE"))
+    RollupWatermark.objects.filter(name=WATERMARK).filter(
+        Q(paid_before=None) | Q(paid_before__lt=until),
+    ).update(paid_before=until, updated_at=timezone.now())
+    return total
+
+
+def backfill(batch_size=None, after_id=0):
+    """
+    همه‌ی سفارش‌های paid به ترتیب id، هر دسته در transaction خودش؛ قطع و ادامه بی‌خطر است.
+    yield: (آخرین id دسته، تعداد جمع‌شده در دسته)
+    """
+    batch_size = batch_size or conf("BATCH_SIZE")
+    while True:
+        ids = list(
+            Order.objects.filter(status="paid", id__gt=after_id).order_by("id").values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            return
+        after_id = ids[-1]
+        yield after_id, rollup_orders(ids)
+
+
+def recompute(day_from, day_to, batch_size=None):
+    """
+    جمع‌ها از صفر برای سفارش‌های ledger با روز در [day_from, day_to].
+    """
+    batch_size = batch_size or conf("BATCH_SIZE")
+    totals = {name: {} for name in DIMENSIONS}
+    ledger = RolledUpOrder.objects.filter(day__range=(day_from, day_to)).order_by("order_id")
+    last = 0
+    while True:
+        chunk = dict(ledger.filter(order_id__gt=last).values_list("order_id", "day")[:batch_size])
+        if not chunk:
+            return totals
+        last = max(chunk)
+        merge(totals, aggregate(chunk))
+
+
+def verify(day_from, day_to, batch_size=None):
+    """
+    مقایسه‌ی جدول‌ها با recompute. خروجی: {dimension: [(day, key, expected, actual)]}، فقط اختلاف‌ها
+    (None یعنی ردیف نیست). sku مقایسه نمی‌شود.
+    """
+    expected = recompute(day_from, day_to, batch_size)
+    diffs = {}
+    for name, model in DIMENSIONS.items():
+        actual = {
+            (row["day"], row[model.key]): {field: row[field] for field in COUNTERS}
+            for row in model.objects.filter(day__range=(day_from, day_to)).values("day", model.key, *COUNTERS)
+        }
+        want = {slot: {field: row[field] for field in COUNTERS} for slot, row in expected[name].items()}
+        diffs[name] = [
+            (day, key, want.get((day, key)), actual.get((day, key)))
+            for day, key in sorted(want.keys() | actual.keys())
+            if want.get((day, key)) != actual.get((day, key))
+        ]
+    return diffs
+
+
+@transaction.atomic
+def rebuild(day_from, day_to, batch_size=None):
+    """
+    ردیف‌های روزانه‌ی بازه را از ledger از نو می‌سازد. خروجی: تعداد ردیف‌های ساخته‌شده.
+    rollupهای همزمان روی همین روزها به IntegrityError می‌خورند و دوباره تلاش می‌شوند.
+    """
+    for model in DIMENSIONS.values():
+        model.objects.filter(day__range=(day_from, day_to)).delete()
+    totals = recompute(day_from, day_to, batch_size)
+    apply(totals)
+    return sum(len(rows) for rows in totals.values())
+
+
+def unrolled_count(now=None):
+    """
+    سفارش‌های paid قدیمی‌تر از LAG_SECONDS که در ledger نیستند (backfill یا catch-up لازم است).
+    """
+    return _unrolled().filter(Q(paid_at__lt=horizon(now)) | Q(paid_at=None)).count()
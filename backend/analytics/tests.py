@@ -0,0 +1,112 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from catalog.models import Brand, Category, Inventory, Product, Variant
+from orders.checkout import place_order
+from orders.models import Order, OrderItem
+from outbox.worker import run_batch
+from .models import BrandDailySales, ProductDailySales, RolledUpOrder, VariantDailySales
+from .rollups import catch_up, rollup_orders, verify
+
+
+class SalesRollupTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(title="Shoes", slug="shoes")
+        brand = Brand.objects.create(title="Acme", slug="acme")
+        self.product = Product.objects.create(title="Runner", slug="runner", category=category, brand=brand)
+        self.variants = []
+        for size in ("42", "43"):
+            variant = Variant.objects.create(product=self.product, sku=f"RUN-{size}", size=size, color="black",
+                                             price=1000)
+            Inventory.objects.create(variant=variant, quantity=50)
+            self.variants.append(variant)
+        self.client = APIClient()
+        self.today = timezone.localdate()
+
+    def pay(self, lines):
+        order = place_order(None, [{"variantId": v.id, "qty": qty} for v, qty in lines])
+        r = self.client.post("/api/payments/initiate/", {"order_id": order.id}, format="json")
+        authority = r.json()["authority"]
+        r = self.client.get("/api/payments/mock-return/", {"authority": authority, "status": "ok"})
+        self.assertTrue(r.json()["ok"])
+        return order
+
+    def drain_outbox(self):
+        counts = run_batch()
+        self.assertEqual(counts["done"], sum(counts.values()))
+
+    def paid_without_event(self, qty, created_days_ago=0):
+        # مثل سفارش‌های قبل از analytics یا رویدادی که worker هنوز اجرا نکرده
+        variant = self.variants[0]
+        order = Order.objects.create(status="paid", total_amount=1000 * qty)
+        Order.objects.filter(id=order.id).update(created_at=timezone.now() - timedelta(days=created_days_ago))
+        OrderItem.objects.create(order=order, variant_id=variant.id, sku=variant.sku, title="Runner", size="42",
+                                 color="black", unit_price=1000, quantity=qty, line_total=1000 * qty)
+        return order
+
+    def test_paid_orders_roll_up_once_through_the_outbox(self):
+        first = self.pay([(self.variants[0], 2), (self.variants[1], 1)])
+        self.pay([(self.variants[0], 1)])
+        self.drain_outbox()
+        self.assertEqual(rollup_orders([first.id]), 0)  # تحویل دوباره‌ی رویداد
+
+        brand = BrandDailySales.objects.get()
+        self.assertEqual((brand.day, brand.units, brand.revenue, brand.orders), (self.today, 4, 4000, 2))
+        self.assertEqual(ProductDailySales.objects.get(product_id=self.product.id).orders, 2)
+        self.assertEqual(
+            dict(VariantDailySales.objects.values_list("sku", "units")), {"RUN-42": 3, "RUN-43": 1},
+        )
+        self.assertTrue(all(not rows for rows in verify(self.today, self.today).values()))
+
+    def test_catch_up_and_backfill_find_orders_without_events(self):
+        recent = self.pay([(self.variants[0], 2)])
+        old = self.paid_without_event(qty=5, created_days_ago=3)
+        # رویداد outbox اجرا نشده و paid_at هنوز داخل LAG_SECONDS است
+        self.assertEqual(catch_up(), 0)
+        self.assertEqual(catch_up(now=timezone.now() + timedelta(minutes=5)), 1)
+        self.assertTrue(RolledUpOrder.objects.filter(order_id=recent.id).exists())
+
+        out = StringIO()
+        call_command("rollup_sales", "--backfill", "--batch-size", "1", stdout=out)
+        self.assertIn("Backfilled 1 order(s); 0 paid order(s) still missing.", out.getvalue())
+        self.assertEqual(RolledUpOrder.objects.get(order_id=old.id).day, self.today - timedelta(days=3))
+        self.drain_outbox()  # رویداد دیررس چیزی اضافه نمی‌کند
+        self.assertEqual(BrandDailySales.objects.get(day=self.today).units, 2)
+
+    def test_verify_detects_and_repairs_drift(self):
+        self.pay([(self.variants[0], 2)])
+        self.drain_outbox()
+        call_command("verify_sales_rollups", stdout=StringIO())
+        BrandDailySales.objects.update(units=99)
+        with self.assertRaises(CommandError):
+            call_command("verify_sales_rollups", stdout=StringIO())
+        call_command("verify_sales_rollups", "--repair", stdout=StringIO())
+        self.assertEqual(BrandDailySales.objects.get().units, 2)
+
+    def test_staff_api_reads_only_the_rollups(self):
+        self.pay([(self.variants[0], 2), (self.variants[1], 1)])
+        self.drain_outbox()
+        url = "/api/analytics/sales/variant/"
+        self.assertIn(self.client.get(url).status_code, (401, 403))
+
+        self.client.force_authenticate(User.objects.create_user("staff", password="x", is_staff=True))
+        with self.assertNumQueries(2):  # rollup + watermark
+            r = self.client.get(url)
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(
+            [(row["sku"], row["units"], row["revenue"]) for row in r.json()["results"]],
+            [("RUN-42", 2, 2000), ("RUN-43", 1, 1000)],
+        )
+        r = self.client.get("/api/analytics/sales/brand/", {"group": "day"})
+        self.assertEqual(r.json()["results"], [{
+            "day": self.today.isoformat(), "brand_id": self.product.brand_id, "units": 3, "revenue": 3000,
+            "orders": 1, "title": "Acme",
+        }])
+        self.assertEqual(self.client.get(url, {"from": "2024-13-01"}).status_code, 400)
+        self.assertEqual(self.client.get("/api/analytics/sales/color/").status_code, 404)
@@ -0,0 +1,6 @@
+from django.urls import path
+from .views import SalesAPIView
+
+urlpatterns = [
+    path("analytics/sales/<str:dimension>/", SalesAPIView.as_view()),
+]
@@ -0,0 +1,82 @@
+from datetime import date, timedelta
+
+from django.db.models import Max, Sum
+from django.http import Http404
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from catalog.models import Brand, Category, Product
+from .models import RollupWatermark
+from .rollups import COUNTERS, DIMENSIONS, WATERMARK
+
+# عنوان کلیدها از catalog؛ variant همان sku خودش را دارد
+LABELS = {"product": Product, "brand": Brand, "category": Category}
+
+
+class SalesAPIView(APIView):
+    """
+    GET /api/analytics/sales/<variant|product|brand|category>/  (فقط staff)
+    ?from=2024-06-01&to=2024-06-30   پیش‌فرض: ۳۰ روز تا امروز
+    &group=total|day                  total: جمع بازه به ترتیب مبلغ؛ day: سری روزانه
+    &id=12                            فقط یک کلید
+    &limit=100
+    فقط جدول‌های rollup خوانده می‌شوند (analytics/rollups.py)؛ watermark میزان تازگی است.
+    """
+    permission_classes = [IsAdminUser]
+    max_limit = 1000
+    max_days = 366
+
+    def get(self, request, dimension):
+        model = DIMENSIONS.get(dimension)
+        if model is None:
+            raise Http404
+        params = request.query_params
+        try:
+            day_to = date.fromisoformat(params["to"]) if params.get("to") else timezone.localdate()
+            day_from = date.fromisoformat(params["from"]) if params.get("from") else day_to - timedelta(days=29)
+            limit = min(int(params.get("limit", 100)), self.max_limit)
+            key = int(params["id"]) if params.get("id") else None
+        except ValueError:
+            return Response({"detail": "Invalid from/to/limit/id."}, status=status.HTTP_400_BAD_REQUEST)
+        group = params.get("group", "total")
+        if group not in ("total", "day"):
+            return Response({"detail": "group must be total or day."}, status=status.HTTP_400_BAD_REQUEST)
+        if not 0 <= (day_to - day_from).days < self.max_days or limit < 1:
+            return Response(
+                {"detail": f"from..to must span 1..{self.max_days} days; limit must be positive."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        rows = model.objects.filter(day__range=(day_from, day_to))
+        if key is not None:
+            rows = rows.filter(**{model.key: key})
+        extra = ("sku",) if dimension == "variant" else ()
+        if group == "day":
+            rows = rows.order_by("day", "-revenue", model.key).values("day", model.key, *extra, *COUNTERS)
+        else:
+            rows = (
+                rows.values(model.key)
+                .annotate(**{field: Sum(field) for field in COUNTERS}, **{name: Max(name) for name in extra})
+                .order_by("-revenue", model.key)
+            )
+        results = list(rows[:limit])
+
+        if dimension in LABELS:
+            titles = dict(
+                LABELS[dimension].objects.filter(id__in={row[model.key] for row in results}).values_list("id", "title")
+            )
+            for row in results:
+                row["title"] = titles.get(row[model.key])
+
+        mark = RollupWatermark.objects.filter(name=WATERMARK).values_list("paid_before", flat=True).first()
+        return Response({
+            "dimension": dimension,
+            "from": day_from,
+            "to": day_to,
+            "group": group,
+            "watermark": mark,
+            "results": results,
+        })
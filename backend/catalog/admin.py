@@ -1,37 +1,90 @@
 from django.contrib import admin
-from .models import Category, Brand, Product, ProductImage, Variant, Inventory
+from django.db.models import Q
+
+from config.admin import BoundedRelatedFieldListFilter, LargeTableAdmin
+from .models import Category, Brand, ImageAsset, Product, ProductImage, Variant, Inventory, InventoryAdjustment
+from .search import search_products
+
+# جستجوها روی index هستند: sku/slug/batch_id دقیق (unique index)، عنوان محصول از index متنی (catalog/search.py)
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
     list_display = ("id", "title", "slug")
     search_fields = ("title", "slug")
+    ordering = ("title",)
 
 @admin.register(Brand)
 class BrandAdmin(admin.ModelAdmin):
     list_display = ("id", "title", "slug")
     search_fields = ("title", "slug")
+    ordering = ("title",)
 
 class ProductImageInline(admin.TabularInline):
     model = ProductImage
     extra = 1
+    autocomplete_fields = ("asset",)
 
 class VariantInline(admin.TabularInline):
     model = Variant
     extra = 1
 
+    def get_queryset(self, request):
+        # عنوان هر ردیف inline همان Variant.__str__ است که محصول را می‌خواند
+        return super().get_queryset(request).select_related("product")
+
 @admin.register(Product)
-class ProductAdmin(admin.ModelAdmin):
+class ProductAdmin(LargeTableAdmin):
     list_display = ("id", "title", "slug", "category", "brand", "is_active", "created_at")
-    list_filter = ("is_active", "category", "brand")
-    search_fields = ("title", "slug")
+    list_select_related = ("category", "brand")
+    list_filter = (
+        "is_active",
+        ("category", BoundedRelatedFieldListFilter),
+        ("brand", BoundedRelatedFieldListFilter),
+    )
+    search_fields = ("=slug",)
+    search_help_text = "Exact slug or id, or words from the title (search index)."
+    autocomplete_fields = ("category", "brand")
     inlines = [ProductImageInline, VariantInline]
 
+    def get_search_results(self, request, queryset, search_term):
+        # فقط محصولات فعال در index متنی هستند؛ غیرفعال‌ها با slug یا id
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        match = Q(slug=term) | Q(id__in=search_products(term, limit=self.list_per_page * 4))
+        if term.isdigit():
+            match |= Q(id=int(term))
+        return queryset.filter(match), False
+
 @admin.register(Variant)
-class VariantAdmin(admin.ModelAdmin):
+class VariantAdmin(LargeTableAdmin):
     list_display = ("id", "sku", "product", "size", "color", "price", "is_active")
-    list_filter = ("is_active", "size", "color")
-    search_fields = ("sku", "product__title")
+    list_select_related = ("product",)
+    list_filter = ("is_active", "size")
+    search_fields = ("=sku", "=product__slug")
+    autocomplete_fields = ("product",)
+    sortable_by = ("id", "sku")
 
 @admin.register(Inventory)
-class InventoryAdmin(admin.ModelAdmin):
-    list_display = ("id", "variant", "quantity")
+class InventoryAdmin(LargeTableAdmin):
+    list_display = ("id", "variant", "quantity", "reserved")
+    list_select_related = ("variant__product",)  # Variant.__str__ عنوان محصول را می‌خواند
+    search_fields = ("=variant__sku",)
+    autocomplete_fields = ("variant",)
+    readonly_fields = ("reserved",)
+
+@admin.register(InventoryAdjustment)
+class InventoryAdjustmentAdmin(LargeTableAdmin):
+    list_display = ("id", "batch_id", "sku", "op", "value", "quantity_after", "created_at")
+    search_fields = ("=batch_id", "=sku")
+
+@admin.register(ImageAsset)
+class ImageAssetAdmin(LargeTableAdmin):
+    # فایل‌ها با upload (/api/products/<slug>/images/) یا add_product_images ساخته می‌شوند
+    list_display = ("id", "sha256", "format", "width", "height", "size", "status", "spec", "created_at")
+    list_filter = ("status",)
+    search_fields = ("=sha256",)
+    readonly_fields = ("sha256", "original", "format", "size", "width", "height", "spec", "renditions", "error")
+
+    def has_add_permission(self, request):
+        return False
@@ -3,3 +3,10 @@ from django.apps import AppConfig
 
 class CatalogConfig(AppConfig):
     name = 'catalog'
+
+    def ready(self):
+        from django.db.models.signals import post_migrate
+        from . import handlers, signals  # noqa: F401
+        from .search import ensure_schema
+
+        post_migrate.connect(ensure_schema, sender=self)
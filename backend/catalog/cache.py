@@ -0,0 +1,314 @@
+"""
+cache جزئیات محصول (ProductDetailAPIView).
+
+- بخش سنگین (تصاویر، variantها) با کلید slug و یک version token برای هر محصول نگه داشته می‌شود؛
+  هر تغییر در محصول/تصاویر/variantها token را عوض می‌کند (catalog_changed).
+- موجودی در یک fragment جدا با TTL کوتاه است تا تغییر موجودی بخش سنگین را بیرون نیندازد.
+- ETag از version و موجودی ساخته می‌شود و برای 304 نیازی به serialization نیست؛ Last-Modified از
+  updated_at ردیف‌ها و زمان ساخت version (تا حذف تصویر/variant هم دیده شود) - catalog/conditional.py.
+"""
+import copy
+import json
+import math
+import threading
+import time
+import uuid
+import zlib
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import aprefetch_related_objects
+from django.http import Http404
+from django.utils.module_loading import import_string
+
+from config.db_router import use_primary
+
+from .models import Inventory, Product
+from .serializers import ProductDetailSerializer
+
+DEFAULTS = {
+    "BACKEND": "catalog.cache.LocMemLRUBackend",
+    "OPTIONS": {"max_bytes": 32 * 1024 * 1024},
+    "TIMEOUT": 30,  # درون‌پروسه‌ای: invalidation پروسه‌های دیگر به آن نمی‌رسد
+    "STOCK_TIMEOUT": 10,
+}
+
+
+class LocMemLRUBackend:
+    """
+    LRU درون‌پروسه‌ای با سقف حجم (بایت‌های JSON مقدارها).
+    فقط برای یک پروسه؛ با چند worker از DjangoCacheBackend روی cache مشترک استفاده کنید.
+    """
+    def __init__(self, max_bytes=32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._data = OrderedDict()  # key -> (value, size, expires_at)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            if item[2] is not None and item[2] < time.monotonic():
+                self._remove(key)
+                return None
+            self._data.move_to_end(key)
+            return item[0]
+
+    def set(self, key, value, timeout=None):
+        size = len(key) + len(json.dumps(value, separators=(",", ":"), default=str))
+        if size > self.max_bytes:
+            return
+        expires_at = time.monotonic() + timeout if timeout else None
+        with self._lock:
+            self._remove(key)
+            self._data[key] = (value, size, expires_at)
+            self.size += size
+            while self.size > self.max_bytes:
+                self._remove(next(iter(self._data)))
+
+    # بدون I/O؛ نسخه‌ی async همان نسخه‌ی sync است
+    async def aget(self, key):
+        return self.get(key)
+
+    async def aset(self, key, value, timeout=None):
+        self.set(key, value, timeout)
+
+    def delete_many(self, keys):
+        with self._lock:
+            for key in keys:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.size = 0
+
+    def _remove(self, key):
+        item = self._data.pop(key, None)
+        if item is not None:
+            self.size -= item[1]
+
+
+class DjangoCacheBackend:
+    """
+    روی cache framework جنگو (Redis/Memcached/...) تا بین workerها مشترک باشد.
+    """
+    def __init__(self, alias="default"):
+        self.cache = caches[alias]
+
+    def get(self, key):
+        return self.cache.get(key)
+
+    def set(self, key, value, timeout=None):
+        self.cache.set(key, value, timeout)
+
+    async def aget(self, key):
+        return await self.cache.aget(key)
+
+    async def aset(self, key, value, timeout=None):
+        await self.cache.aset(key, value, timeout)
+
+    def delete_many(self, keys):
+        self.cache.delete_many(keys)
+
+    def clear(self):
+        self.cache.clear()
+
+
+def new_version():
+    # زمان invalidation (گرد به بالا) داخل token برای Last-Modified
+    return f"{math.ceil(time.time())}-{uuid.uuid4().hex[:16]}"
+
+
+def version_time(version):
+    try:
+        return int(version.split("-", 1)[0])
+    except ValueError:
+        return None
+
+
+class ProductDetailCache:
+    def __init__(self, backend, timeout, stock_timeout):
+        self.backend = backend
+        self.timeout = timeout
+        self.stock_timeout = stock_timeout
+
+    # --- keys ---
+
+    @staticmethod
+    def detail_key(slug):
+        return f"catalog:detail:{slug}"
+
+    @staticmethod
+    def version_key(product_id):
+        return f"catalog:version:{product_id}"
+
+    @staticmethod
+    def stock_key(product_id):
+        return f"catalog:stock:{product_id}"
+
+    # --- read ---
+
+    def get_version(self, product_id):
+        version = self.backend.get(self.version_key(product_id))
+        if version is None:
+            # token گم‌شده (evict/restart) یعنی هر payload قبلی نامعتبر است
+            version = new_version()
+            self.backend.set(self.version_key(product_id), version, None)
+        return version
+
+    def get_detail(self, slug):
+        """
+        خروجی: (entry, stock) که entry = {"product_id", "version", "payload"} است.
+        """
+        entry = self.backend.get(self.detail_key(slug))
+        if entry is None or entry["version"] != self.backend.get(self.version_key(entry["product_id"])):
+            entry = self._load(slug)
+        return entry, self.get_stock(entry["product_id"])
+
+    def _load(self, slug):
+        product_id = (
+            Product.objects.filter(slug=slug, is_active=True).values_list("id", flat=True).first()
+        )
+        if product_id is None:
+            raise Http404
+        # token قبل از خواندن دیتابیس؛ اگر وسط کار عوض شود entry خودبه‌خود نامعتبر می‌ماند.
+        # از primary می‌خوانیم تا نسخه‌ی قدیمی replica با token جدید cache نشود.
+        version = self.get_version(product_id)
+        with use_primary():
+            product = (
+                Product.objects
+                .filter(id=product_id, is_active=True)
+                .select_related("category", "brand")
+                .prefetch_related("images__asset", "variants", "variants__inventory")
+                .first()
+            )
+        if product is None:
+            raise Http404
+        entry = self._entry(product_id, version, product)
+        self.backend.set(self.detail_key(slug), entry, self.timeout)
+        return entry
+
+    @staticmethod
+    def _entry(product_id, version, product):
+        payload = ProductDetailSerializer(product).data
+        changed = [product.updated_at, *(i.updated_at for i in product.images.all()),
+                   *(v.updated_at for v in product.variants.all())]
+        # موجودی در fragment خودش است
+        last_modified = max(max(changed).timestamp(), version_time(version) or 0)
+        return {
+            "product_id": product_id, "version": version, "last_modified": last_modified,
+            "payload": json.loads(json.dumps(payload)),
+        }
+
+    def get_stock(self, product_id):
+        stock = self.backend.get(self.stock_key(product_id))
+        if stock is None:
+            stock = self._set_stock(product_id, list(self._stock_rows(product_id)))
+        return stock
+
+    @staticmethod
+    def _stock_rows(product_id):
+        return (
+            Inventory.objects
+            .filter(variant__product_id=product_id)
+            .values_list("variant_id", "quantity", "reserved", "updated_at")
+        )
+
+    def _set_stock(self, product_id, rows):
+        stock = self._stock(rows)
+        self.backend.set(self.stock_key(product_id), stock, self.stock_timeout)
+        return stock
+
+    @staticmethod
+    def _stock(rows):
+        quantities = {str(variant_id): quantity - reserved for variant_id, quantity, reserved, _ in rows}
+        digest = zlib.crc32(json.dumps(quantities, sort_keys=True).encode())
+        last_modified = max((row[3] for row in rows), default=None)
+        return {
+            "quantities": quantities, "digest": f"{digest:08x}",
+            "last_modified": last_modified.timestamp() if last_modified else None,
+        }
+
+    # --- read (async، برای viewهای ASGI) ---
+    # دسترسی به backend هم await می‌شود (Redis/Memcached زیر DjangoCacheBackend)
+
+    async def aget_version(self, product_id):
+        version = await self.backend.aget(self.version_key(product_id))
+        if version is None:
+            version = new_version()
+            await self.backend.aset(self.version_key(product_id), version, None)
+        return version
+
+    async def aget_detail(self, slug):
+        entry = await self.backend.aget(self.detail_key(slug))
+        if entry is None or entry["version"] != await self.backend.aget(self.version_key(entry["product_id"])):
+            entry = await self._aload(slug)
+        return entry, await self.aget_stock(entry["product_id"])
+
+    async def _aload(self, slug):
+        product_id = await (
+            Product.objects.filter(slug=slug, is_active=True).values_list("id", flat=True).afirst()
+        )
+        if product_id is None:
+            raise Http404
+        version = await self.aget_version(product_id)
+        with use_primary():
+            product = await (
+                Product.objects
+                .filter(id=product_id, is_active=True)
+                .select_related("category", "brand")
+                .afirst()
+            )
+            if product is None:
+                raise Http404
+            await aprefetch_related_objects([product], "images__asset", "variants", "variants__inventory")
+        # همه‌چیز prefetch شده؛ serialization کوئری نمی‌زند
+        entry = self._entry(product_id, version, product)
+        await self.backend.aset(self.detail_key(slug), entry, self.timeout)
+        return entry
+
+    async def aget_stock(self, product_id):
+        stock = await self.backend.aget(self.stock_key(product_id))
+        if stock is None:
+            stock = self._stock([row async for row in self._stock_rows(product_id)])
+            await self.backend.aset(self.stock_key(product_id), stock, self.stock_timeout)
+        return stock
+
+    @staticmethod
+    def etag(entry, stock):
+        return f'"{entry["product_id"]}-{entry["version"]}-{stock["digest"]}"'
+
+    @staticmethod
+    def render(entry, stock):
+        payload = copy.deepcopy(entry["payload"])
+        for variant in payload["variants"]:
+            variant["quantity"] = stock["quantities"].get(str(variant["id"]))
+        return payload
+
+    # --- invalidation ---
+
+    def invalidate(self, product_ids=(), stock_product_ids=()):
+        for product_id in product_ids:
+            self.backend.set(self.version_key(product_id), new_version(), None)
+        keys = [self.stock_key(pid) for pid in set(product_ids) | set(stock_product_ids)]
+        if keys:
+            self.backend.delete_many(keys)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_detail_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                conf = {**DEFAULTS, **getattr(settings, "CATALOG_DETAIL_CACHE", {})}
+                backend = import_string(conf["BACKEND"])(**conf["OPTIONS"])
+                _cache = ProductDetailCache(backend, conf["TIMEOUT"], conf["STOCK_TIMEOUT"])
+    return _cache
@@ -0,0 +1,112 @@
+from django.db import transaction
+
+from .images import display_url, rendition_urls
+from .models import Product, ProductCard, ProductImage, Variant
+
+CARD_FIELDS = [
+    "title", "slug", "category_slug", "category_title", "brand_slug", "brand_title", "thumbnail",
+    "thumbnail_renditions", "min_price", "max_price", "sizes", "colors", "total_stock", "created_at", "updated_at",
+]
+
+SIZE_ORDER = {size: i for i, (size, _) in enumerate(Variant.SIZE_CHOICES)}
+
+
+def build_cards(product_ids):
+    """
+    ProductCardهای محصولات فعال را با سه کوئری می‌سازد (ذخیره نمی‌کند).
+    """
+    products = (
+        Product.objects
+        .filter(id__in=product_ids, is_active=True)
+        .values("id", "title", "slug", "created_at",
+                "category__slug", "category__title", "brand__slug", "brand__title")
+    )
+    cards = {
+        p["id"]: ProductCard(
+            product_id=p["id"],
+            title=p["title"],
+            slug=p["slug"],
+            category_slug=p["category__slug"],
+            category_title=p["category__title"],
+            brand_slug=p["brand__slug"],
+            brand_title=p["brand__title"],
+            created_at=p["created_at"],
+        )
+        for p in products
+    }
+    if not cards:
+        return []
+
+    # اولین تصویر به ترتیب ProductImage.Meta.ordering؛ rendition اندازه‌ی card اگر ساخته شده باشد
+    seen = set()
+    for product_id, url, original, renditions in (
+        ProductImage.objects
+        .filter(product_id__in=list(cards))
+        .order_by("product_id", "sort_order", "id")
+        .values_list("product_id", "image_url", "asset__original", "asset__renditions")
+    ):
+        if product_id not in seen:
+            seen.add(product_id)
+            cards[product_id].thumbnail = display_url(url, original, renditions)
+            cards[product_id].thumbnail_renditions = rendition_urls(renditions)
+
+    facets = {}
+    for product_id, size, color, price, quantity, reserved in (
+        Variant.objects
+        .filter(product_id__in=list(cards), is_active=True)
+        .values_list("product_id", "size", "color", "price", "inventory__quantity", "inventory__reserved")
+    ):
+        f = facets.setdefault(product_id, {"prices": [], "sizes": set(), "colors": set(), "stock": 0})
+        f["prices"].append(price)
+        available = (quantity or 0) - (reserved or 0)
+        if available > 0:
+            f["sizes"].add(size)
+            f["colors"].add(color)
+            f["stock"] += available
+
+    for product_id, f in facets.items():
+        card = cards[product_id]
+        card.min_price = min(f["prices"])
+        card.max_price = max(f["prices"])
+        card.sizes = ",".join(sorted(f["sizes"], key=lambda s: SIZE_ORDER.get(s, len(SIZE_ORDER))))
+        card.colors = ",".join(sorted(f["colors"]))
+        card.total_stock = f["stock"]
+
+    return list(cards.values())
+
+
+def refresh_cards(product_ids):
+    """
+    کارت محصولات داده شده را upsert می‌کند و کارت محصولات غیرفعال/حذف شده را پاک می‌کند.
+    """
+    product_ids = set(product_ids)
+    if not product_ids:
+        return
+    cards = build_cards(product_ids)
+    ProductCard.objects.bulk_create(
+        cards,
+        update_conflicts=True,
+        unique_fields=["product"],
+        update_fields=CARD_FIELDS,
+    )
+    stale = product_ids - {c.product_id for c in cards}
+    if stale:
+        ProductCard.objects.filter(product_id__in=stale).delete()
+
+
+def rebuild_all(chunk_size=2000):
+    """
+    بازسازی کامل: کارت همه‌ی محصولات فعال را می‌سازد و بقیه را حذف می‌کند.
+    """
+    ProductCard.objects.exclude(product__is_active=True).delete()
+    ids = Product.objects.filter(is_active=True).order_by("id").values_list("id", flat=True)
+    last_id = 0
+    total = 0
+    while True:
+        chunk = list(ids.filter(id__gt=last_id)[:chunk_size])
+        if not chunk:
+            return total
+        with transaction.atomic():
+            refresh_cards(chunk)
+        total += len(chunk)
+        last_id = chunk[-1]
@@ -0,0 +1,49 @@
+"""
+صف تغییرات catalog: id محصولات/variantهای تغییر کرده در طول یک transaction جمع می‌شوند
+و بعد از commit یک بار با signal catalog_changed پخش می‌شوند (ProductCard، cache و ...).
+تغییر موجودی فقط fragment موجودی cache را پاک می‌کند؛ کارت‌ها را worker outbox به‌روز می‌کند.
+"""
+import functools
+import threading
+
+from django.db import transaction
+
+from config.db_router import use_primary
+
+from .models import Variant
+
+_pending = threading.local()
+
+
+def schedule(product_ids=(), variant_ids=()):
+    """
+    product_ids: تغییر در خود محصول/تصاویر/variantها
+    variant_ids: فقط تغییر موجودی
+    """
+    state = getattr(_pending, "state", None)
+    if state is None:
+        state = _pending.state = {"products": set(), "variants": set()}
+        state["flush"] = functools.partial(_flush, state)
+    state["products"].update(product_ids)
+    state["variants"].update(variant_ids)
+    # هر بار ثبت می‌شود چون callback در savepoint یا transaction rollback‌شده دور ریخته می‌شود؛ اولین
+    # اجرا همه را پخش می‌کند و بقیه کاری نمی‌کنند. idهای transaction برگشتی فقط یک refresh اضافه‌اند.
+    # خارج از transaction همین‌جا اجرا می‌شود
+    transaction.on_commit(state["flush"])
+
+
+def _flush(state):
+    from .signals import catalog_changed
+
+    if getattr(_pending, "state", None) is not state:
+        return  # قبلاً پخش شده
+    _pending.state = None
+
+    # receiverها (کارت، index، cache) باید داده‌ی همین commit را ببینند نه replica عقب‌مانده
+    with use_primary():
+        stock_product_ids = set()
+        if state["variants"]:
+            stock_product_ids.update(
+                Variant.objects.filter(id__in=state["variants"]).values_list("product_id", flat=True)
+            )
+        catalog_changed.send(sender=None, product_ids=state["products"], stock_product_ids=stock_product_ids)
@@ -0,0 +1,64 @@
+"""
+HTTP cache برای endpointهای خواندنی catalog: ETag، Last-Modified، Cache-Control و GET شرطی.
+
+اعتبارسنج‌ها از داده‌ای ساخته می‌شوند که view در هر حال دارد (ردیف‌های صفحه‌ی لیست، entry و
+fragment موجودی cache جزئیات)، پس نه کوئری اضافه لازم است نه serialization؛ 304 قبل از
+serialize برمی‌گردد. ETag اعتبارسنج اصلی است؛ Last-Modified دقت ثانیه دارد و برای لیست حذف
+یک ردیف از صفحه را نمی‌بیند (کلاینت‌هایی که فقط If-Modified-Since می‌فرستند).
+Cache-Control هر endpoint: settings.CATALOG_HTTP_CACHE
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+
+def cache_control(endpoint):
+    """
+    {"public": True, "max-age": 30} -> "public, max-age=30"
+    """
+    directives = []
+    for name, value in settings.CATALOG_HTTP_CACHE[endpoint].items():
+        if value is True:
+            directives.append(name)
+        elif value is not False and value is not None:
+            directives.append(f"{name}={value}")
+    return ", ".join(directives)
+
+
+def conditional(request, endpoint, etag, last_modified=None):
+    """
+    last_modified: timestamp یا None.
+    خروجی: (headers برای پاسخ کامل، پاسخ 304/412 یا None)
+    """
+    headers = {"ETag": etag, "Cache-Control": cache_control(endpoint)}
+    if last_modified is not None:
+        last_modified = int(last_modified)
+        headers["Last-Modified"] = http_date(last_modified)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        for name, value in headers.items():
+            response[name] = value
+    return headers, response
+
+
+def page_validators(request, rows, has_next):
+    """
+    ETag و Last-Modified یک صفحه‌ی لیست از (product_id, updated_at) ردیف‌های کارت؛ هر تغییر محصول،
+    variant، موجودی یا تصویر کارت را دوباره می‌نویسد (catalog/cards.py) و updated_at آن جلو می‌رود.
+    """
+    digest = hashlib.md5(request.get_full_path().encode(), usedforsecurity=False)
+    for row in rows:
+        digest.update(f"{row['product_id']}:{row['updated_at'].isoformat()};".encode())
+    digest.update(b"+" if has_next else b".")
+    last_modified = max((row["updated_at"] for row in rows), default=None)
+    return f'"{digest.hexdigest()}"', last_modified.timestamp() if last_modified else None
+
+
+def detail_last_modified(entry, stock):
+    """
+    entry و fragment موجودی cache جزئیات (catalog/cache.py)؛ entry قدیمی بدون زمان یعنی "همین حالا".
+    """
+    return max(entry.get("last_modified") or time.time(), stock.get("last_modified") or 0)
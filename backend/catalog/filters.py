@@ -0,0 +1,56 @@
+from django.db.models import Exists, F, OuterRef
+from rest_framework.exceptions import ValidationError
+
+from .models import Variant
+
+
+def _int_param(params, name):
+    value = params.get(name)
+    if value in (None, ""):
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValidationError({name: "Must be an integer."})
+
+
+def filter_products(queryset, params):
+    """
+    فیلترهای لیست محصولات (روی ProductCard)، همه در SQL:
+      ?category=<slug>&brand=<slug>&size=42&color=black&min_price=..&max_price=..&in_stock=1
+
+    فیلترهای سطح Variant با یک EXISTS روی همان Variant اعمال می‌شوند
+    (سایز/رنگ/قیمت/موجودی باید مال یک Variant باشند) و ردیف تکراری نمی‌سازند.
+    """
+    category = params.get("category")
+    if category:
+        queryset = queryset.filter(category_slug=category)
+
+    brand = params.get("brand")
+    if brand:
+        queryset = queryset.filter(brand_slug=brand)
+
+    variant_filters = {}
+    if params.get("size"):
+        variant_filters["size"] = params["size"]
+    if params.get("color"):
+        variant_filters["color"] = params["color"]
+
+    min_price = _int_param(params, "min_price")
+    if min_price is not None:
+        variant_filters["price__gte"] = min_price
+    max_price = _int_param(params, "max_price")
+    if max_price is not None:
+        variant_filters["price__lte"] = max_price
+
+    in_stock = params.get("in_stock", "").lower() in ("1", "true", "yes")
+
+    if variant_filters:
+        variants = Variant.objects.filter(product=OuterRef("product_id"), is_active=True, **variant_filters)
+        if in_stock:
+            variants = variants.filter(inventory__quantity__gt=F("inventory__reserved"))
+        queryset = queryset.filter(Exists(variants))
+    elif in_stock:
+        queryset = queryset.filter(total_stock__gt=0)
+
+    return queryset
@@ -0,0 +1,12 @@
+"""
+handlerهای outbox برای catalog (worker: run_outbox).
+"""
+from outbox.events import handler
+from .cards import refresh_cards
+from .models import Variant
+
+
+@handler("catalog.stock_changed")
+def refresh_stock_cards(payload, event):
+    # total_stock/sizes/colors کارت لیست؛ fragment موجودی جزئیات همان لحظه‌ی commit پاک شده است
+    refresh_cards(Variant.objects.filter(id__in=payload["variant_ids"]).values_list("product_id", flat=True))
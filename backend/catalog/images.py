@@ -0,0 +1,274 @@
+"""
+تصاویر محصول: فایل‌های content-addressed و renditionهای از پیش ساخته (thumbnail، card، zoom) در WebP و JPEG.
+
+    asset, created = ingest(upload)   # upload یا فایل محلی؛ بایت‌های تکراری همان asset قبلی است
+    render_pending(executor)          # manage.py render_images، در process pool و بیرون از پروسه‌های وب
+
+مسیرها زیر CATALOG_IMAGES["ROOT"]:
+    originals/ab/<sha256>.<ext>
+    r/<spec>/ab/<sha256>-<rendition>.<format>     spec: hash تنظیمات RENDITIONS و FORMATS
+نام هر فایل از محتوا و تنظیمات می‌آید و هرگز بازنویسی نمی‌شود (Cache-Control: immutable ممکن است).
+تغییر اندازه‌ها spec را عوض می‌کند؛ render_images assetهای spec قدیمی را دوباره می‌سازد.
+worker فقط فایل می‌خواند و می‌نویسد؛ ثبت نتیجه و refresh کارت/cache محصولات در پروسه‌ی اصلی است.
+Pillow وابستگی اختیاری است: بدون آن upload ذخیره می‌شود و render با ImageError شکست می‌خورد.
+"""
+import hashlib
+import json
+import os
+import tempfile
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+
+from . import changes
+from .models import ImageAsset, ProductImage
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # وابستگی اختیاری
+    Image = ImageOps = None
+
+# امضای چند بایت اول -> پسوند؛ بدون باز کردن تصویر در درخواست
+SIGNATURES = [
+    (b"\xff\xd8\xff", "jpg"),
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"GIF87a", "gif"),
+    (b"GIF89a", "gif"),
+]
+FORMAT_NAMES = {"webp": ("WEBP", "webp"), "jpeg": ("JPEG", "jpg")}
+
+
+class ImageError(Exception):
+    pass
+
+
+def conf(name):
+    return settings.CATALOG_IMAGES[name]
+
+
+def spec_version():
+    spec = json.dumps([conf("RENDITIONS"), conf("FORMATS")], sort_keys=True)
+    return hashlib.sha256(spec.encode()).hexdigest()[:12]
+
+
+def sniff(head):
+    for signature, ext in SIGNATURES:
+        if head.startswith(signature):
+            return ext
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+def _path(relpath):
+    path = os.path.join(conf("ROOT"), relpath)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+
+def _chunks(fileobj):
+    if hasattr(fileobj, "chunks"):  # UploadedFile
+        yield from fileobj.chunks()
+        return
+    while chunk := fileobj.read(64 * 1024):
+        yield chunk
+
+
+def ingest(fileobj):
+    """
+    فایل را stream می‌کند (hash و کپی در یک گذر)، یک بار ذخیره می‌کند و asset را برمی‌گرداند.
+    خروجی: (asset, created)
+    """
+    root = conf("ROOT")
+    os.makedirs(root, exist_ok=True)
+    digest, size, head = hashlib.sha256(), 0, b""
+    with tempfile.NamedTemporaryFile(dir=root, prefix=".upload-", delete=False) as tmp:
+        try:
+            for chunk in _chunks(fileobj):
+                if len(head) < 16:
+                    head += chunk[:16]
+                size += len(chunk)
+                if size > conf("MAX_UPLOAD_BYTES"):
+                    raise ImageError(f"Image is larger than {conf('MAX_UPLOAD_BYTES')} bytes.")
+                digest.update(chunk)
+                tmp.write(chunk)
+            ext = sniff(head)
+            if ext is None:
+                raise ImageError("Unsupported image format (jpeg, png, webp or gif).")
+        except BaseException:
+            os.unlink(tmp.name)
+            raise
+
+    sha = digest.hexdigest()
+    original = f"originals/{sha[:2]}/{sha}.{ext}"
+    path = _path(original)
+    if os.path.exists(path):
+        os.unlink(tmp.name)  # همان محتوا قبلاً ذخیره شده
+    else:
+        os.replace(tmp.name, path)
+    return ImageAsset.objects.get_or_create(
+        sha256=sha, defaults={"original": original, "format": ext, "size": size},
+    )
+
+
+def ingest_path(path):
+    with open(path, "rb") as f:
+        return ingest(f)
+
+
+# --- render (در پروسه‌ی worker؛ بدون دیتابیس و settings) ---
+
+def _save(image, root, relpath, fmt, options):
+    path = os.path.join(root, relpath)
+    if os.path.exists(path):  # نام به محتوا و spec وابسته است
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".render-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            image.save(f, FORMAT_NAMES[fmt][0], **options)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def render_source(root, original, sha, spec, renditions, formats, max_pixels):
+    """
+    خروجی: {"width", "height", "renditions"} با مسیرهای نسبی؛ خطای Pillow به فراخواننده می‌رسد.
+    """
+    if Image is None:
+        raise ImageError("Pillow is not installed.")
+    Image.MAX_IMAGE_PIXELS = max_pixels  # بیشتر از این DecompressionBombError
+    with Image.open(os.path.join(root, original)) as source:
+        width, height = source.size
+        if source.getexif().get(0x0112) in (5, 6, 7, 8):  # EXIF orientation با چرخش 90 درجه
+            width, height = height, width
+        # JPEG از همان ابتدا با مقیاس کوچک‌تر decode می‌شود (دست‌کم به اندازه‌ی بزرگ‌ترین rendition)
+        largest = max(max(size["width"], size["height"]) for size in renditions.values())
+        source.draft("RGB", (largest, largest))
+        image = ImageOps.exif_transpose(source)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if image.mode in ("P", "LA", "PA") else "RGB")
+
+        result = {}
+        for name, size in renditions.items():
+            box = (size["width"], size["height"])
+            if size.get("fit") == "cover":
+                out = ImageOps.fit(image, box, Image.Resampling.LANCZOS)
+            else:
+                out = image.copy()
+                out.thumbnail(box, Image.Resampling.LANCZOS)  # بزرگ نمی‌کند
+            entry = {"width": out.width, "height": out.height}
+            for fmt, options in formats.items():
+                frame = out
+                if fmt == "jpeg" and out.mode == "RGBA":
+                    frame = Image.new("RGB", out.size, "white")
+                    frame.paste(out, mask=out.getchannel("A"))
+                relpath = f"r/{spec}/{sha[:2]}/{sha}-{name}.{FORMAT_NAMES[fmt][1]}"
+                _save(frame, root, relpath, fmt, options)
+                entry[fmt] = relpath
+            result[name] = entry
+    return {"width": width, "height": height, "renditions": result}
+
+
+# --- اجرا و ثبت نتیجه (پروسه‌ی اصلی) ---
+
+def pending(force=False):
+    """
+    assetهایی که render لازم دارند: pending، یا ready با spec قدیمی؛ با force همه (failedها هم).
+    """
+    if force:
+        return ImageAsset.objects.order_by("id")
+    return ImageAsset.objects.filter(Q(status="pending") | Q(status="ready") & ~Q(spec=spec_version())).order_by("id")
+
+
+def render_assets(assets, executor=None):
+    """
+    executor: ProcessPoolExecutor (یا None برای اجرا در همین پروسه).
+    خروجی: {"ready": n, "failed": n}
+    """
+    spec = spec_version()
+    args = (conf("RENDITIONS"), conf("FORMATS"), conf("MAX_PIXELS"))
+    root = str(conf("ROOT"))
+    if executor is None:
+        jobs = [(asset, _call(render_source, root, asset.original, asset.sha256, spec, *args)) for asset in assets]
+    else:
+        futures = [
+            (asset, executor.submit(render_source, root, asset.original, asset.sha256, spec, *args))
+            for asset in assets
+        ]
+        jobs = [(asset, _call(future.result)) for asset, future in futures]
+
+    counts = {"ready": 0, "failed": 0}
+    done = []
+    with transaction.atomic():
+        for asset, (result, error) in jobs:
+            if error is None:
+                ImageAsset.objects.filter(id=asset.id).update(
+                    status="ready", spec=spec, error="", width=result["width"], height=result["height"],
+                    renditions=result["renditions"],
+                )
+                done.append(asset.id)
+                counts["ready"] += 1
+            else:
+                ImageAsset.objects.filter(id=asset.id).update(status="failed", error=error)
+                counts["failed"] += 1
+        if done:
+            # کارت لیست، cache جزئیات و ETagها بعد از commit (catalog/changes.py)
+            changes.schedule(
+                product_ids=ProductImage.objects.filter(asset_id__in=done).values_list("product_id", flat=True)
+            )
+    return counts
+
+
+def _call(func, *args):
+    try:
+        return func(*args), None
+    except Exception as e:  # فایل خراب، DecompressionBomb، نبود Pillow، ...
+        return None, f"{type(e).__name__}: {e}"
+
+
+def render_pending(executor=None, batch_size=50, force=False):
+    """
+    همه‌ی assetهای در انتظار را دسته به دسته render می‌کند. خروجی: {"ready": n, "failed": n}
+    """
+    totals = {"ready": 0, "failed": 0}
+    last_id = 0
+    while True:
+        batch = list(pending(force).filter(id__gt=last_id)[:batch_size])
+        if not batch:
+            return totals
+        last_id = batch[-1].id
+        for key, n in render_assets(batch, executor).items():
+            totals[key] += n
+
+
+# --- URLها (serializerها و کارت) ---
+
+def media_url(relpath):
+    return f"{conf('URL')}{relpath}"
+
+
+def rendition_urls(renditions):
+    """
+    {"card": {"width", "height", "webp": مسیر, ...}} -> همان با URL؛ None برای تصویر بدون rendition.
+    """
+    if not renditions:
+        return None
+    return {
+        name: {key: media_url(value) if key in FORMAT_NAMES else value for key, value in entry.items()}
+        for name, entry in renditions.items()
+    }
+
+
+def display_url(image_url, original=None, renditions=None, rendition="card", fmt="jpeg"):
+    """
+    یک URL برای جاهایی که رشته می‌خواهند (thumbnail): rendition، بعد فایل اصلی، بعد URL خارجی.
+    """
+    if renditions and rendition in renditions:
+        return media_url(renditions[rendition][fmt])
+    if original:
+        return media_url(original)
+    return image_url or None
@@ -0,0 +1,312 @@
+"""
+import دسته‌ای catalog از CSV یا NDJSON (هر ردیف = یک Variant).
+
+فایل به صورت generator خوانده می‌شود و ردیف‌ها در chunkهای ثابت با
+bulk_create(update_conflicts=True) روی کلیدهای طبیعی upsert می‌شوند:
+Category/Brand/Product با slug، Variant با sku، Inventory با variant.
+
+ستون‌ها:
+  category_slug, category_title, brand_slug, brand_title,
+  product_slug, product_title, description, product_active,
+  sku, size, color, price, variant_active, quantity, images
+images در CSV با "|" جدا می‌شود و در NDJSON یک لیست است؛ اگر ستون images باشد
+تصاویر محصول با همین لیست جایگزین می‌شوند.
+"""
+import csv
+import functools
+import io
+import json
+import time
+from dataclasses import dataclass, field
+
+from django.core.exceptions import ValidationError
+from django.core.validators import URLValidator, validate_slug
+from django.db import DatabaseError, transaction
+
+from .inventory import INT_MAX, INTEGER
+from .models import Brand, Category, Inventory, Product, ProductImage, Variant
+from .signals import products_changed
+
+SIZES = {size for size, _ in Variant.SIZE_CHOICES}
+TRUE_VALUES = {"1", "true", "yes", "y", "t"}
+FALSE_VALUES = {"0", "false", "no", "n", "f"}
+_validate_url = URLValidator()
+
+
+def read_rows(stream, fmt):
+    """
+    (شماره‌ی خط، dict) را یکی‌یکی برمی‌گرداند؛ stream می‌تواند باینری (فایل آپلود) باشد.
+    """
+    if isinstance(stream.read(0), bytes):
+        stream = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+    elif fmt == "ndjson":
+        for line_num, line in enumerate(stream, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield line_num, {"__error__": f"Invalid JSON: {e}"}
+                continue
+            yield line_num, row if isinstance(row, dict) else {"__error__": "Expected a JSON object."}
+    else:
+        raise ValueError(f"Unknown format: {fmt}")
+
+
+def _text(row, name, errors, max_length, required=True):
+    value = row.get(name)
+    value = "" if value is None else str(value).strip()
+    if required and not value:
+        errors[name] = "This field is required."
+    elif len(value) > max_length:
+        errors[name] = f"Ensure this field has no more than {max_length} characters."
+    return value
+
+
+# هر محصول در چند ردیف (یک ردیف برای هر variant) تکرار می‌شود؛ validate تکراری را cache می‌کنیم
+@functools.lru_cache(maxsize=4096)
+def _slug_error(value):
+    try:
+        validate_slug(value)
+    except ValidationError as e:
+        return e.messages[0]
+    return None
+
+
+@functools.lru_cache(maxsize=4096)
+def _parse_images(value):
+    urls = tuple(u.strip() for u in value.split("|") if u.strip())
+    for url in urls:
+        try:
+            _validate_url(url)
+        except ValidationError:
+            return None, f"Invalid URL: {url}"
+    return urls, None
+
+
+def _slug(row, name, errors, max_length):
+    value = _text(row, name, errors, max_length)
+    if value and name not in errors:
+        error = _slug_error(value)
+        if error:
+            errors[name] = error
+    return value
+
+
+def _int(row, name, errors, minimum=None, maximum=INT_MAX):
+    # فقط int در JSON یا رشته‌ی ارقام ASCII؛ 1.9 و true عدد صحیح نیستند
+    value = row.get(name)
+    if isinstance(value, str) and INTEGER.fullmatch(value.strip()):
+        value = int(value)
+    if not isinstance(value, int) or isinstance(value, bool):
+        errors[name] = "A valid integer is required."
+        return None
+    if minimum is not None and value < minimum:
+        errors[name] = f"Ensure this value is greater than or equal to {minimum}."
+    elif value > maximum:
+        errors[name] = f"Ensure this value is less than or equal to {maximum}."
+    return value
+
+
+def _bool(row, name, errors, default=True):
+    value = row.get(name)
+    if value is None or value == "":
+        return default
+    if isinstance(value, bool):
+        return value
+    value = str(value).strip().lower()
+    if value in TRUE_VALUES:
+        return True
+    if value in FALSE_VALUES:
+        return False
+    errors[name] = "Must be a boolean."
+    return default
+
+
+def _images(row, errors):
+    if "images" not in row:
+        return None
+    value = row["images"]
+    if isinstance(value, list) and all(isinstance(u, str) for u in value):
+        value = "|".join(value)
+    if not isinstance(value, str):
+        errors["images"] = "Must be a list of URLs."
+        return None
+    urls, error = _parse_images(value)
+    if error:
+        errors["images"] = error
+    return urls
+
+
+def clean_row(row):
+    """
+    خروجی: (dict تمیز، errors)
+    """
+    if "__error__" in row:
+        return None, {"row": row["__error__"]}
+
+    errors = {}
+    data = {
+        "category_slug": _slug(row, "category_slug", errors, 140),
+        "category_title": _text(row, "category_title", errors, 120),
+        "brand_slug": _slug(row, "brand_slug", errors, 140),
+        "brand_title": _text(row, "brand_title", errors, 120),
+        "product_slug": _slug(row, "product_slug", errors, 220),
+        "product_title": _text(row, "product_title", errors, 200),
+        "description": _text(row, "description", errors, 100_000, required=False),
+        "product_active": _bool(row, "product_active", errors),
+        "sku": _text(row, "sku", errors, 64),
+        "size": _text(row, "size", errors, 8),
+        "color": _text(row, "color", errors, 40),
+        "price": _int(row, "price", errors, minimum=0),
+        "variant_active": _bool(row, "variant_active", errors),
+        "quantity": _int(row, "quantity", errors, minimum=0),
+        "images": _images(row, errors),
+    }
+    if data["size"] and data["size"] not in SIZES:
+        errors["size"] = f"\"{data['size']}\" is not a valid choice."
+    return (None, errors) if errors else (data, None)
+
+
+@dataclass
+class ImportReport:
+    rows: int = 0
+    imported: int = 0
+    errors: list = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    def as_dict(self, max_errors=None):
+        errors = self.errors if max_errors is None else self.errors[:max_errors]
+        return {
+            "rows": self.rows,
+            "imported": self.imported,
+            "failed": len(self.errors),
+            "errors": errors,
+            "elapsed": round(self.elapsed, 3),
+            "rows_per_second": round(self.rows_per_second, 1),
+        }
+
+
+class CatalogImporter:
+    def __init__(self, chunk_size=2000, dry_run=False):
+        self.chunk_size = chunk_size
+        self.dry_run = dry_run
+
+    def run(self, rows):
+        report = ImportReport()
+        start = time.perf_counter()
+        chunk = []
+        for line, row in rows:
+            report.rows += 1
+            data, errors = clean_row(row)
+            if errors:
+                report.errors.append({"line": line, "sku": row.get("sku"), "errors": errors})
+                continue
+            chunk.append((line, data))
+            if len(chunk) >= self.chunk_size:
+                self._flush(chunk, report)
+                chunk = []
+        if chunk:
+            self._flush(chunk, report)
+        report.elapsed = time.perf_counter() - start
+        return report
+
+    def _flush(self, chunk, report):
+        if self.dry_run:
+            report.imported += len(chunk)
+            return
+        try:
+            with transaction.atomic():
+                self.write_chunk([data for _, data in chunk])
+        except DatabaseError:
+            # مثلاً تداخل (product, size, color) با sku دیگری در دیتابیس؛ ردیف به ردیف تا فقط ردیف خراب رد شود
+            for line, data in chunk:
+                try:
+                    with transaction.atomic():
+                        self.write_chunk([data])
+                except DatabaseError as e:
+                    report.errors.append({"line": line, "sku": data["sku"], "errors": {"row": str(e)}})
+                else:
+                    report.imported += 1
+            return
+        report.imported += len(chunk)
+
+    def write_chunk(self, rows):
+        categories = {r["category_slug"]: r["category_title"] for r in rows}
+        Category.objects.bulk_create(
+            [Category(slug=slug, title=title) for slug, title in categories.items()],
+            update_conflicts=True, unique_fields=["slug"], update_fields=["title", "updated_at"],
+        )
+        category_ids = dict(Category.objects.filter(slug__in=categories).values_list("slug", "id"))
+
+        brands = {r["brand_slug"]: r["brand_title"] for r in rows}
+        Brand.objects.bulk_create(
+            [Brand(slug=slug, title=title) for slug, title in brands.items()],
+            update_conflicts=True, unique_fields=["slug"], update_fields=["title", "updated_at"],
+        )
+        brand_ids = dict(Brand.objects.filter(slug__in=brands).values_list("slug", "id"))
+
+        products = {}
+        images = {}
+        for r in rows:
+            products[r["product_slug"]] = Product(
+                slug=r["product_slug"],
+                title=r["product_title"],
+                description=r["description"],
+                category_id=category_ids[r["category_slug"]],
+                brand_id=brand_ids[r["brand_slug"]],
+                is_active=r["product_active"],
+            )
+            if r["images"] is not None:
+                images[r["product_slug"]] = r["images"]
+        Product.objects.bulk_create(
+            list(products.values()),
+            update_conflicts=True, unique_fields=["slug"],
+            update_fields=["title", "description", "category", "brand", "is_active", "updated_at"],
+        )
+        product_ids = dict(Product.objects.filter(slug__in=products).values_list("slug", "id"))
+
+        if images:
+            ProductImage.objects.filter(product_id__in=[product_ids[s] for s in images]).delete()
+            ProductImage.objects.bulk_create([
+                ProductImage(product_id=product_ids[slug], image_url=url, sort_order=i)
+                for slug, urls in images.items()
+                for i, url in enumerate(urls)
+            ])
+
+        variants = {
+            r["sku"]: Variant(
+                sku=r["sku"],
+                product_id=product_ids[r["product_slug"]],
+                size=r["size"],
+                color=r["color"],
+                price=r["price"],
+                is_active=r["variant_active"],
+            )
+            for r in rows
+        }
+        Variant.objects.bulk_create(
+            list(variants.values()),
+            update_conflicts=True, unique_fields=["sku"],
+            update_fields=["product", "size", "color", "price", "is_active", "updated_at"],
+        )
+        variant_ids = dict(Variant.objects.filter(sku__in=variants).values_list("sku", "id"))
+
+        quantities = {r["sku"]: r["quantity"] for r in rows}
+        Inventory.objects.bulk_create(
+            [Inventory(variant_id=variant_ids[sku], quantity=qty) for sku, qty in quantities.items()],
+            update_conflicts=True, unique_fields=["variant"], update_fields=["quantity", "updated_at"],
+        )
+
+        # bulk_create سیگنال ندارد؛ ProductCard، index جستجو و cache بعد از commit به‌روز می‌شوند
+        products_changed.send(sender=Product, product_ids=list(product_ids.values()))
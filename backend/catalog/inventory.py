@@ -0,0 +1,167 @@
+"""
+اعمال دسته‌ای تغییر موجودی (همگام‌سازی WMS).
+
+هر ورودی {"sku": ..., "delta": n} یا {"sku": ..., "set": n} است. در هر chunk:
+  1) یک کوئری برای ترجمه‌ی sku به variant_id
+  2) قفل Inventoryها به ترتیب id (همان ترتیب checkout)
+  3) یک UPDATE با Case/F() برای همه‌ی ردیف‌ها
+  4) ثبت InventoryAdjustment برای (batch_id, sku) تا retry دوباره اعمال نشود؛ همان (batch_id, sku) با
+     op/مقدار دیگر conflict است
+موجودی هیچ‌وقت کمتر از reserved (holdهای سفارش‌های pending) نمی‌شود.
+"""
+import re
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+
+from .models import Inventory, InventoryAdjustment, Variant
+from .signals import stock_changed
+
+INTEGER = re.compile(r"-?[0-9]+")  # فقط ارقام ASCII؛ "²" و "--5" رد می‌شوند
+INT_MAX = 2147483647  # سقف IntegerField/PositiveIntegerField در همه‌ی backendها
+
+
+def _result(sku, status, quantity=None, detail=None):
+    result = {"sku": sku, "status": status}
+    if quantity is not None:
+        result["quantity"] = quantity
+    if detail:
+        result["detail"] = detail
+    return result
+
+
+def parse_entry(entry):
+    """
+    خروجی: (sku, op, value, error)
+    """
+    if not isinstance(entry, dict):
+        return None, None, None, "Each adjustment must be an object."
+    sku = entry.get("sku")
+    if not isinstance(sku, str) or not sku or len(sku) > 64:
+        return sku, None, None, "sku is required."
+    ops = [op for op in ("delta", "set") if op in entry]
+    if len(ops) != 1:
+        return sku, None, None, "Exactly one of delta or set is required."
+    op = ops[0]
+    value = entry[op]
+    if isinstance(value, str) and INTEGER.fullmatch(value):
+        value = int(value)
+    if not isinstance(value, int) or isinstance(value, bool):
+        return sku, op, None, f"{op} must be an integer."
+    if not -INT_MAX - 1 <= value <= INT_MAX:
+        return sku, op, None, f"{op} is out of range."
+    if op == "set" and value < 0:
+        return sku, op, value, "set must be >= 0."
+    return sku, op, value, None
+
+
+def apply_adjustments(batch_id, entries, chunk_size=1000):
+    """
+    خروجی: لیست نتیجه برای هر ورودی، به همان ترتیب.
+    """
+    results = [None] * len(entries)
+    pending = []  # (index, sku, op, value)
+    seen = set()
+    for i, entry in enumerate(entries):
+        sku, op, value, error = parse_entry(entry)
+        if error is None and sku in seen:
+            error = "Duplicate sku in batch."
+        if error:
+            results[i] = _result(sku, "invalid", detail=error)
+            continue
+        seen.add(sku)
+        pending.append((i, sku, op, value))
+
+    for start in range(0, len(pending), chunk_size):
+        chunk = pending[start:start + chunk_size]
+        try:
+            outcomes = _apply_chunk(batch_id, chunk)
+        except IntegrityError:
+            # retry همزمان با همین batch_id؛ حالا رکوردهای آن را می‌بینیم
+            outcomes = _apply_chunk(batch_id, chunk)
+        for (i, *_), outcome in zip(chunk, outcomes):
+            results[i] = outcome
+    return results
+
+
+@transaction.atomic
+def _apply_chunk(batch_id, chunk):
+    skus = [sku for _, sku, _, _ in chunk]
+
+    done = {
+        a.sku: a
+        for a in InventoryAdjustment.objects.filter(batch_id=batch_id, sku__in=skus)
+    }
+    variant_ids = dict(Variant.objects.filter(sku__in=skus).values_list("sku", "id"))
+    inventories = {
+        variant_id: (quantity, reserved)
+        for variant_id, quantity, reserved in (
+            Inventory.objects
+            .select_for_update()
+            .filter(variant_id__in=list(variant_ids.values()))
+            .order_by("id")
+            .values_list("variant_id", "quantity", "reserved")
+        )
+    }
+
+    outcomes = []
+    whens = []
+    updated = []
+    created = []
+    records = []
+    for _, sku, op, value in chunk:
+        if sku in done:
+            a = done[sku]
+            if (a.op, a.value) == (op, value):
+                outcomes.append(_result(sku, "duplicate", a.quantity_after))
+            else:
+                # batch_id دوباره با داده‌ی دیگر؛ اعمال نمی‌شود
+                outcomes.append(_result(
+                    sku, "conflict", a.quantity_after,
+                    detail=f"Batch already applied {a.op}={a.value} for this sku.",
+                ))
+            continue
+        variant_id = variant_ids.get(sku)
+        if variant_id is None:
+            outcomes.append(_result(sku, "unknown_sku"))
+            continue
+
+        quantity, reserved = inventories.get(variant_id, (0, 0))
+        after = quantity + value if op == "delta" else value
+        if after > INT_MAX:
+            outcomes.append(_result(sku, "rejected", quantity, detail="Quantity is out of range."))
+            continue
+        if after < reserved:
+            outcomes.append(_result(
+                sku, "rejected", quantity,
+                detail=f"Quantity cannot go below reserved ({reserved}).",
+            ))
+            continue
+
+        if variant_id not in inventories:
+            created.append(Inventory(variant_id=variant_id, quantity=after))
+        elif op == "delta":
+            whens.append(When(variant_id=variant_id, then=F("quantity") + value))
+            updated.append(variant_id)
+        else:
+            whens.append(When(variant_id=variant_id, then=Value(value)))
+            updated.append(variant_id)
+        records.append(InventoryAdjustment(batch_id=batch_id, sku=sku, op=op, value=value, quantity_after=after))
+        outcomes.append(_result(sku, "applied", after))
+
+    # اول رکورد idempotency؛ اگر batch همزمان ثبتش کرده باشد IntegrityError و rollback
+    InventoryAdjustment.objects.bulk_create(records)
+    if updated:
+        (
+            Inventory.objects
+            .filter(variant_id__in=updated)
+            .update(quantity=Case(*whens, default=F("quantity")), updated_at=timezone.now())
+        )
+    if created:
+        Inventory.objects.bulk_create(created)
+
+    changed = [variant_ids[r.sku] for r in records]
+    if changed:
+        stock_changed.send(sender=Inventory, variant_ids=changed)
+    return outcomes
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from catalog.images import ImageError, ingest_path
+from catalog.models import Product, ProductImage
+
+
+class Command(BaseCommand):
+    help = (
+        "Attach local image files to a product (content-addressed; identical files are stored once). "
+        "Run render_images afterwards to build the renditions."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("slug")
+        parser.add_argument("paths", nargs="+")
+        parser.add_argument("--replace", action="store_true", help="Remove the product's current images first.")
+
+    def handle(self, *args, **options):
+        product = Product.objects.filter(slug=options["slug"]).first()
+        if product is None:
+            raise CommandError(f"No product with slug {options['slug']!r}.")
+        if options["replace"]:
+            product.images.all().delete()
+        start = product.images.count()
+        for i, path in enumerate(options["paths"]):
+            try:
+                asset, created = ingest_path(path)
+            except (ImageError, OSError) as e:
+                raise CommandError(f"{path}: {e}")
+            ProductImage.objects.create(product=product, asset=asset, sort_order=start + i)
+            self.stdout.write(f"{path}: {asset.sha256[:12]} ({'new' if created else 'existing'}, {asset.status})")
@@ -0,0 +1,43 @@
+import csv
+import json
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+from catalog.inventory import apply_adjustments
+
+
+class Command(BaseCommand):
+    help = (
+        "Apply {sku, delta} / {sku, set} inventory adjustments from a CSV (sku,delta,set) "
+        "or NDJSON file. Re-running with the same --batch-id never applies a SKU twice."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--batch-id", required=True)
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument("--results", help="Write per-SKU results to this NDJSON file.")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        try:
+            with open(path, encoding="utf-8-sig", newline="") as f:
+                if path.endswith((".ndjson", ".jsonl")):
+                    entries = [json.loads(line) for line in f if line.strip()]
+                else:
+                    entries = [
+                        {k: v for k, v in row.items() if k == "sku" or v not in (None, "")}
+                        for row in csv.DictReader(f)
+                    ]
+        except (OSError, ValueError) as e:
+            raise CommandError(e)
+
+        results = apply_adjustments(options["batch_id"], entries, chunk_size=options["chunk_size"])
+
+        if options["results"]:
+            with open(options["results"], "w", encoding="utf-8") as out:
+                for r in results:
+                    out.write(json.dumps(r, ensure_ascii=False) + "\n")
+        summary = Counter(r["status"] for r in results)
+        self.stdout.write(", ".join(f"{status}: {n}" for status, n in sorted(summary.items())) or "Nothing to do.")
@@ -0,0 +1,77 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+
+from catalog.cards import refresh_cards
+from catalog.models import Brand, Category, Product, ProductCard
+from catalog.pagination import ProductCardPagination
+
+PREFIX = "bench-"
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure /api/products/ page latency as the catalog grows. "
+        "Seeds 'bench-*' products into the configured database (removed afterwards unless --keep)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default="1000,10000,100000,1000000",
+                            help="Comma separated catalog sizes to measure.")
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--keep", action="store_true", help="Keep the seeded products.")
+
+    def handle(self, *args, **options):
+        sizes = sorted(int(x) for x in options["sizes"].split(","))
+        if "testserver" not in settings.ALLOWED_HOSTS:
+            settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, "testserver"]
+
+        category, _ = Category.objects.get_or_create(slug=f"{PREFIX}category", defaults={"title": "Bench"})
+        brand, _ = Brand.objects.get_or_create(slug=f"{PREFIX}brand", defaults={"title": "Bench"})
+        client = Client()
+
+        self.stdout.write(f"{'products':>10} {'first p50':>10} {'deep p50':>10} {'filtered p50':>13}  (ms)")
+        try:
+            for size in sizes:
+                self.seed(size, category, brand)
+                first = self.measure(client, "/api/products/", options["repeat"])
+                deep = self.measure(client, f"/api/products/?cursor={self.middle_cursor(size)}", options["repeat"])
+                filtered = self.measure(client, f"/api/products/?brand={brand.slug}", options["repeat"])
+                self.stdout.write(f"{size:>10} {first:>10.2f} {deep:>10.2f} {filtered:>13.2f}")
+        finally:
+            if not options["keep"]:
+                Product.objects.filter(slug__startswith=PREFIX).delete()
+                category.delete()
+                brand.delete()
+
+    def seed(self, size, category, brand):
+        existing = Product.objects.filter(slug__startswith=PREFIX).count()
+        for start in range(existing, size, 5000):
+            batch = [
+                Product(title=f"Bench {n}", slug=f"{PREFIX}{n}", category=category, brand=brand)
+                for n in range(start, min(start + 5000, size))
+            ]
+            # bulk_create سیگنال ندارد؛ کارت‌ها را مستقیم می‌سازیم
+            refresh_cards(p.id for p in Product.objects.bulk_create(batch))
+
+    def middle_cursor(self, size):
+        paginator = ProductCardPagination()
+        middle = (
+            ProductCard.objects
+            .order_by(*paginator.ordering)
+            .values("created_at", "product_id")[size // 2]
+        )
+        return paginator.encode_cursor(paginator.position_of(middle))
+
+    def measure(self, client, url, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            response = client.get(url)
+            timings.append((time.perf_counter() - start) * 1000)
+            if response.status_code != 200:
+                raise CommandError(f"{url} -> HTTP {response.status_code}")
+        return statistics.median(timings)
@@ -0,0 +1,73 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from catalog.models import Brand, Category, Product
+from catalog.search import IContainsBackend, get_backend, index_products, tokenize
+
+PREFIX = "bench-search-"
+WORDS = [
+    "کفش", "ورزشی", "رانینگ", "چرم", "مردانه", "زنانه", "بچگانه", "کتانی", "صندل", "بوت",
+    "runner", "leather", "classic", "trail", "court", "street", "canvas", "sport", "light", "pro",
+]
+# نام مدل‌ها؛ کاتالوگ واقعی واژگان خیلی بیشتری از WORDS دارد
+MODELS = [f"{a}{b}{n}" for a in "abcdefghkmnprstvz" for b in "aeiou" for n in range(25)]
+QUERIES = ["کفش ورزشی", "کتا", "leather boot", "ru", "کفش‌های چرم", "trail runner pro", "ka1", "mo12 classic"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the full-text search index with the icontains scan. "
+        "Seeds 'bench-search-*' products into the configured database (removed afterwards unless --keep)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=50000)
+        parser.add_argument("--repeat", type=int, default=10)
+        parser.add_argument("--keep", action="store_true")
+
+    def handle(self, *args, **options):
+        category, _ = Category.objects.get_or_create(slug=f"{PREFIX}category", defaults={"title": "Bench"})
+        brand, _ = Brand.objects.get_or_create(slug=f"{PREFIX}brand", defaults={"title": "Bench"})
+        rnd = random.Random(42)
+        try:
+            self.seed(options["products"], category, brand, rnd)
+            indexed, scan = get_backend(), IContainsBackend()
+            self.stdout.write(f"{options['products']} products, {type(indexed).__name__} vs icontains (p50 ms)")
+            for q in QUERIES:
+                tokens = tokenize(q)
+                a = self.measure(lambda: indexed.search(tokens, 20), options["repeat"])
+                b = self.measure(lambda: scan.search(tokens, 20), options["repeat"])
+                self.stdout.write(f"  {q!r:28} index {a:8.2f}   icontains {b:8.2f}   x{b / max(a, 1e-6):.0f}")
+        finally:
+            if not options["keep"]:
+                ids = list(Product.objects.filter(slug__startswith=PREFIX).values_list("id", flat=True))
+                Product.objects.filter(id__in=ids).delete()
+                index_products(ids)
+                category.delete()
+                brand.delete()
+
+    def seed(self, count, category, brand, rnd):
+        existing = Product.objects.filter(slug__startswith=PREFIX).count()
+        for start in range(existing, count, 5000):
+            batch = [
+                Product(
+                    title=" ".join([*rnd.sample(WORDS, 2), rnd.choice(MODELS)]),
+                    slug=f"{PREFIX}{n}",
+                    description=" ".join(rnd.choices(WORDS + MODELS, k=30)),
+                    category=category,
+                    brand=brand,
+                )
+                for n in range(start, min(start + 5000, count))
+            ]
+            index_products(p.id for p in Product.objects.bulk_create(batch))
+
+    def measure(self, fn, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings)
@@ -0,0 +1,71 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from catalog.models import ProductCard
+from catalog.serializers import CARD_PROJECTION, ProductCardSerializer
+from config import renderers
+from config.renderers import FastJSONRenderer
+from orders.models import Order
+from orders.serializers import ORDER_PROJECTION, OrderSerializer, serializer_queryset
+from orders.views import my_order_rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Rows per second for the list endpoints: DRF serializers + JSONRenderer against the values() "
+        "projection + FastJSONRenderer (orjson when installed). Uses existing ProductCards "
+        "(seed_perf_data) and orders; each path includes its queries."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=2000, help="Rows per pass.")
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        cards = ProductCard.objects.order_by("-created_at", "-product_id")[:options["rows"]]
+        if not cards.exists():
+            raise CommandError("No product cards; run `manage.py seed_perf_data` first.")
+        self.stdout.write(f"orjson: {'yes' if renderers.orjson else 'no (stdlib json)'}")
+        self.stdout.write(f"{'endpoint':<14} {'path':<22} {'rows/s':>10} {'ms/pass':>9} {'bytes':>10}")
+
+        self.compare(
+            "product list", options,
+            lambda: JSONRenderer().render(ProductCardSerializer(cards, many=True).data),
+            lambda: FastJSONRenderer().render(CARD_PROJECTION.serialize(list(CARD_PROJECTION.values(cards)))),
+        )
+
+        # کاربر آخرین سفارش
+        user_id = Order.objects.exclude(user=None).values_list("user_id", flat=True).order_by("-id").first()
+        if user_id is None:
+            self.stdout.write("orders: skipped (no orders with a user)")
+            return
+        orders = serializer_queryset(user_id, False).order_by("-id")[:options["rows"]]
+        rows = my_order_rows(user_id, False).order_by("-id")[:options["rows"]]
+        self.compare(
+            "my orders", options,
+            lambda: JSONRenderer().render(OrderSerializer(orders, many=True).data),
+            lambda: FastJSONRenderer().render(ORDER_PROJECTION.serialize(list(rows))),
+        )
+
+    def compare(self, name, options, serializer, projection):
+        expected = serializer()
+        if projection() != expected:
+            raise CommandError(f"{name}: projection output differs from the serializer")
+        rows = len(json.loads(expected))
+        results = {}
+        for label, func in (("serializer+json", serializer), ("projection+fast", projection)):
+            best = min(self.timed(func) for _ in range(options["repeat"]))
+            results[label] = best
+            self.stdout.write(
+                f"{name:<14} {label:<22} {rows / best:>10,.0f} {best * 1000:>9.1f} {len(expected):>10,}"
+            )
+        self.stdout.write(f"{'':<14} {'speedup':<22} {results['serializer+json'] / results['projection+fast']:>10.1f}x")
+
+    @staticmethod
+    def timed(func):
+        start = time.perf_counter()
+        func()
+        return time.perf_counter() - start
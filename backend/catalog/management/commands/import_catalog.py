@@ -0,0 +1,42 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from catalog.importer import CatalogImporter, read_rows
+
+
+class Command(BaseCommand):
+    help = "Stream a CSV or NDJSON catalog file (one row per variant) into the database."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=["csv", "ndjson"],
+                            help="Defaults to the file extension.")
+        parser.add_argument("--chunk-size", type=int, default=2000)
+        parser.add_argument("--dry-run", action="store_true", help="Validate only, write nothing.")
+        parser.add_argument("--errors", help="Write the per-row error report to this NDJSON file.")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or ("ndjson" if path.endswith((".ndjson", ".jsonl")) else "csv")
+        importer = CatalogImporter(chunk_size=options["chunk_size"], dry_run=options["dry_run"])
+
+        try:
+            with open(path, encoding="utf-8-sig", newline="") as f:
+                report = importer.run(read_rows(f, fmt))
+        except OSError as e:
+            raise CommandError(e)
+
+        if options["errors"]:
+            with open(options["errors"], "w", encoding="utf-8") as out:
+                for error in report.errors:
+                    out.write(json.dumps(error, ensure_ascii=False) + "\n")
+        else:
+            for error in report.errors[:20]:
+                self.stderr.write(json.dumps(error, ensure_ascii=False))
+
+        verb = "Validated" if options["dry_run"] else "Imported"
+        self.stdout.write(
+            f"{verb} {report.imported}/{report.rows} row(s), {len(report.errors)} error(s) "
+            f"in {report.elapsed:.1f}s ({report.rows_per_second:,.0f} rows/s)."
+        )
@@ -0,0 +1,17 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from catalog.cards import rebuild_all
+
+
+class Command(BaseCommand):
+    help = "Rebuild the ProductCard read model from Product, ProductImage, Variant and Inventory."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        total = rebuild_all(chunk_size=options["chunk_size"])
+        self.stdout.write(f"Rebuilt {total} product card(s) in {time.perf_counter() - start:.1f}s.")
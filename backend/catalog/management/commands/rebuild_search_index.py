@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from catalog.search import get_backend, rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the product full-text search index (FTS5 on SQLite, tsvector/GIN on PostgreSQL)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        total = rebuild_index(chunk_size=options["chunk_size"])
+        self.stdout.write(
+            f"Indexed {total} product(s) with {type(get_backend()).__name__} "
+            f"in {time.perf_counter() - start:.1f}s."
+        )
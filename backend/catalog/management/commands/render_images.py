@@ -0,0 +1,49 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+
+from catalog.images import pending, render_pending, spec_version
+
+
+class Command(BaseCommand):
+    help = (
+        "Render product image renditions (CATALOG_IMAGES['RENDITIONS'] x FORMATS) in a process pool. "
+        "Picks up new uploads and assets rendered with an older spec, so after changing rendition sizes "
+        "one run re-renders everything. --force re-renders all assets, including failed ones."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=None,
+                            help="Processes; defaults to CATALOG_IMAGES['WORKERS']. 0 renders in this process.")
+        parser.add_argument("--batch-size", type=int, default=50)
+        parser.add_argument("--force", action="store_true")
+        parser.add_argument("--loop", action="store_true", help="Keep rendering new uploads in the background.")
+        parser.add_argument("--interval", type=float, default=5.0, help="Seconds to sleep when nothing is pending.")
+
+    def handle(self, *args, **options):
+        workers = options["workers"] if options["workers"] is not None else settings.CATALOG_IMAGES["WORKERS"]
+        self.stdout.write(f"spec {spec_version()}, {pending(options['force']).count()} asset(s) to render")
+        # پروسه‌های fork شده اتصال دیتابیس را به ارث نبرند
+        connections.close_all()
+        executor = ProcessPoolExecutor(max_workers=workers) if workers > 0 else None
+        try:
+            force = options["force"]
+            while True:
+                start = time.perf_counter()
+                counts = render_pending(executor, batch_size=options["batch_size"], force=force)
+                force = False
+                if sum(counts.values()) or not options["loop"]:
+                    self.stdout.write(
+                        f"ready={counts['ready']} failed={counts['failed']} in {time.perf_counter() - start:.1f}s"
+                    )
+                if not options["loop"]:
+                    return
+                close_old_connections()
+                if not sum(counts.values()):
+                    time.sleep(options["interval"])
+        finally:
+            if executor is not None:
+                executor.shutdown()
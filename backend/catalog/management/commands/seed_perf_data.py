@@ -0,0 +1,101 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from catalog.importer import CatalogImporter
+from catalog.models import Brand, Category, Product, Variant
+from orders.models import Order
+
+PREFIX = "perf"
+COLORS = ["black", "white", "red", "blue", "gray", "green", "brown", "navy", "beige", "pink"]
+SIZES = [size for size, _ in Variant.SIZE_CHOICES]
+WORDS = ["Runner", "Trail", "Court", "Classic", "Street", "Air", "Flex", "Boost", "Canvas", "Leather", "Pro", "Lite"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a realistic 'perf-*' catalog for benchmarks (perf_suite, bench_*): categories, brands, "
+        "products with images and every size x --colors variant with inventory. "
+        "Rows go through the bulk import pipeline (catalog/importer.py), so cards and the search index follow."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=1000)
+        parser.add_argument("--categories", type=int, default=20)
+        parser.add_argument("--brands", type=int, default=30)
+        parser.add_argument("--colors", type=int, default=3, help="Colors per product (x 9 sizes).")
+        parser.add_argument("--images", type=int, default=3, help="Images per product.")
+        parser.add_argument("--stock", type=int, default=1000, help="Inventory per variant.")
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument("--chunk-size", type=int, default=5000)
+        parser.add_argument("--reset", action="store_true", help="Delete existing perf-* data first.")
+
+    def handle(self, *args, **options):
+        if options["reset"]:
+            self.reset()
+
+        importer = CatalogImporter(chunk_size=options["chunk_size"])
+        start = time.perf_counter()
+        rows = 0
+        batch = []
+        for row in self.rows(options):
+            batch.append(row)
+            if len(batch) >= options["chunk_size"]:
+                self.write(importer, batch)
+                rows += len(batch)
+                batch = []
+        if batch:
+            self.write(importer, batch)
+            rows += len(batch)
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f"Seeded {options['products']} product(s), {rows} variant(s) in {elapsed:.1f}s "
+            f"({rows / elapsed:,.0f} rows/s)."
+        )
+
+    def write(self, importer, batch):
+        # ردیف‌ها خودمان ساخته‌ایم؛ clean_row لازم نیست
+        with transaction.atomic():
+            importer.write_chunk(batch)
+
+    def rows(self, options):
+        rng = random.Random(options["seed"])
+        colors = COLORS[:max(1, min(options["colors"], len(COLORS)))]
+        for n in range(options["products"]):
+            category = n % options["categories"]
+            brand = rng.randrange(options["brands"])
+            title = f"{rng.choice(WORDS)} {rng.choice(WORDS)} {n}"
+            slug = f"{PREFIX}-{n}"
+            base_price = rng.randrange(800_000, 6_000_000, 10_000)
+            images = [f"https://picsum.photos/seed/{slug}-{i}/600/600" for i in range(options["images"])]
+            for color in colors:
+                for size in SIZES:
+                    yield {
+                        "category_slug": f"{PREFIX}-category-{category}",
+                        "category_title": f"Perf category {category}",
+                        "brand_slug": f"{PREFIX}-brand-{brand}",
+                        "brand_title": f"Perf brand {brand}",
+                        "product_slug": slug,
+                        "product_title": title,
+                        "description": f"{title} in {', '.join(colors)}.",
+                        "product_active": True,
+                        "sku": f"{PREFIX.upper()}-{n}-{size}-{color}",
+                        "size": size,
+                        "color": color,
+                        "price": base_price + (int(size) - 36) * 10_000,
+                        "variant_active": True,
+                        "quantity": options["stock"] if rng.random() > 0.05 else 0,
+                        "images": images,
+                    }
+
+    def reset(self):
+        variant_ids = Variant.objects.filter(sku__startswith=f"{PREFIX.upper()}-").values("id")
+        order_ids = list(Order.objects.filter(items__variant_id__in=variant_ids).values_list("id", flat=True).distinct())
+        Order.objects.filter(id__in=order_ids).delete()
+        Product.objects.filter(slug__startswith=f"{PREFIX}-").delete()
+        Category.objects.filter(slug__startswith=f"{PREFIX}-").delete()
+        Brand.objects.filter(slug__startswith=f"{PREFIX}-").delete()
+        self.stdout.write(f"Removed previous perf data ({len(order_ids)} order(s)).")
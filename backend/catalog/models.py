@@ -32,13 +32,58 @@ class Product(TimeStampedModel):
     brand = models.ForeignKey(Brand, on_delete=models.PROTECT, related_name="products")
     is_active = models.BooleanField(default=True)
 
+    class Meta:
+        indexes = [
+            # لیست محصولات: WHERE is_active ORDER BY created_at DESC, id DESC (keyset)
+            # partial index: SQLite شرط بولی is_active را بدون "= 1" می‌نویسد و index عادی را استفاده نمی‌کند
+            models.Index(fields=["-created_at", "-id"], condition=models.Q(is_active=True), name="product_list_idx"),
+            models.Index(fields=["category", "-created_at", "-id"], condition=models.Q(is_active=True),
+                         name="product_category_list_idx"),
+            models.Index(fields=["brand", "-created_at", "-id"], condition=models.Q(is_active=True),
+                         name="product_brand_list_idx"),
+        ]
+
     def __str__(self):
         return self.title
 
 
+class ImageAsset(TimeStampedModel):
+    """
+    فایل تصویر ذخیره‌شده با hash محتوا (catalog/images.py)؛ چند ProductImage می‌توانند یک asset داشته باشند.
+    renditions: {"card": {"width", "height", "webp": مسیر, "jpeg": مسیر}, ...} نسبت به CATALOG_IMAGES["ROOT"]
+    """
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("ready", "Ready"),
+        ("failed", "Failed"),
+    ]
+
+    sha256 = models.CharField(max_length=64, unique=True)
+    original = models.CharField(max_length=200)  # مسیر نسبی فایل اصلی
+    format = models.CharField(max_length=8)
+    size = models.PositiveIntegerField()  # بایت
+    width = models.PositiveIntegerField(null=True, blank=True)
+    height = models.PositiveIntegerField(null=True, blank=True)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default="pending")
+    spec = models.CharField(max_length=16, blank=True, default="")  # نسخه‌ی تنظیمات renditionها
+    renditions = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True, default="")
+
+    class Meta:
+        indexes = [
+            # render_images: pending یا ready با spec قدیمی
+            models.Index(fields=["status", "spec"], name="image_asset_render_idx"),
+        ]
+
+    def __str__(self):
+        return f"Asset({self.sha256[:12]}, {self.status})"
+
+
 class ProductImage(TimeStampedModel):
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="images")
-    image_url = models.URLField(max_length=500)  # فعلاً URL؛ بعداً فایل هم می‌کنیم
+    # تصویر خارجی؛ برای فایل آپلودی خالی است و asset دارد
+    image_url = models.URLField(max_length=500, blank=True)
+    asset = models.ForeignKey(ImageAsset, null=True, blank=True, on_delete=models.PROTECT, related_name="images")
     alt_text = models.CharField(max_length=200, blank=True)
     sort_order = models.PositiveIntegerField(default=0)
 
@@ -64,6 +109,11 @@ class Variant(TimeStampedModel):
 
     class Meta:
         unique_together = [("product", "size", "color")]
+        indexes = [
+            # EXISTS فیلترهای لیست (سایز/رنگ/قیمت) روی product_id همبسته است
+            models.Index(fields=["product", "is_active", "price"], name="variant_product_price_idx"),
+            models.Index(fields=["size", "color", "is_active"], name="variant_size_color_idx"),
+        ]
 
     def __str__(self):
         return f"{self.product.title} - {self.size} - {self.color}"
@@ -72,6 +122,76 @@ class Variant(TimeStampedModel):
 class Inventory(TimeStampedModel):
     variant = models.OneToOneField(Variant, on_delete=models.CASCADE, related_name="inventory")
     quantity = models.IntegerField(default=0)
+    # مجموع holdهای فعال سفارش‌های pending (orders.StockReservation)؛ همراه با holdها نگه‌داری می‌شود
+    reserved = models.IntegerField(default=0)
+
+    @property
+    def available(self):
+        return self.quantity - self.reserved
 
     def __str__(self):
         return f"Inv({self.variant.sku})={self.quantity}"
+
+
+class ProductCard(models.Model):
+    """
+    read model لیست محصولات: یک ردیف برای هر محصول فعال، بدون join.
+    توسط catalog/cards.py با signalها به‌روز می‌شود؛ rebuild_product_cards از صفر می‌سازد.
+    """
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, primary_key=True, related_name="card")
+    title = models.CharField(max_length=200)
+    slug = models.SlugField(max_length=220, unique=True)
+    category_slug = models.SlugField(max_length=140)
+    category_title = models.CharField(max_length=120)
+    brand_slug = models.SlugField(max_length=140)
+    brand_title = models.CharField(max_length=120)
+    thumbnail = models.URLField(max_length=500, null=True, blank=True)
+    # renditionهای تصویر اول با URL و ابعاد (catalog/images.py)؛ برای تصویر خارجی None
+    thumbnail_renditions = models.JSONField(null=True, blank=True)
+
+    min_price = models.PositiveIntegerField(null=True)
+    max_price = models.PositiveIntegerField(null=True)
+    # سایز/رنگ‌هایی که موجودی دارند، جدا شده با ","
+    sizes = models.CharField(max_length=64, blank=True, default="")
+    colors = models.CharField(max_length=400, blank=True, default="")
+    total_stock = models.IntegerField(default=0)
+
+    created_at = models.DateTimeField()  # همان Product.created_at، برای keyset
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-created_at", "-product"], name="card_list_idx"),
+            models.Index(fields=["category_slug", "-created_at", "-product"], name="card_category_list_idx"),
+            models.Index(fields=["brand_slug", "-created_at", "-product"], name="card_brand_list_idx"),
+        ]
+
+    def __str__(self):
+        return f"Card({self.slug})"
+
+
+class InventoryAdjustment(models.Model):
+    """
+    ثبت تغییر موجودی اعمال‌شده از WMS؛ (batch_id, sku) یکتاست تا retry دوباره اعمال نشود.
+    """
+    OP_CHOICES = [
+        ("delta", "Delta"),
+        ("set", "Set"),
+    ]
+
+    batch_id = models.CharField(max_length=64)
+    sku = models.CharField(max_length=64)
+    op = models.CharField(max_length=8, choices=OP_CHOICES)
+    value = models.IntegerField()
+    quantity_after = models.IntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = [("batch_id", "sku")]
+        indexes = [
+            # جستجوی ادمین بر اساس sku
+            models.Index(fields=["sku"], name="inventory_adjustment_sku_idx"),
+        ]
+
+    def __str__(self):
+        return f"Adj({self.batch_id}, {self.sku}) {self.op} {self.value}"
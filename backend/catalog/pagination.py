@@ -0,0 +1,133 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    صفحه‌بندی keyset (cursor): به جای OFFSET از آخرین (created_at, id) صفحه‌ی قبل ادامه می‌دهیم،
+    پس هزینه‌ی هر صفحه به عمق آن و اندازه‌ی جدول بستگی ندارد.
+    همه‌ی فیلدهای ordering باید هم‌جهت باشند و آخرینشان یکتا (id).
+    """
+    ordering = ("-created_at", "-id")
+    page_size = 24
+    max_page_size = 100
+    page_size_query_param = "page_size"
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.set_page(list(self.page_queryset(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        نسخه‌ی async برای viewهای ASGI (config/async_views.py).
+        """
+        return self.set_page([row async for row in self.page_queryset(queryset, request)])
+
+    def page_queryset(self, queryset, request):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+
+        position = self.decode_cursor(request)
+        queryset = queryset.order_by(*self.ordering)
+        if position is not None:
+            try:
+                queryset = queryset.filter(self.after(position))
+            except (DjangoValidationError, TypeError, ValueError):
+                raise NotFound(self.invalid_cursor_message)
+        return queryset[:self.page_size + 1]
+
+    def set_page(self, rows):
+        self.has_next = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        self.next_position = self.position_of(rows[-1]) if self.has_next else None
+        return rows
+
+    def get_paginated_data(self, data):
+        return {"next": self.get_next_link(), "results": data}
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    def get_previous_link(self):
+        # keyset فقط رو به جلو است؛ برگشت به ابتدای لیست
+        return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+
+    # --- cursor ---
+
+    def fields(self):
+        return [f.lstrip("-") for f in self.ordering]
+
+    def position_of(self, obj):
+        values = []
+        for name in self.fields():
+            value = obj[name] if isinstance(obj, dict) else getattr(obj, name)
+            values.append(value.isoformat() if hasattr(value, "isoformat") else value)
+        return values
+
+    def encode_cursor(self, position):
+        raw = json.dumps(position, separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(encoded + "=" * (-len(encoded) % 4))
+            position = json.loads(raw)
+        except (binascii.Error, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return position
+
+    def after(self, position):
+        """
+        شرط tuple comparison: (a, b) < (x, y)  =>  a <= x AND (a < x OR (a = x AND b < y))
+        شرط اول روی ستون اول index یک range scan ساده می‌دهد.
+        """
+        op = "lt" if self.ordering[0].startswith("-") else "gt"
+        names = self.fields()
+        condition = Q()
+        for i, name in enumerate(names):
+            term = Q(**{f"{name}__{op}": position[i]})
+            for prev, value in zip(names[:i], position[:i]):
+                term &= Q(**{prev: value})
+            condition |= term
+        return Q(**{f"{names[0]}__{op}e": position[0]}) & condition
+
+
+class ProductCardPagination(KeysetPagination):
+    ordering = ("-created_at", "-product_id")
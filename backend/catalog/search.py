@@ -0,0 +1,236 @@
+"""
+جستجوی متنی محصولات با index واقعی:
+  - SQLite: جدول مجازی FTS5 (رتبه با bm25)
+  - PostgreSQL: ستون tsvector با GIN index (رتبه با ts_rank_cd)
+  - بقیه: fallback به icontains
+
+متن قبل از index و قبل از جستجو یکسان‌سازی می‌شود (ی/ي، ک/ك، نیم‌فاصله، اعراب، ارقام).
+جدول‌ها خارج از migrationها با ensure_schema (post_migrate) ساخته می‌شوند چون به engine وابسته‌اند.
+"""
+import re
+from abc import ABC, abstractmethod
+
+from django.db import DEFAULT_DB_ALIAS, connection, transaction
+from django.db.models import Q
+
+from .models import Product, Variant
+
+FTS_TABLE = "catalog_product_fts"
+PG_TABLE = "catalog_product_search"
+
+_CHAR_MAP = str.maketrans({
+    "\u064a": "\u06cc", "\u0649": "\u06cc",  # ي ى -> ی
+    "\u0643": "\u06a9",  # ك -> ک
+    "\u0629": "\u0647", "\u06c0": "\u0647",  # ة ۀ -> ه
+    "\u0623": "\u0627", "\u0625": "\u0627", "\u0622": "\u0627",  # أ إ آ -> ا
+    "\u200c": "", "\u200d": "", "\u0640": "",  # نیم‌فاصله، zwj، کشیده
+    **{chr(0x06F0 + i): str(i) for i in range(10)},  # ارقام فارسی
+    **{chr(0x0660 + i): str(i) for i in range(10)},  # ارقام عربی
+})
+_DIACRITICS = re.compile("[\u064b-\u065f\u0670]")
+_TOKEN = re.compile(r"\w+")
+
+
+def normalize(text):
+    return _DIACRITICS.sub("", (text or "").translate(_CHAR_MAP)).lower()
+
+
+def tokenize(text):
+    return _TOKEN.findall(normalize(text))
+
+
+class SearchBackend(ABC):
+    def ensure_schema(self):
+        pass
+
+    def replace(self, docs):
+        """docs: {product_id: (title, body)}"""
+
+    def delete(self, product_ids):
+        pass
+
+    def clear(self):
+        pass
+
+    @abstractmethod
+    def search(self, tokens, limit):
+        """product_idها به ترتیب رتبه"""
+
+
+class SQLiteFTSBackend(SearchBackend):
+    def ensure_schema(self):
+        with connection.cursor() as c:
+            c.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+                "title, body, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+            )
+
+    def replace(self, docs):
+        self.delete(list(docs))
+        with connection.cursor() as c:
+            c.executemany(
+                f"INSERT INTO {FTS_TABLE} (rowid, title, body) VALUES (%s, %s, %s)",
+                [(pid, title, body) for pid, (title, body) in docs.items()],
+            )
+
+    def delete(self, product_ids):
+        if not product_ids:
+            return
+        with connection.cursor() as c:
+            placeholders = ",".join(["%s"] * len(product_ids))
+            c.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})", list(product_ids))
+
+    def clear(self):
+        with connection.cursor() as c:
+            c.execute(f"DELETE FROM {FTS_TABLE}")
+
+    def search(self, tokens, limit):
+        # همه‌ی کلمات باید باشند؛ کلمه‌ی آخر prefix (autocomplete)
+        terms = [f'"{t}"' for t in tokens[:-1]] + [f'"{tokens[-1]}"*']
+        with connection.cursor() as c:
+            c.execute(
+                f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s "
+                f"ORDER BY bm25({FTS_TABLE}, 10.0, 1.0) LIMIT %s",
+                [" ".join(terms), limit],
+            )
+            return [row[0] for row in c.fetchall()]
+
+
+class PostgresBackend(SearchBackend):
+    def ensure_schema(self):
+        with connection.cursor() as c:
+            c.execute(f"CREATE TABLE IF NOT EXISTS {PG_TABLE} (product_id integer PRIMARY KEY, document tsvector NOT NULL)")
+            c.execute(f"CREATE INDEX IF NOT EXISTS {PG_TABLE}_gin ON {PG_TABLE} USING GIN (document)")
+
+    def replace(self, docs):
+        with connection.cursor() as c:
+            c.executemany(
+                f"INSERT INTO {PG_TABLE} (product_id, document) VALUES "
+                "(%s, setweight(to_tsvector('simple', %s), 'A') || setweight(to_tsvector('simple', %s), 'B')) "
+                "ON CONFLICT (product_id) DO UPDATE SET document = EXCLUDED.document",
+                [(pid, title, body) for pid, (title, body) in docs.items()],
+            )
+
+    def delete(self, product_ids):
+        if product_ids:
+            with connection.cursor() as c:
+                c.execute(f"DELETE FROM {PG_TABLE} WHERE product_id = ANY(%s)", [list(product_ids)])
+
+    def clear(self):
+        with connection.cursor() as c:
+            c.execute(f"TRUNCATE {PG_TABLE}")
+
+    def search(self, tokens, limit):
+        query = " & ".join(t.replace("'", "") for t in tokens[:-1])
+        last = tokens[-1].replace("'", "") + ":*"
+        query = f"{query} & {last}" if query else last
+        with connection.cursor() as c:
+            c.execute(
+                f"SELECT product_id FROM {PG_TABLE}, to_tsquery('simple', %s) q "
+                "WHERE document @@ q ORDER BY ts_rank_cd(document, q) DESC, product_id DESC LIMIT %s",
+                [query, limit],
+            )
+            return [row[0] for row in c.fetchall()]
+
+
+class IContainsBackend(SearchBackend):
+    """
+    بدون index؛ همان رفتار search_fields ادمین.
+    """
+    def search(self, tokens, limit):
+        qs = Product.objects.filter(is_active=True)
+        for token in tokens:
+            qs = qs.filter(Q(title__icontains=token) | Q(description__icontains=token))
+        return list(qs.order_by("-id").values_list("id", flat=True)[:limit])
+
+
+def _sqlite_has_fts5():
+    try:
+        with connection.cursor() as c:
+            c.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+            return bool(c.fetchone()[0])
+    except Exception:
+        return False
+
+
+_backend = None
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        if connection.vendor == "postgresql":
+            _backend = PostgresBackend()
+        elif connection.vendor == "sqlite" and _sqlite_has_fts5():
+            _backend = SQLiteFTSBackend()
+        else:
+            _backend = IContainsBackend()
+    return _backend
+
+
+def ensure_schema(using=DEFAULT_DB_ALIAS, **kwargs):
+    # post_migrate
+    if using == DEFAULT_DB_ALIAS:
+        get_backend().ensure_schema()
+
+
+def build_documents(product_ids):
+    """
+    {product_id: (title, body)} برای محصولات فعال؛ body شامل توضیحات، برند، دسته و رنگ‌ها.
+    """
+    products = (
+        Product.objects
+        .filter(id__in=product_ids, is_active=True)
+        .values_list("id", "title", "description", "brand__title", "category__title")
+    )
+    colors = {}
+    for product_id, color in (
+        Variant.objects
+        .filter(product_id__in=product_ids, is_active=True)
+        .values_list("product_id", "color")
+        .distinct()
+    ):
+        colors.setdefault(product_id, []).append(color)
+
+    return {
+        pid: (
+            normalize(title),
+            normalize(" ".join([description, brand, category, *colors.get(pid, [])])),
+        )
+        for pid, title, description, brand, category in products
+    }
+
+
+def index_products(product_ids):
+    product_ids = set(product_ids)
+    if not product_ids:
+        return
+    backend = get_backend()
+    docs = build_documents(product_ids)
+    with transaction.atomic():
+        backend.delete(product_ids - set(docs))
+        if docs:
+            backend.replace(docs)
+
+
+def rebuild_index(chunk_size=2000):
+    backend = get_backend()
+    backend.ensure_schema()
+    backend.clear()
+    ids = Product.objects.filter(is_active=True).order_by("id").values_list("id", flat=True)
+    last_id = 0
+    total = 0
+    while True:
+        chunk = list(ids.filter(id__gt=last_id)[:chunk_size])
+        if not chunk:
+            return total
+        index_products(chunk)
+        total += len(chunk)
+        last_id = chunk[-1]
+
+
+def search_products(query, limit=20):
+    tokens = tokenize(query)
+    if not tokens:
+        return []
+    return get_backend().search(tokens, limit)
@@ -1,30 +1,71 @@
 from rest_framework import serializers
-from .models import Product, ProductImage, Variant
+
+from config.projection import Projection
+
+from .images import display_url, rendition_urls
+from .models import Product, ProductCard, ProductImage, Variant
 
 class ProductImageSerializer(serializers.ModelSerializer):
+    """
+    image_url: فایل اصلی یا URL خارجی؛ renditions (ابعاد و URL هر فرمت) بعد از render_images، تا آن موقع None.
+    asset باید همراه تصویر خوانده شود (select_related/prefetch "images__asset").
+    """
+    image_url = serializers.SerializerMethodField()
+    width = serializers.IntegerField(source="asset.width", read_only=True, default=None)
+    height = serializers.IntegerField(source="asset.height", read_only=True, default=None)
+    renditions = serializers.SerializerMethodField()
+
     class Meta:
         model = ProductImage
-        fields = ["image_url", "alt_text", "sort_order"]
+        fields = ["image_url", "alt_text", "sort_order", "width", "height", "renditions"]
+
+    def get_image_url(self, obj):
+        return display_url(obj.image_url, obj.asset.original if obj.asset else None)
+
+    def get_renditions(self, obj):
+        return rendition_urls(obj.asset.renditions) if obj.asset else None
 
 class VariantSerializer(serializers.ModelSerializer):
-    quantity = serializers.IntegerField(source="inventory.quantity", read_only=True)
+    quantity = serializers.IntegerField(source="inventory.available", read_only=True)
 
     class Meta:
         model = Variant
         fields = ["id", "sku", "size", "color", "price", "is_active", "quantity"]
 
-class ProductListSerializer(serializers.ModelSerializer):
-    category = serializers.CharField(source="category.title")
-    brand = serializers.CharField(source="brand.title")
-    thumbnail = serializers.SerializerMethodField()
+class CommaListField(serializers.Field):
+    def to_representation(self, value):
+        return value.split(",") if value else []
+
+class ProductCardSerializer(serializers.ModelSerializer):
+    """
+    card لیست محصولات از روی ProductCard (بدون join و prefetch) به‌علاوه‌ی facetها.
+    """
+    id = serializers.IntegerField(source="product_id")
+    category = serializers.CharField(source="category_title")
+    brand = serializers.CharField(source="brand_title")
+    sizes = CommaListField()
+    colors = CommaListField()
 
     class Meta:
-        model = Product
-        fields = ["id", "title", "slug", "category", "brand", "thumbnail"]
+        model = ProductCard
+        fields = ["id", "title", "slug", "category", "brand", "thumbnail", "thumbnail_renditions",
+                  "min_price", "max_price", "sizes", "colors", "total_stock"]
 
-    def get_thumbnail(self, obj):
-        first = obj.images.first()
-        return first.image_url if first else None
+# مسیر سریع لیست (config/projection.py)؛ خروجی همان ProductCardSerializer است - با هم تغییر کنند
+CARD_PROJECTION = Projection({
+    "id": "product_id",
+    "title": "title",
+    "slug": "slug",
+    "category": "category_title",
+    "brand": "brand_title",
+    "thumbnail": "thumbnail",
+    "thumbnail_renditions": "thumbnail_renditions",
+    "min_price": "min_price",
+    "max_price": "max_price",
+    "sizes": ("sizes", CommaListField().to_representation),
+    "colors": ("colors", CommaListField().to_representation),
+    "total_stock": "total_stock",
+}, extra=["created_at", "updated_at"])  # cursor و ETag
 
 class ProductDetailSerializer(serializers.ModelSerializer):
     category = serializers.CharField(source="category.title")
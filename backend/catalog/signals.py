@@ -0,0 +1,68 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from outbox.events import publish
+from . import cards, changes, search
+from .cache import get_detail_cache
+from .models import Brand, Category, Inventory, Product, ProductImage, Variant
+
+# برای تغییرات دسته‌ای (update/bulk_create) که post_save ندارند؛ فرستنده باید خودش send کند
+products_changed = Signal()  # kwargs: product_ids
+stock_changed = Signal()  # kwargs: variant_ids
+
+# بعد از commit، یک بار برای هر transaction (catalog/changes.py)
+catalog_changed = Signal()  # kwargs: product_ids, stock_product_ids
+
+
+@receiver(products_changed)
+def _queue_products(sender, product_ids, **kwargs):
+    changes.schedule(product_ids=product_ids)
+
+
+@receiver(stock_changed)
+def _queue_stock(sender, variant_ids, **kwargs):
+    # مسیر checkout/پرداخت: بعد از commit فقط fragment موجودی پاک می‌شود؛
+    # کارت لیست را worker outbox می‌سازد (catalog/handlers.py)
+    changes.schedule(variant_ids=variant_ids)
+    publish("catalog.stock_changed", {"variant_ids": sorted(set(variant_ids))})
+
+
+@receiver(catalog_changed)
+def _refresh_cards(sender, product_ids, **kwargs):
+    cards.refresh_cards(product_ids)
+
+
+@receiver(catalog_changed)
+def _invalidate_detail_cache(sender, product_ids, stock_product_ids, **kwargs):
+    get_detail_cache().invalidate(product_ids, stock_product_ids)
+
+
+@receiver(catalog_changed)
+def _reindex_search(sender, product_ids, **kwargs):
+    search.index_products(product_ids)
+
+
+@receiver([post_save, post_delete], sender=Product)
+def _product_changed(sender, instance, **kwargs):
+    products_changed.send(sender=sender, product_ids=[instance.id])
+
+
+@receiver([post_save, post_delete], sender=ProductImage)
+@receiver([post_save, post_delete], sender=Variant)
+def _product_child_changed(sender, instance, **kwargs):
+    products_changed.send(sender=sender, product_ids=[instance.product_id])
+
+
+@receiver([post_save, post_delete], sender=Inventory)
+def _inventory_changed(sender, instance, **kwargs):
+    stock_changed.send(sender=sender, variant_ids=[instance.variant_id])
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Brand)
+def _title_changed(sender, instance, created, **kwargs):
+    if created:
+        return
+    product_ids = list(instance.products.values_list("id", flat=True))
+    if product_ids:
+        products_changed.send(sender=sender, product_ids=product_ids)
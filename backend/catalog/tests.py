@@ -1,3 +1,412 @@
-from django.test import TestCase
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import transaction
+from django.test import TestCase, override_settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from config.renderers import FastJSONRenderer
+from outbox.worker import run_batch
+
+from .cache import DjangoCacheBackend, ProductDetailCache, get_detail_cache
+from .cards import refresh_cards
+from .importer import CatalogImporter, read_rows
+from .inventory import apply_adjustments, parse_entry
+from . import changes, images
+from .models import (
+    Brand, Category, ImageAsset, Inventory, InventoryAdjustment, Product, ProductCard, ProductImage, Variant,
+)
+from .search import index_products
+from .serializers import CARD_PROJECTION, ProductCardSerializer
+from .signals import catalog_changed
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        get_detail_cache().backend.clear()
+        self.addCleanup(get_detail_cache().backend.clear)
+        with self.captureOnCommitCallbacks(execute=True):
+            category = Category.objects.create(title="Running", slug="running")
+            brand = Brand.objects.create(title="Acme", slug="acme")
+            self.product = Product.objects.create(title="Runner", slug="runner", category=category, brand=brand)
+            self.image = ProductImage.objects.create(product=self.product, image_url="https://example.com/1.jpg")
+            variant = Variant.objects.create(product=self.product, sku="R-42", size="42", color="black", price=1000)
+            self.inventory = Inventory.objects.create(variant=variant, quantity=5)
+
+    def get(self, url, **headers):
+        return self.client.get(url, headers=headers)
+
+    def assertRevalidates(self, url):
+        first = self.get(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertIn("max-age=", first["Cache-Control"])
+        self.assertIn("stale-while-revalidate=", first["Cache-Control"])
+        r = self.get(url, if_none_match=first["ETag"])
+        self.assertEqual(r.status_code, 304)
+        self.assertEqual(r.content, b"")
+        self.assertEqual((r["ETag"], r["Cache-Control"]), (first["ETag"], first["Cache-Control"]))
+        self.assertEqual(self.get(url, if_modified_since=first["Last-Modified"]).status_code, 304)
+        return first
+
+    def test_list_revalidates_until_stock_changes(self):
+        first = self.assertRevalidates("/api/products/")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.inventory.quantity = 0
+            self.inventory.save()
+        self.assertEqual(self.get("/api/products/runner/").json()["variants"][0]["quantity"], 0)
+        # کارت‌ها را worker outbox به‌روز می‌کند، نه درخواستی که موجودی را عوض کرده
+        self.assertEqual(self.get("/api/products/", if_none_match=first["ETag"]).status_code, 304)
+        self.assertEqual(run_batch()["done"], 2)  # ساخت Inventory در setUp و همین تغییر
+        r = self.get("/api/products/", if_none_match=first["ETag"])
+        self.assertEqual(r.status_code, 200)
+        self.assertNotEqual(r["ETag"], first["ETag"])
+
+    def test_list_etag_depends_on_query(self):
+        self.assertNotEqual(self.get("/api/products/")["ETag"], self.get("/api/products/?brand=acme")["ETag"])
+
+    def test_detail_not_modified_skips_queries(self):
+        first = self.assertRevalidates("/api/products/runner/")
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get("/api/products/runner/", if_none_match=first["ETag"]).status_code, 304)
+
+    def test_detail_last_modified_moves_when_an_image_is_deleted(self):
+        first = self.get("/api/products/runner/")
+        # Last-Modified دقت ثانیه دارد
+        with mock.patch("time.time", return_value=time.time() + 5), self.captureOnCommitCallbacks(execute=True):
+            self.image.delete()
+        r = self.get("/api/products/runner/", if_modified_since=first["Last-Modified"])
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r.json()["images"], [])
+
+
+class ChangeScheduleTests(TestCase):
+    def setUp(self):
+        changes._pending.state = None  # callbackهای تست‌های دیگر که در TestCase هیچ‌وقت commit نشدند
+        self.sent = []
+        receiver = lambda sender, product_ids, **kwargs: self.sent.append(set(product_ids))  # noqa: E731
+        catalog_changed.connect(receiver, weak=False, dispatch_uid="test_changes")
+        self.addCleanup(catalog_changed.disconnect, dispatch_uid="test_changes")
+
+    def test_one_broadcast_per_commit_survives_rollbacks(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    changes.schedule(product_ids=[1])
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        with self.captureOnCommitCallbacks(execute=True):
+            changes.schedule(product_ids=[2])
+            try:
+                with transaction.atomic():  # savepoint؛ callback ثبت‌شده در آن دور ریخته می‌شود
+                    changes.schedule(product_ids=[3])
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+            changes.schedule(product_ids=[4])
+        # id transaction برگشتی فقط یک refresh اضافه است؛ مهم این است که 2 و 4 گم نشوند
+        self.assertEqual(self.sent, [{1, 2, 3, 4}])
+        with self.captureOnCommitCallbacks(execute=True):
+            changes.schedule(product_ids=[5])
+        self.assertEqual(self.sent[1:], [{5}])
+
+
+class AsyncDetailCacheTests(TestCase):
+    def test_async_reads_use_the_async_cache_api(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            category = Category.objects.create(title="Running", slug="running")
+            brand = Brand.objects.create(title="Acme", slug="acme")
+            product = Product.objects.create(title="Runner", slug="runner", category=category, brand=brand)
+            variant = Variant.objects.create(product=product, sku="R-42", size="42", color="black", price=1000)
+            Inventory.objects.create(variant=variant, quantity=5)
+        backend = DjangoCacheBackend("default")
+        # get/set همگام روی event loop مسدود می‌کند (Redis/Memcached)؛ فقط aget/aset مجاز است
+        data = {}
+
+        async def aget(key):
+            return data.get(key)
+
+        async def aset(key, value, timeout=None):
+            data[key] = value
+
+        backend.cache = mock.Mock(spec=["aget", "aset"], aget=aget, aset=aset)
+        detail_cache = ProductDetailCache(backend, timeout=60, stock_timeout=10)
+        for _ in range(2):  # miss، بعد hit
+            entry, stock = async_to_sync(detail_cache.aget_detail)("runner")
+        self.assertEqual(len(data), 3)  # version، detail، stock
+        self.assertEqual(entry["payload"]["slug"], "runner")
+        self.assertEqual(stock["quantities"], {str(variant.id): 5})
+
+
+class CatalogImportTests(TestCase):
+    def row(self, sku, **fields):
+        row = {
+            "category_slug": "shoes", "category_title": "Shoes", "brand_slug": "acme", "brand_title": "Acme",
+            "product_slug": "runner", "product_title": "Runner", "sku": sku, "size": "42", "color": sku.lower(),
+            "price": 1000, "quantity": 5,
+        }
+        return json.dumps({**row, **fields})
+
+    def run_import(self, *lines):
+        return CatalogImporter(chunk_size=10).run(read_rows(io.StringIO("\n".join(lines)), "ndjson"))
+
+    def test_integers_are_strict_and_bounded(self):
+        report = self.run_import(
+            self.row("A", price="1200"),
+            self.row("B", price=1.9),
+            self.row("C", quantity=True),
+            self.row("D", price="1" * 20),
+            self.row("E", quantity=-1),
+            self.row("F", quantity=2147483648),
+        )
+        self.assertEqual(report.imported, 1)
+        self.assertEqual([(e["sku"], list(e["errors"])) for e in report.errors], [
+            ("B", ["price"]), ("C", ["quantity"]), ("D", ["price"]), ("E", ["quantity"]), ("F", ["quantity"]),
+        ])
+        self.assertEqual(Variant.objects.get().price, 1200)
+
+    def test_conflicting_row_does_not_fail_its_chunk(self):
+        self.run_import(self.row("A", color="black"))
+        report = self.run_import(self.row("B"), self.row("C", color="black"), self.row("D"))
+        self.assertEqual(report.imported, 2)
+        self.assertEqual([(e["line"], e["sku"]) for e in report.errors], [(2, "C")])
+        self.assertEqual(list(Variant.objects.order_by("sku").values_list("sku", flat=True)), ["A", "B", "D"])
+        self.assertEqual(Inventory.objects.count(), 3)
+
+
+class InventoryEntryTests(TestCase):
+    def test_only_ascii_integers_are_accepted(self):
+        self.assertEqual(parse_entry({"sku": "A", "delta": "-5"}), ("A", "delta", -5, None))
+        self.assertEqual(parse_entry({"sku": "A", "set": "12"}), ("A", "set", 12, None))
+        for value in ("--5", "\u00b2", "\u06f5", "5-", "", 1.5, True):
+            self.assertEqual(parse_entry({"sku": "A", "delta": value})[3], "delta must be an integer.")
+        for value in ("9" * 20, 2147483648, -2147483649):
+            self.assertEqual(parse_entry({"sku": "A", "delta": value})[3], "delta is out of range.")
+
+    def test_bad_value_is_a_row_error_not_a_500(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_superuser("admin", "admin@example.com", "x"))
+        r = client.post("/api/inventory/adjust/", {"batch_id": "b-1", "adjustments": [
+            {"sku": "A", "delta": "--5"}, {"sku": "B", "set": "\u00b2"},
+        ]}, format="json")
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual([row["status"] for row in r.json()["results"]], ["invalid", "invalid"])
+
+    def test_reused_batch_with_other_data_is_a_conflict(self):
+        category = Category.objects.create(title="Shoes", slug="shoes")
+        brand = Brand.objects.create(title="Acme", slug="acme")
+        product = Product.objects.create(title="Runner", slug="runner", category=category, brand=brand)
+        for sku in ("A", "B"):
+            variant = Variant.objects.create(product=product, sku=sku, size="42", color=sku, price=1000)
+            Inventory.objects.create(variant=variant, quantity=5)
+        self.assertEqual(apply_adjustments("b-1", [{"sku": "A", "delta": 2}])[0]["status"], "applied")
+        results = apply_adjustments("b-1", [
+            {"sku": "A", "delta": 2}, {"sku": "B", "delta": 2147483647},
+        ])
+        self.assertEqual([r["status"] for r in results], ["duplicate", "rejected"])
+        result = apply_adjustments("b-1", [{"sku": "A", "set": 2}])[0]
+        self.assertEqual((result["status"], result["quantity"]), ("conflict", 7))
+        self.assertEqual(list(Inventory.objects.order_by("id").values_list("quantity", flat=True)), [7, 5])
+
+
+class CardProjectionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(title="دویدن", slug="running")
+        brand = Brand.objects.create(title="Acme \u2028 \"Co\"", slug="acme")
+        for n, stock in enumerate([5, 0, None]):
+            product = Product.objects.create(title=f"کفش رانینگ {n}", slug=f"p-{n}", category=category, brand=brand)
+            if stock is None:
+                continue  # بدون variant و تصویر: قیمت‌ها null
+            ProductImage.objects.create(product=product, image_url=f"https://example.com/{n}.jpg")
+            for size in ("42", "43"):
+                variant = Variant.objects.create(
+                    product=product, sku=f"P-{n}-{size}", size=size, color="مشکی", price=1_250_000,
+                )
+                Inventory.objects.create(variant=variant, quantity=stock)
+        refresh_cards(Product.objects.values_list("id", flat=True))
+
+    def assertSameBytes(self):
+        queryset = ProductCard.objects.order_by("-created_at", "-product_id")
+        expected = JSONRenderer().render(ProductCardSerializer(queryset, many=True).data)
+        actual = FastJSONRenderer().render(CARD_PROJECTION.serialize(list(CARD_PROJECTION.values(queryset))))
+        self.assertEqual(actual, expected)
+        self.assertIn(b"\\u2028", actual)
+
+    def test_matches_serializer_byte_for_byte(self):
+        self.assertSameBytes()
+
+    def test_matches_without_orjson(self):
+        with mock.patch("config.renderers.orjson", None):
+            self.assertSameBytes()
+
+
+class AdminScaleTests(TestCase):
+    rows = 30
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser("admin", "admin@example.com", "x")
+        cls.brands = [Brand.objects.create(title=f"Brand {n}", slug=f"brand-{n}") for n in range(3)]
+        category = Category.objects.create(title="Running", slug="running")
+        for n in range(cls.rows):
+            product = Product.objects.create(title=f"Runner {n}", slug=f"runner-{n}", category=category,
+                                             brand=cls.brands[n % 3])
+            for size in ("42", "43"):
+                variant = Variant.objects.create(product=product, sku=f"R-{n}-{size}", size=size, color="black",
+                                                 price=1000)
+                Inventory.objects.create(variant=variant, quantity=5)
+            InventoryAdjustment.objects.create(batch_id="b-1", sku=f"R-{n}-42", op="set", value=5, quantity_after=5)
+        cls.product = product
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        # session + کاربر + [گزینه‌های فیلتر دسته و برند] + تخمین آمار جدول + COUNT محدود + صفحه
+        for url, queries in (
+            ("/admin/catalog/product/", 7),
+            ("/admin/catalog/variant/", 5),
+            ("/admin/catalog/inventory/", 5),
+            ("/admin/catalog/inventoryadjustment/", 5),
+            ("/admin/catalog/product/?brand__id__exact=%d" % self.brands[0].id, 6),
+            ("/admin/catalog/variant/?q=R-3-42", 4),
+            (f"/admin/catalog/product/{self.product.id}/change/", 8),
+        ):
+            with self.subTest(url=url), self.assertNumQueries(queries):
+                self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_large_tables_use_the_estimate(self):
+        with mock.patch("config.admin.table_estimate", return_value=5_000_000), self.assertNumQueries(3):
+            r = self.client.get("/admin/catalog/variant/")
+        self.assertEqual(r.context["cl"].result_count, 5_000_000)
+        self.assertEqual(r.context["cl"].paginator.num_pages, 200)
+        # keyset برای صفحه‌های عمیق‌تر
+        r = self.client.get(f"/admin/catalog/variant/?id__lt={Variant.objects.order_by('id')[10].id}")
+        self.assertEqual(r.context["cl"].result_count, 10)
+
+    def test_product_search_uses_slug_and_search_index(self):
+        index_products(Product.objects.values_list("id", flat=True))
+        for term in ("runner-7", "Runner 7"):
+            r = self.client.get("/admin/catalog/product/", {"q": term})
+            self.assertIn(Product.objects.get(slug="runner-7"), r.context["cl"].result_list)
+
+    def test_related_filter_is_bounded(self):
+        url = "/admin/catalog/product/?brand__id__exact=%d" % self.brands[1].id
+        with mock.patch("config.admin.BoundedRelatedFieldListFilter.max_choices", 2):
+            r = self.client.get(url)
+        brand_filter = next(f for f in r.context["cl"].filter_specs if f.field_path == "brand")
+        self.assertEqual(brand_filter.lookup_choices, [(self.brands[1].id, "Brand 1")])
+        self.assertEqual(r.context["cl"].result_count, 10)
+
+
+def fake_render(root, original, sha, spec, renditions, formats, max_pixels):
+    return {
+        "width": 2000, "height": 1000,
+        "renditions": {
+            name: {"width": size["width"], "height": size["height"],
+                   **{fmt: f"r/{spec}/{sha[:2]}/{sha}-{name}.{fmt}" for fmt in formats}}
+            for name, size in renditions.items()
+        },
+    }
+
+
+class ProductImageTests(TestCase):
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        override = override_settings(CATALOG_IMAGES={**settings.CATALOG_IMAGES, "ROOT": root})
+        override.enable()
+        self.addCleanup(override.disable)
+        self.root = root
+        get_detail_cache().backend.clear()
+        self.addCleanup(get_detail_cache().backend.clear)
+        with self.captureOnCommitCallbacks(execute=True):
+            category = Category.objects.create(title="Running", slug="running")
+            brand = Brand.objects.create(title="Acme", slug="acme")
+            self.products = [
+                Product.objects.create(title=f"Runner {n}", slug=f"runner-{n}", category=category, brand=brand)
+                for n in range(2)
+            ]
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_superuser("admin", "admin@example.com", "x"))
+
+    def upload(self, product, content=b"\x89PNG\r\n\x1a\n" + b"\0" * 64, **data):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(f"/api/products/{product.slug}/images/",
+                                    {"file": SimpleUploadedFile("shoe.png", content), "alt_text": "side", **data})
+
+    def render(self, **kwargs):
+        with mock.patch("catalog.images.render_source", fake_render), self.captureOnCommitCallbacks(execute=True):
+            return images.render_pending(**kwargs)
+
+    def test_uploads_are_stored_once_per_content(self):
+        first, second = (self.upload(product) for product in self.products)
+        self.assertEqual((first.status_code, second.status_code), (201, 201))
+        self.assertEqual(ImageAsset.objects.count(), 1)
+        self.assertEqual(len(os.listdir(os.path.join(self.root, "originals", ImageAsset.objects.get().sha256[:2]))), 1)
+        self.assertTrue(first.json()["image_url"].startswith("/media/catalog/originals/"))
+        self.assertIsNone(first.json()["renditions"])
+        self.assertEqual(self.upload(self.products[0], b"<svg></svg>").status_code, 400)
+        self.assertEqual(len([name for name in os.listdir(self.root) if name.startswith(".upload-")]), 0)
+
+    def test_sort_order(self):
+        product = self.products[0]
+        self.assertEqual(self.upload(product).json()["sort_order"], 0)
+        self.assertEqual(self.upload(product).json()["sort_order"], 1)  # پیش‌فرض: آخر
+        self.assertEqual(self.upload(product, sort_order="0").json()["sort_order"], 0)
+        for value in ("-1", "x", "1.5", "9" * 12):
+            r = self.upload(product, sort_order=value)
+            self.assertEqual(r.status_code, 400, value)
+        self.assertEqual(product.images.count(), 3)
+
+    def test_renditions_reach_list_and_detail(self):
+        self.upload(self.products[0])
+        self.assertEqual(self.render(), {"ready": 1, "failed": 0})
+        card = self.client.get("/api/products/").json()["results"][1]
+        self.assertEqual(card["slug"], "runner-0")
+        self.assertTrue(card["thumbnail"].endswith("-card.jpeg"))
+        self.assertEqual(card["thumbnail_renditions"]["thumbnail"]["width"], 160)
+        image = self.client.get("/api/products/runner-0/").json()["images"][0]
+        self.assertEqual((image["width"], image["height"]), (2000, 1000))
+        self.assertTrue(image["renditions"]["zoom"]["webp"].startswith(f"/media/catalog/r/{images.spec_version()}/"))
+
+        # تغییر اندازه‌ها: همه دوباره render می‌شوند
+        sizes = {**settings.CATALOG_IMAGES["RENDITIONS"], "card": {"width": 600, "height": 600, "fit": "cover"}}
+        with override_settings(CATALOG_IMAGES={**settings.CATALOG_IMAGES, "ROOT": self.root, "RENDITIONS": sizes}):
+            self.assertEqual(images.pending().count(), 1)
+            self.render()
+            card = self.client.get("/api/products/").json()["results"][1]
+        self.assertEqual(card["thumbnail_renditions"]["card"]["width"], 600)
+
+    def test_render_failures_are_recorded(self):
+        self.upload(self.products[0])
+        with mock.patch("catalog.images.render_source", side_effect=OSError("truncated file")):
+            self.assertEqual(images.render_pending(), {"ready": 0, "failed": 1})
+        self.assertIn("truncated file", ImageAsset.objects.get().error)
+        self.assertEqual(images.pending().count(), 0)
+
+    @skipUnless(images.Image, "Pillow is not installed")
+    def test_pillow_renders_every_size_and_format(self):
+        buffer = io.BytesIO()
+        images.Image.new("RGB", (2000, 1000), "red").save(buffer, "JPEG")
+        self.upload(self.products[0], buffer.getvalue())
+        self.assertEqual(images.render_pending(), {"ready": 1, "failed": 0})
+        asset = ImageAsset.objects.get()
+        self.assertEqual((asset.width, asset.height), (2000, 1000))
+        sizes = {name: (entry["width"], entry["height"]) for name, entry in asset.renditions.items()}
+        self.assertEqual(sizes, {"thumbnail": (160, 160), "card": (480, 480), "zoom": (1600, 800)})
+        for entry in asset.renditions.values():
+            for fmt in ("webp", "jpeg"):
+                with images.Image.open(os.path.join(self.root, entry[fmt])) as im:
+                    self.assertEqual(im.size, (entry["width"], entry["height"]))
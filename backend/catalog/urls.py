@@ -1,7 +1,21 @@
+from django.conf import settings
 from django.urls import path
-from .views import ProductListAPIView, ProductDetailAPIView
+from .views import (
+    ProductListAPIView, ProductDetailAPIView, ProductSearchAPIView, CatalogImportAPIView, InventoryAdjustAPIView,
+    ProductListAsyncView, ProductDetailAsyncView, ProductImageUploadAPIView,
+)
+
+# زیر ASGI (config/asgi.py) نسخه‌ی async مسیرهای خواندنی
+if settings.ASYNC_VIEWS:
+    product_list, product_detail = ProductListAsyncView.as_view(), ProductDetailAsyncView.as_view()
+else:
+    product_list, product_detail = ProductListAPIView.as_view(), ProductDetailAPIView.as_view()
 
 urlpatterns = [
-    path("products/", ProductListAPIView.as_view()),
-    path("products/<slug:slug>/", ProductDetailAPIView.as_view()),
+    path("products/", product_list),
+    path("products/search/", ProductSearchAPIView.as_view()),  # قبل از slug
+    path("catalog/import/", CatalogImportAPIView.as_view()),
+    path("inventory/adjust/", InventoryAdjustAPIView.as_view()),
+    path("products/<slug:slug>/images/", ProductImageUploadAPIView.as_view()),
+    path("products/<slug:slug>/", product_detail),
 ]
@@ -1,15 +1,206 @@
-from rest_framework import generics
-from .models import Product
-from .serializers import ProductListSerializer, ProductDetailSerializer
+from django.shortcuts import get_object_or_404
+from rest_framework import generics, status
+from rest_framework.response import Response
+from rest_framework.parsers import MultiPartParser
+from rest_framework.permissions import IsAdminUser
+from rest_framework.views import APIView
+from config.async_views import AsyncAPIView, render_json
+from .cache import get_detail_cache
+from .conditional import conditional, detail_last_modified, page_validators
+from .filters import filter_products
+from .images import ImageError, ingest
+from .importer import CatalogImporter, read_rows
+from .inventory import INT_MAX, INTEGER, apply_adjustments
+from .search import search_products
+from .models import Product, ProductCard, ProductImage
+from .pagination import ProductCardPagination
+from .serializers import CARD_PROJECTION, ProductCardSerializer, ProductDetailSerializer, ProductImageSerializer
 
 class ProductListAPIView(generics.ListAPIView):
-    queryset = Product.objects.filter(is_active=True).select_related("category", "brand").prefetch_related("images")
-    serializer_class = ProductListSerializer
+    """
+    GET /api/products/?cursor=...&page_size=..&category=..&brand=..&size=..&color=..&min_price=..&max_price=..&in_stock=1
+    جدیدترین‌ها اول؛ صفحه‌بندی keyset روی (created_at, id).
+    فقط از ProductCard می‌خواند (catalog/cards.py). ETag از کارت‌های همین صفحه (catalog/conditional.py).
+    خروجی با CARD_PROJECTION ساخته می‌شود (values()، بدون instance)؛ همان شکل ProductCardSerializer.
+    """
+    queryset = ProductCard.objects.all()
+    serializer_class = ProductCardSerializer
+    pagination_class = ProductCardPagination
+
+    def get_queryset(self):
+        return filter_products(super().get_queryset(), self.request.query_params)
+
+    def list(self, request, *args, **kwargs):
+        rows = self.paginate_queryset(CARD_PROJECTION.values(self.get_queryset()))
+        headers, not_modified = conditional(
+            request, "product_list", *page_validators(request, rows, self.paginator.has_next),
+        )
+        if not_modified is not None:
+            return not_modified
+        response = self.get_paginated_response(CARD_PROJECTION.serialize(rows))
+        for name, value in headers.items():
+            response[name] = value
+        return response
+
+class ProductSearchAPIView(APIView):
+    """
+    GET /api/products/search/?q=...&limit=20
+    جستجوی متنی (catalog/search.py)؛ کلمه‌ی آخر prefix است تا برای autocomplete هم کار کند.
+    """
+    max_limit = 50
+
+    def get(self, request):
+        try:
+            limit = min(max(int(request.query_params.get("limit", 20)), 1), self.max_limit)
+        except ValueError:
+            limit = 20
+
+        ids = search_products(request.query_params.get("q", ""), limit=limit)
+        cards = ProductCard.objects.in_bulk(ids)
+        results = [cards[pid] for pid in ids if pid in cards]
+        return Response({"results": ProductCardSerializer(results, many=True).data})
+
+class CatalogImportAPIView(APIView):
+    """
+    POST /api/catalog/import/  (multipart، فقط staff)
+    file=<csv|ndjson>&format=csv|ndjson&dry_run=1
+    فایل آپلود شده stream می‌شود (catalog/importer.py).
+    """
+    permission_classes = [IsAdminUser]
+    parser_classes = [MultiPartParser]
+    max_errors = 1000
+
+    def post(self, request):
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response({"detail": "file is required."}, status=status.HTTP_400_BAD_REQUEST)
+
+        fmt = request.data.get("format") or ("ndjson" if upload.name.endswith((".ndjson", ".jsonl")) else "csv")
+        if fmt not in ("csv", "ndjson"):
+            return Response({"detail": "format must be csv or ndjson."}, status=status.HTTP_400_BAD_REQUEST)
+
+        dry_run = str(request.data.get("dry_run", "")).lower() in ("1", "true", "yes")
+        report = CatalogImporter(dry_run=dry_run).run(read_rows(upload, fmt))
+        return Response(report.as_dict(max_errors=self.max_errors))
+
+class InventoryAdjustAPIView(APIView):
+    """
+    POST /api/inventory/adjust/  (فقط staff)
+    Body:
+    {
+      "batch_id": "wms-2024-06-01-0001",
+      "adjustments": [
+        {"sku": "NK-42-BLK", "delta": -2},
+        {"sku": "NK-43-BLK", "set": 10}
+      ]
+    }
+    retry با همان batch_id چیزی را دوباره اعمال نمی‌کند (status=duplicate، یا conflict اگر داده فرق کند).
+    """
+    permission_classes = [IsAdminUser]
+    max_entries = 10000
+
+    def post(self, request):
+        batch_id = request.data.get("batch_id")
+        entries = request.data.get("adjustments")
+
+        if not isinstance(batch_id, str) or not batch_id or len(batch_id) > 64:
+            return Response({"detail": "batch_id is required."}, status=status.HTTP_400_BAD_REQUEST)
+        if not isinstance(entries, list) or not entries or len(entries) > self.max_entries:
+            return Response(
+                {"detail": f"adjustments must be a list of 1..{self.max_entries} items."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        results = apply_adjustments(batch_id, entries)
+        summary = {}
+        for r in results:
+            summary[r["status"]] = summary.get(r["status"], 0) + 1
+        return Response({"batch_id": batch_id, "summary": summary, "results": results})
+
+class ProductImageUploadAPIView(APIView):
+    """
+    POST /api/products/<slug>/images/  (multipart، فقط staff)
+    file=<jpeg|png|webp|gif>&alt_text=...&sort_order=0
+    فایل با hash محتوا ذخیره می‌شود (catalog/images.py)؛ renditionها را manage.py render_images می‌سازد
+    و تا آن موقع renditions در پاسخ None است. فایل تکراری asset قبلی را دوباره استفاده می‌کند.
+    """
+    permission_classes = [IsAdminUser]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request, slug):
+        product = get_object_or_404(Product, slug=slug)
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response({"detail": "file is required."}, status=status.HTTP_400_BAD_REQUEST)
+        sort_order = request.data.get("sort_order")
+        if sort_order in (None, ""):
+            sort_order = product.images.count()
+        elif INTEGER.fullmatch(sort_order) and 0 <= int(sort_order) <= INT_MAX:
+            sort_order = int(sort_order)
+        else:
+            return Response({"detail": "sort_order must be a non-negative integer."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            asset, _ = ingest(upload)
+        except ImageError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        image = ProductImage.objects.create(
+            product=product, asset=asset, alt_text=request.data.get("alt_text", "")[:200], sort_order=sort_order,
+        )
+        return Response(ProductImageSerializer(image).data, status=status.HTTP_201_CREATED)
 
 class ProductDetailAPIView(generics.RetrieveAPIView):
-    queryset = Product.objects.filter(is_active=True).select_related("category", "brand").prefetch_related("images", "variants", "variants__inventory")
+    """
+    GET /api/products/<slug>/
+    payload از cache (catalog/cache.py)؛ با If-None-Match/If-Modified-Since پاسخ 304 می‌دهد.
+    """
+    queryset = Product.objects.filter(is_active=True).select_related("category", "brand").prefetch_related("images__asset", "variants", "variants__inventory")
     serializer_class = ProductDetailSerializer
     lookup_field = "slug"
+
+    def retrieve(self, request, *args, **kwargs):
+        cache = get_detail_cache()
+        entry, stock = cache.get_detail(kwargs[self.lookup_field])
+        headers, not_modified = conditional(
+            request, "product_detail", cache.etag(entry, stock), detail_last_modified(entry, stock),
+        )
+        if not_modified is not None:
+            return not_modified
+
+        return Response(cache.render(entry, stock), headers=headers)
+
+# --- نسخه‌های async (زیر ASGI؛ catalog/urls.py) ---
+
+class ProductListAsyncView(AsyncAPIView):
+    """
+    همان ProductListAPIView با ORM async.
+    """
+    async def get(self, request):
+        paginator = ProductCardPagination()
+        queryset = filter_products(ProductCard.objects.all(), request.query_params)
+        rows = await paginator.apaginate_queryset(CARD_PROJECTION.values(queryset), request)
+        headers, not_modified = conditional(
+            request, "product_list", *page_validators(request, rows, paginator.has_next),
+        )
+        if not_modified is not None:
+            return not_modified
+        return render_json(paginator.get_paginated_data(await CARD_PROJECTION.aserialize(rows)), headers=headers)
+
+class ProductDetailAsyncView(AsyncAPIView):
+    """
+    همان ProductDetailAPIView با ORM async.
+    """
+    async def get(self, request, slug):
+        cache = get_detail_cache()
+        entry, stock = await cache.aget_detail(slug)
+        headers, not_modified = conditional(
+            request, "product_detail", cache.etag(entry, stock), detail_last_modified(entry, stock),
+        )
+        if not_modified is not None:
+            return not_modified
+
+        return render_json(cache.render(entry, stock), headers=headers)
 from django.shortcuts import render
 
 # Create your views here.
@@ -0,0 +1,88 @@
+"""
+ادمین برای جدول‌های بزرگ (catalog/admin.py، analytics/admin.py).
+
+changelist پیش‌فرض Django روی هر صفحه COUNT(*) کامل می‌گیرد (با فیلتر دو بار)، فیلتر FK همه‌ی
+ردیف‌های جدول مقابل را رندر می‌کند و مرتب‌سازی روی هر ستونی مجاز است. اینجا:
+  - count: بدون فیلتر تخمین آمار جدول، با فیلتر/جستجو COUNT محدود به count_limit ردیف
+  - مرتب‌سازی پیش‌فرض -pk و فقط روی ستون‌های index‌دار؛ OFFSET صفحه‌ها روی index pk راه می‌رود
+    و بیشتر از max_pages صفحه جلو نمی‌رود. عمیق‌تر: keyset با ?id__lt=<کوچک‌ترین id صفحه>
+  - فیلتر FK با سقف تعداد گزینه
+"""
+from django.contrib import admin
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections
+from django.utils.functional import cached_property
+
+
+def table_estimate(model, using):
+    """
+    تعداد تقریبی ردیف‌ها از آمار planner (PostgreSQL: pg_class، SQLite: sqlite_stat1 بعد از ANALYZE)؛
+    بدون آمار None.
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    try:
+        with connection.cursor() as c:
+            if connection.vendor == "postgresql":
+                c.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [table])
+            elif connection.vendor == "sqlite":
+                c.execute("SELECT CAST(stat AS INTEGER) FROM sqlite_stat1 WHERE tbl = %s LIMIT 1", [table])
+            else:
+                return None
+            row = c.fetchone()
+    except DatabaseError:  # sqlite_stat1 قبل از اولین ANALYZE وجود ندارد
+        return None
+    # reltuples برای جدولی که هنوز analyze نشده -1 است
+    return row[0] if row and row[0] is not None and row[0] >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    exact_below = 10_000  # جدول کوچک‌تر از این: شمارش دقیق
+    count_limit = 10_000  # سقف COUNT برای نتیجه‌ی فیلتر شده
+    max_pages = 200
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = table_estimate(queryset.model, queryset.db)
+            if estimate is not None and estimate >= self.exact_below:
+                return estimate
+        # SELECT COUNT(*) FROM (... LIMIT n): هزینه محدود، حتی روی فیلتر بی‌index
+        return queryset[:self.count_limit].count()
+
+    @cached_property
+    def num_pages(self):
+        return min(super().num_pages, self.max_pages)
+
+
+class BoundedRelatedFieldListFilter(admin.RelatedFieldListFilter):
+    """
+    RelatedFieldListFilter با حداکثر max_choices گزینه (یک کوئری)؛ جدول بزرگ‌تر فقط گزینه‌ی
+    انتخاب‌شده را نشان می‌دهد و انتخاب از لینک ?<field>__id__exact=<id> است.
+    """
+    max_choices = 100
+
+    def field_choices(self, field, request, model_admin):
+        manager = field.remote_field.model._default_manager
+        ordering = self.field_admin_ordering(field, request, model_admin) or ("pk",)
+        rows = list(manager.order_by(*ordering)[:self.max_choices + 1])
+        if len(rows) > self.max_choices:
+            try:
+                rows = list(manager.filter(pk__in=self.lookup_val or []).order_by(*ordering))
+            except (ValidationError, ValueError):  # changelist خودش پارامتر نامعتبر را رد می‌کند
+                rows = []
+        return [(row.pk, str(row)) for row in rows]
+
+    def has_output(self):
+        # فقط گزینه‌ی انتخاب‌شده هم باید دیده شود تا بتوان "All" را زد
+        return bool(self.lookup_val) or super().has_output()
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    show_facets = admin.ShowFacets.NEVER  # هر facet یک COUNT روی کل جدول است
+    ordering = ("-pk",)
+    sortable_by = ("id",)
@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+# زیر ASGI مسیرهای خواندنی (لیست/جزئیات محصول، سفارش‌های من، ping) async سرو می‌شوند
+os.environ.setdefault('DJANGO_ASYNC_VIEWS', '1')
 
 application = get_asgi_application()
@@ -0,0 +1,87 @@
+"""
+لایه‌ی view async برای مسیرهای پرترافیک خواندنی زیر ASGI (config/asgi.py).
+
+APIView در DRF همیشه sync است و زیر ASGI هر درخواست به thread پاس داده می‌شود؛
+این viewها مستقیم async اجرا می‌شوند و با ORM async داده را می‌خوانند. خروجی و خطاها
+همان شکل DRF را دارند (JSONRenderer، {"detail": ...}) تا کلاینت فرقی نبیند.
+"""
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.http import Http404, HttpResponse
+from django.views import View
+from rest_framework import exceptions
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from accounts.authentication import TokenUserAuthentication
+
+from .instrumentation import serializing
+from .renderers import FastJSONRenderer
+
+_renderer = FastJSONRenderer()
+
+
+def render_json(data, status=200, headers=None):
+    with serializing():
+        body = _renderer.render(data)
+    return HttpResponse(body, status=status, content_type="application/json", headers=headers)
+
+
+class AsyncAPIView(View):
+    """
+    handlerها async def هستند و request از نوع rest_framework.request.Request است
+    (query_params و build_absolute_uri مثل viewهای DRF).
+    authentication_required=True یعنی JWT معتبر لازم است (مثل IsAuthenticated).
+    throttle_scope مثل viewهای DRF از DEFAULT_THROTTLE_CLASSES رد می‌شود.
+    """
+    http_method_names = ["get", "head", "options"]
+    authentication_required = False
+    authenticator = TokenUserAuthentication()
+    throttle_scope = None
+
+    async def dispatch(self, request, *args, **kwargs):
+        request = Request(request, parsers=[parser() for parser in api_settings.DEFAULT_PARSER_CLASSES])
+        self.request = request
+        try:
+            user = await self.authenticate(request)
+            request.user = user or AnonymousUser()
+            if self.authentication_required and user is None:
+                raise exceptions.NotAuthenticated()
+            if self.throttle_scope:
+                # شمارنده‌ها در cache هستند (ممکن است شبکه باشد)
+                await sync_to_async(self.check_throttles)(request)
+            return await super().dispatch(request, *args, **kwargs)
+        except Http404:
+            return self.handle_exception(exceptions.NotFound())
+        except exceptions.APIException as exc:
+            return self.handle_exception(exc)
+
+    async def authenticate(self, request):
+        header = self.authenticator.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.authenticator.get_raw_token(header)
+        if raw_token is None:
+            return None
+        # بررسی امضا بدون I/O است؛ فقط وقتی وضعیت کاربر در cache نیست به دیتابیس می‌رویم
+        token = self.authenticator.get_validated_token(raw_token)
+        user = self.authenticator.get_cached_user(token)
+        if user is None:
+            user = await sync_to_async(self.authenticator.get_user)(token)
+        return user
+
+    def check_throttles(self, request):
+        for throttle_class in api_settings.DEFAULT_THROTTLE_CLASSES:
+            throttle = throttle_class()
+            if not throttle.allow_request(request, self):
+                raise exceptions.Throttled(throttle.wait())
+
+    def handle_exception(self, exc):
+        headers = {}
+        if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+            # مثل DRF: 401 همراه WWW-Authenticate
+            headers["WWW-Authenticate"] = self.authenticator.authenticate_header(self.request)
+        if getattr(exc, "wait", None):
+            headers["Retry-After"] = "%d" % exc.wait
+        data = exc.detail if isinstance(exc.detail, (list, dict)) else {"detail": exc.detail}
+        return render_json(data, status=exc.status_code, headers=headers)
@@ -0,0 +1,65 @@
+"""
+مسیریابی دیتابیس: خواندن‌های catalog/orders روی replica، بقیه و همه‌ی نوشتن‌ها روی primary.
+
+خواندن روی primary می‌ماند اگر:
+  - replica تعریف نشده باشد
+  - داخل transaction روی primary باشیم (select_for_update، خواندن بعد از نوشتن)
+  - درخواست با use_primary() یا ReadYourWritesMiddleware سنجاق (pin) شده باشد
+"""
+import contextlib
+import contextvars
+import random
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+_pinned = contextvars.ContextVar("db_pinned_to_primary", default=False)
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias.startswith("replica")]
+
+
+def is_pinned():
+    return _pinned.get()
+
+
+@contextlib.contextmanager
+def use_primary():
+    """
+    همه‌ی خواندن‌های داخل بلوک از primary (مثلاً بازسازی کارت‌ها بعد از commit).
+    """
+    token = _pinned.set(True)
+    try:
+        yield
+    finally:
+        _pinned.reset(token)
+
+
+class PrimaryReplicaRouter:
+    def __init__(self):
+        self.replicas = replica_aliases()
+        self.apps = set(getattr(settings, "DATABASE_REPLICA_APPS", ()))
+
+    def db_for_read(self, model, **hints):
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        if (
+            not self.replicas
+            or model._meta.app_label not in self.apps
+            or _pinned.get()
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        return random.choice(self.replicas)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replicaها کپی همان دیتابیس‌اند
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
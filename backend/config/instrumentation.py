@@ -0,0 +1,165 @@
+"""
+اندازه‌گیری هر درخواست: latency، تعداد و زمان کوئری‌ها، زمان serialize و حجم پاسخ به تفکیک view.
+
+یک execute_wrapper روی همه‌ی اتصال‌ها نصب می‌شود و آمار را در RequestStats درخواست جاری
+(ContextVar) جمع می‌کند؛ ContextVar به sync_to_async هم می‌رسد، پس کوئری‌های viewهای async
+هم شمرده می‌شوند. بیرون از درخواست (worker، shell) wrapper فقط execute را صدا می‌زند.
+تنظیمات: settings.INSTRUMENTATION
+"""
+import contextvars
+import logging
+import random
+import time
+import traceback
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from .metrics import BYTES_BUCKETS, COUNT_BUCKETS, registry
+
+slow_query_logger = logging.getLogger("config.instrumentation.slow_query")
+
+_current = contextvars.ContextVar("request_stats", default=None)
+
+LABELS = ("view", "route", "method")
+
+request_duration = registry.histogram(
+    "http_request_duration_seconds", "Request latency inside Django.", LABELS,
+)
+request_queries = registry.histogram(
+    "http_request_db_queries", "SQL queries per request.", LABELS, buckets=COUNT_BUCKETS,
+)
+request_db_time = registry.histogram(
+    "http_request_db_seconds", "Time spent in SQL per request.", LABELS,
+)
+request_serialize_time = registry.histogram(
+    "http_request_serialize_seconds", "Time spent rendering the response body.", LABELS,
+)
+response_bytes = registry.histogram(
+    "http_response_bytes", "Response body size.", LABELS, buckets=BYTES_BUCKETS,
+)
+requests_total = registry.counter(
+    "http_requests_total", "Requests by status code.", LABELS + ("status",),
+)
+slow_queries_total = registry.counter(
+    "db_slow_queries_total", "Queries slower than INSTRUMENTATION['SLOW_QUERY_MS'].", ("view",),
+)
+
+
+def conf(name):
+    return settings.INSTRUMENTATION[name]
+
+
+class RequestStats:
+    __slots__ = ("start", "queries", "db_time", "serialize_time", "view")
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.serialize_time = 0.0
+        self.view = "unmatched"
+
+
+def begin():
+    """
+    خروجی: (stats, token) برای reset در پایان درخواست.
+    """
+    stats = RequestStats()
+    return stats, _current.set(stats)
+
+
+def end(token):
+    _current.reset(token)
+
+
+def current():
+    return _current.get()
+
+
+@contextmanager
+def serializing():
+    """
+    زمان render بدنه‌ی پاسخ (viewهای async که خودشان JSON می‌سازند).
+    """
+    stats = _current.get()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if stats is not None:
+            stats.serialize_time += time.perf_counter() - start
+
+
+def query_wrapper(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - start
+        stats.queries += 1
+        stats.db_time += elapsed
+        if elapsed * 1000 >= conf("SLOW_QUERY_MS"):
+            _log_slow(stats, sql, elapsed, context)
+
+
+def _log_slow(stats, sql, elapsed, context):
+    slow_queries_total.inc(stats.view)
+    stack = ""
+    if random.random() < conf("SLOW_QUERY_STACK_SAMPLE_RATE"):
+        # فقط frameهای پروژه؛ frameهای django، stdlib و site-packages نویز است
+        root = str(settings.BASE_DIR)
+        frames = [
+            f for f in traceback.extract_stack()[:-3]
+            if f.filename.startswith(root) and "site-packages" not in f.filename
+        ]
+        stack = "\n" + "".join(traceback.format_list(frames[-conf("SLOW_QUERY_STACK_DEPTH"):]))
+    slow_query_logger.warning(
+        "slow query %.1f ms in %s on %s: %s%s",
+        elapsed * 1000, stats.view, context["connection"].alias, sql[:1000], stack,
+    )
+
+
+def _install(connection, **kwargs):
+    # با CONN_MAX_AGE=0 هر درخواست دوباره وصل می‌شود
+    if query_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(query_wrapper)
+
+
+def install():
+    connection_created.connect(_install, dispatch_uid="config.instrumentation")
+    for connection in connections.all(initialized_only=True):
+        _install(connection)
+
+
+def view_name(match):
+    func = match.func
+    view = getattr(func, "view_class", None) or getattr(func, "cls", None) or func
+    return view.__name__
+
+
+def record(request, response, stats):
+    match = getattr(request, "resolver_match", None)
+    route = match.route if match else "unmatched"
+    labels = (stats.view, route, request.method)
+    request_duration.observe(*labels, value=time.perf_counter() - stats.start)
+    request_queries.observe(*labels, value=stats.queries)
+    request_db_time.observe(*labels, value=stats.db_time)
+    request_serialize_time.observe(*labels, value=stats.serialize_time)
+    if not response.streaming:
+        response_bytes.observe(*labels, value=len(response.content))
+    requests_total.inc(*labels, str(response.status_code))
+
+
+def server_timing(stats):
+    total = (time.perf_counter() - stats.start) * 1000
+    return (
+        f'db;dur={stats.db_time * 1000:.1f};desc="{stats.queries} queries", '
+        f"serialize;dur={stats.serialize_time * 1000:.1f}, "
+        f"app;dur={total:.1f}"
+    )
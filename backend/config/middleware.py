@@ -0,0 +1,176 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import JsonResponse
+
+from . import instrumentation, throttling
+from .db_router import _pinned
+
+PIN_COOKIE = "primary_pin"
+
+
+class ReadYourWritesMiddleware:
+    """
+    بعد از یک درخواست نوشتنی (مثلاً checkout) تا چند ثانیه خواندن‌های همان کاربر از primary
+    انجام می‌شود تا lag replica باعث نشود سفارش تازه در /orders/my/ دیده نشود.
+    sync و async هر دو؛ زیر ASGI درخواست به thread پاس داده نمی‌شود.
+    """
+    UNSAFE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.pin_seconds = getattr(settings, "DATABASE_REPLICA_PIN_SECONDS", 5)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = self.pin(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            _pinned.reset(token)
+        return self.process_response(request, response)
+
+    async def __acall__(self, request):
+        token = self.pin(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _pinned.reset(token)
+        return self.process_response(request, response)
+
+    def pin(self, request):
+        return _pinned.set(request.method in self.UNSAFE_METHODS or PIN_COOKIE in request.COOKIES)
+
+    def process_response(self, request, response):
+        if request.method in self.UNSAFE_METHODS and response.status_code < 400 and self.pin_seconds:
+            response.set_cookie(PIN_COOKIE, "1", max_age=self.pin_seconds, httponly=True, samesite="Lax")
+        return response
+
+
+class InstrumentationMiddleware:
+    """
+    latency، کوئری‌ها، زمان serialize و حجم پاسخ هر درخواست (config/instrumentation.py)؛
+    باید اولین middleware باشد تا کل زنجیره را اندازه بگیرد.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.server_timing = instrumentation.conf("SERVER_TIMING")
+        instrumentation.install()
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats, token = instrumentation.begin()
+        try:
+            response = self.get_response(request)
+        finally:
+            instrumentation.end(token)
+        return self.finish(request, response, stats)
+
+    async def __acall__(self, request):
+        stats, token = instrumentation.begin()
+        try:
+            response = await self.get_response(request)
+        finally:
+            instrumentation.end(token)
+        return self.finish(request, response, stats)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        stats = instrumentation.current()
+        if stats is not None and request.resolver_match is not None:
+            stats.view = instrumentation.view_name(request.resolver_match)
+
+    def process_template_response(self, request, response):
+        # پاسخ DRF بعد از همه‌ی middlewareها render می‌شود
+        stats = instrumentation.current()
+        if stats is not None:
+            start = time.perf_counter()
+
+            def rendered(response):
+                stats.serialize_time += time.perf_counter() - start
+
+            response.add_post_render_callback(rendered)
+        return response
+
+    def finish(self, request, response, stats):
+        instrumentation.record(request, response, stats)
+        if self.server_timing:
+            response["Server-Timing"] = instrumentation.server_timing(stats)
+        return response
+
+
+class AdmissionControlMiddleware:
+    """
+    load shedding پیش از پر شدن workerها: اگر تعداد درخواست‌های در حال اجرای این پروسه به
+    THROTTLE["MAX_IN_FLIGHT"] (یا سقف concurrency همان throttle_scope) رسیده باشد، درخواست
+    بدون صف شدن با 503 و Retry-After رد می‌شود.
+    """
+    GLOBAL = "all"
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.admit(request):
+            return self.reject(self.GLOBAL)
+        try:
+            return self.get_response(request)
+        finally:
+            self.release(request)
+
+    async def __acall__(self, request):
+        if not self.admit(request):
+            return self.reject(self.GLOBAL)
+        try:
+            return await self.get_response(request)
+        finally:
+            self.release(request)
+
+    def admit(self, request):
+        request._admission_scopes = []
+        if not throttling.conf("ENABLED") or request.path.startswith(tuple(throttling.conf("EXEMPT_PATHS"))):
+            return True
+        if not throttling.limiter.acquire(self.GLOBAL, throttling.conf("MAX_IN_FLIGHT")):
+            return False
+        request._admission_scopes.append(self.GLOBAL)
+        return True
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not throttling.conf("ENABLED"):
+            return None
+        view = getattr(view_func, "view_class", None) or getattr(view_func, "cls", None)
+        scope = getattr(view, "throttle_scope", None)
+        limit = (throttling.conf("SCOPES").get(scope) or {}).get("concurrency") if scope else None
+        if not limit:
+            return None
+        if not throttling.limiter.acquire(scope, limit):
+            return self.reject(scope)
+        request._admission_scopes.append(scope)
+        return None
+
+    def release(self, request):
+        for scope in request._admission_scopes:
+            throttling.limiter.release(scope)
+
+    def reject(self, scope):
+        throttling.rejected_total.inc("concurrency", scope)
+        response = JsonResponse({"detail": "Server is busy, please retry shortly."}, status=503)
+        response["Retry-After"] = str(throttling.conf("RETRY_AFTER"))
+        return response
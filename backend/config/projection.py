@@ -0,0 +1,104 @@
+"""
+مسیر سریع serialize برای endpointهای خواندنی.
+
+شکل خروجی یک بار تعریف می‌شود و به یک values() و یک تابع ردیف -> dict کامپایل می‌شود؛ نه
+instance مدل ساخته می‌شود نه Field‌های DRF برای هر ردیف اجرا می‌شوند. خروجی باید با serializer
+معادل یکی باشد (تست‌های byte-identical هر app)؛ برای همین transformها معمولاً to_representation
+همان Field در DRF هستند و مثل DRF روی None اجرا نمی‌شوند.
+
+    CARD_PROJECTION = Projection({
+        "id": "product_id",
+        "sizes": ("sizes", CommaListField().to_representation),
+        "items": Many(OrderItem, ITEM_PROJECTION, fk="order_id"),
+    }, extra=["created_at"])
+"""
+from operator import itemgetter
+
+
+class Many:
+    """
+    لیست تو در تو (مثل items سفارش): یک values() دوم برای همه‌ی ردیف‌های صفحه، گروه‌بندی با fk.
+    """
+    def __init__(self, model, projection, fk, key="id", ordering=("id",)):
+        self.model = model
+        self.projection = projection
+        self.fk = fk
+        self.key = key  # فیلد ردیف والد که fk به آن اشاره می‌کند
+        self.ordering = ordering
+
+    def queryset(self, parent_rows):
+        ids = [row[self.key] for row in parent_rows]
+        return self.projection.values(
+            self.model.objects.filter(**{f"{self.fk}__in": ids}).order_by(*self.ordering), self.fk,
+        )
+
+    def group(self, rows):
+        groups = {}
+        convert = self.projection.convert
+        for row in rows:
+            groups.setdefault(row[self.fk], []).append(convert(row))
+        return groups
+
+
+class Projection:
+    def __init__(self, fields, extra=()):
+        """
+        fields: نام خروجی -> lookup | (lookup, transform) | Many
+        extra: lookupهایی که فقط برای صفحه‌بندی/ETag خوانده می‌شوند و در خروجی نیستند.
+        """
+        self.fields = []
+        self.nested = []
+        for name, spec in fields.items():
+            if isinstance(spec, Many):
+                self.nested.append((name, spec))
+                self.fields.append((name, None, None))
+            elif isinstance(spec, tuple):
+                self.fields.append((name, *spec))
+            else:
+                self.fields.append((name, spec, None))
+        lookups = [source for _, source, _ in self.fields if source is not None]
+        lookups += [spec.key for _, spec in self.nested] + list(extra)
+        self.lookups = list(dict.fromkeys(lookups))
+        self.convert = self._compile()
+
+    def _compile(self):
+        names = tuple(name for name, _, _ in self.fields)
+        getters = tuple(self._getter(source, transform) for _, source, transform in self.fields)
+
+        def convert(row):
+            return dict(zip(names, [get(row) for get in getters]))
+        return convert
+
+    @staticmethod
+    def _getter(source, transform):
+        if source is None:
+            return lambda row: None  # Many؛ در serialize پر می‌شود
+        if transform is None:
+            return itemgetter(source)
+
+        def get(row):
+            v = row[source]
+            return None if v is None else transform(v)
+        return get
+
+    def values(self, queryset, *extra):
+        return queryset.values(*self.lookups, *extra)
+
+    def serialize(self, rows):
+        data = [self.convert(row) for row in rows]
+        for name, many in self.nested:
+            groups = many.group(many.queryset(rows)) if rows else {}
+            self._attach(name, many, rows, data, groups)
+        return data
+
+    async def aserialize(self, rows):
+        data = [self.convert(row) for row in rows]
+        for name, many in self.nested:
+            groups = many.group([row async for row in many.queryset(rows)]) if rows else {}
+            self._attach(name, many, rows, data, groups)
+        return data
+
+    @staticmethod
+    def _attach(name, many, rows, data, groups):
+        for row, item in zip(rows, data):
+            item[name] = groups.get(row[many.key], [])
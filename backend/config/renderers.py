@@ -0,0 +1,35 @@
+"""
+JSONRenderer با orjson (اگر نصب باشد)؛ بدون orjson همان JSONRenderer است.
+
+خروجی با JSONRenderer بایت‌به‌بایت یکی است: فشرده، UTF-8 بدون escape، \\u2028/\\u2029 escape شده
+و datetime/Decimal/lazy string/... با همان encoder در DRF (passthrough). استثناها: float با نماد
+علمی (1e16 به جای 1e+16) و NaN (null به جای خطا)؛ شکل‌های فعلی float ندارند.
+هر چیزی که orjson نپذیرد (کلید غیر رشته، int بزرگ‌تر از 64 بیت) به مسیر stdlib برمی‌گردد.
+"""
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # وابستگی اختیاری
+    orjson = None
+
+LINE_SEPARATORS = ("\u2028".encode(), "\u2029".encode())
+
+
+class FastJSONRenderer(JSONRenderer):
+    def __init__(self):
+        self.encoder = self.encoder_class()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None or data is None or not self.compact or self.ensure_ascii
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=self.encoder.default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        if LINE_SEPARATORS[0] in ret or LINE_SEPARATORS[1] in ret:
+            ret = ret.replace(LINE_SEPARATORS[0], b"\\u2028").replace(LINE_SEPARATORS[1], b"\\u2029")
+        return ret
@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import os
+import tempfile
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -45,26 +47,196 @@ INSTALLED_APPS = [
     "rest_framework",
     "rest_framework.authtoken",
     'accounts',
+    'outbox',
+    'analytics',
+    'idempotency',
 
 ]
 
 from datetime import timedelta
 
+from corsheaders.defaults import default_headers
+from django.core.exceptions import ImproperlyConfigured
+
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "accounts.authentication.TokenUserAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.AllowAny",
     ),
+    # خروجی همان JSONRenderer، با orjson اگر نصب باشد (config/renderers.py)
+    "DEFAULT_RENDERER_CLASSES": (
+        "config.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    # فقط viewهایی که throttle_scope دارند (config/throttling.py)
+    "DEFAULT_THROTTLE_CLASSES": (
+        "config.throttling.TokenBucketThrottle",
+    ),
+    # تعداد proxyهای مورد اعتماد جلوی برنامه (nginx/LB)؛ IP کلاینت از X-Forwarded-For فقط به همین
+    # اندازه خوانده می‌شود. 0 یعنی REMOTE_ADDR و XFF کلاینت نادیده گرفته می‌شود
+    "NUM_PROXIES": int(os.environ.get("DJANGO_NUM_PROXIES", "0")),
 }
 
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=60),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=7),
     "AUTH_HEADER_TYPES": ("Bearer",),
+    # username/email داخل توکن (accounts/authentication.py)
+    "TOKEN_OBTAIN_SERIALIZER": "accounts.serializers.ClaimsTokenObtainPairSerializer",
+    # hash رمز داخل توکن؛ تغییر رمز توکن‌های قبلی را باطل می‌کند (برای همین PASSWORD_HASHING["REHASH_ON_LOGIN"])
+    "CHECK_REVOKE_TOKEN": True,
+}
+
+# کاربر بدون کوئری از روی توکن (accounts/authentication.py)
+TOKEN_USER = {
+    "STATUS_TTL": 30,  # ثانیه؛ تأخیر دیدن غیرفعال شدن/تغییر رمز در workerهای دیگر
+    "STATUS_MAX_ENTRIES": 10000,
+}
+
+# مدت hold موجودی برای سفارش pending؛ بعد از آن expire_holds سفارش را canceled می‌کند
+STOCK_HOLD_TTL = timedelta(minutes=15)
+
+# cache مشترک بین workerها و management commandها: REDIS_URL=redis://host:6379/0 (نیاز به redis-py)
+# بدون آن LocMem درون‌پروسه‌ای است و فقط برای یک پروسه (runserver/تست) درست است
+REDIS_URL = os.environ.get("REDIS_URL", "")
+if REDIS_URL:
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": REDIS_URL}}
+else:
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+# cache جزئیات محصول (catalog/cache.py)
+# با cache مشترک invalidation هر پروسه (وب، import_catalog، adjust_inventory، expire_holds، render_images)
+# به همه می‌رسد. LRU درون‌پروسه‌ای این را نمی‌بیند، پس آنجا TIMEOUT چند ثانیه است: بعد از تغییر در پروسه‌ی
+# دیگر، جزئیات تا همین مدت قدیمی می‌ماند
+if REDIS_URL:
+    CATALOG_DETAIL_CACHE = {
+        "BACKEND": "catalog.cache.DjangoCacheBackend",
+        "OPTIONS": {"alias": "default"},
+        "TIMEOUT": 3600,  # بخش سنگین
+        "STOCK_TIMEOUT": 10,  # fragment موجودی
+    }
+else:
+    CATALOG_DETAIL_CACHE = {
+        "BACKEND": "catalog.cache.LocMemLRUBackend",
+        "OPTIONS": {"max_bytes": 32 * 1024 * 1024},
+        "TIMEOUT": 30,
+        "STOCK_TIMEOUT": 10,
+    }
+
+# Cache-Control پاسخ‌های catalog (catalog/conditional.py)؛ کلیدها همان directiveها هستند
+# پاسخ‌ها به کاربر وابسته نیستند، پس CDN هم می‌تواند نگه دارد (public)
+CATALOG_HTTP_CACHE = {
+    "product_list": {"public": True, "max-age": 30, "stale-while-revalidate": 300},
+    "product_detail": {"public": True, "max-age": 60, "stale-while-revalidate": 600},
+}
+
+# درگاه‌های پرداخت (payments/gateways.py)؛ هر درگاه یک pool اتصال HTTP مشترک دارد
+# درگاه ساختگی (/pay/mock و /api/payments/mock-return/) بدون پرداخت واقعی سفارش را paid می‌کند؛
+# فقط در DEBUG یا با PAYMENT_MOCK_ENABLED=1 (staging) ثبت و mount می‌شود
+PAYMENT_MOCK_ENABLED = DEBUG or os.environ.get("PAYMENT_MOCK_ENABLED") == "1"
+PAYMENT_GATEWAYS = {}
+if PAYMENT_MOCK_ENABLED:
+    PAYMENT_GATEWAYS["mock"] = {"BACKEND": "payments.gateways.MockGateway"}
+if os.environ.get("ZARINPAL_MERCHANT_ID"):
+    PAYMENT_GATEWAYS["zarinpal"] = {
+        "BACKEND": "payments.gateways.ZarinpalGateway",
+        "OPTIONS": {
+            "merchant_id": os.environ["ZARINPAL_MERCHANT_ID"],
+            "base_url": os.environ.get("ZARINPAL_BASE_URL", "https://payment.zarinpal.com"),
+            "start_pay_url": os.environ.get("ZARINPAL_START_PAY_URL", "https://payment.zarinpal.com/pg/StartPay/"),
+            "timeout": 10,  # ثانیه، برای هر تلاش
+            "max_connections": 20,
+            "retries": 2,  # فقط verify (idempotent)
+            "backoff": 0.2,
+        },
+    }
+PAYMENT_DEFAULT_GATEWAY = os.environ.get("PAYMENT_DEFAULT_GATEWAY") or (
+    "zarinpal" if "zarinpal" in PAYMENT_GATEWAYS else "mock"
+)
+# درگاه‌هایی که کلاینت می‌تواند با "gateway" در body انتخاب کند (با کاما)؛ پیش‌فرض فقط PAYMENT_DEFAULT_GATEWAY
+PAYMENT_CLIENT_GATEWAYS = [
+    name.strip() for name in os.environ.get("PAYMENT_CLIENT_GATEWAYS", PAYMENT_DEFAULT_GATEWAY).split(",")
+    if name.strip()
+]
+# صفحه‌ی نتیجه‌ی فرانت که درگاه کاربر را به آن برمی‌گرداند؛ خالی یعنی /pay/result روی همین host
+PAYMENT_CALLBACK_URL = os.environ.get("PAYMENT_CALLBACK_URL", "")
+
+# محدودیت نرخ و admission control (config/throttling.py)
+# rate: پر شدن سطل ("تعداد/s|min|hour|day")، burst: ظرفیت سطل، concurrency: سقف اجرای همزمان در هر پروسه
+THROTTLE = {
+    "ENABLED": os.environ.get("DJANGO_THROTTLE") != "0",  # perf_suite روی سرور محلی: DJANGO_THROTTLE=0
+    "CACHE": "default",  # با چند worker یک cache مشترک (Redis/Memcached) لازم است؛ پایین‌تر بررسی می‌شود
+    "SCOPES": {
+        "checkout": {
+            "ip": {"rate": "30/min", "burst": 10},
+            "user": {"rate": "20/min", "burst": 5},
+            "concurrency": 8,
+        },
+        "auth": {
+            "ip": {"rate": "10/min", "burst": 5},
+            "concurrency": 2,  # hash رمز عبور CPU را می‌گیرد
+        },
+    },
+    "MAX_IN_FLIGHT": 64,  # کل درخواست‌های همزمان هر پروسه
+    "EXEMPT_PATHS": ["/api/health/"],
+    "RETRY_AFTER": 1,  # ثانیه، برای 503
+}
+
+# سطل‌های throttle روی LocMem در هر worker جدا هستند و سهمیه عملاً در تعداد workerها ضرب می‌شود.
+# WEB_CONCURRENCY را gunicorn و uvicorn هر دو می‌خوانند
+WEB_CONCURRENCY = int(os.environ.get("WEB_CONCURRENCY", "1"))
+if (
+    THROTTLE["ENABLED"] and WEB_CONCURRENCY > 1
+    and CACHES[THROTTLE["CACHE"]]["BACKEND"] == "django.core.cache.backends.locmem.LocMemCache"
+):
+    raise ImproperlyConfigured(
+        f"THROTTLE['CACHE'] is a per-process LocMemCache but WEB_CONCURRENCY={WEB_CONCURRENCY}; "
+        "set REDIS_URL so all workers share one rate limit."
+    )
+
+# اندازه‌گیری درخواست‌ها (config/instrumentation.py)؛ متریک‌ها در /api/health/metrics
+INSTRUMENTATION = {
+    "SERVER_TIMING": True,  # هدر Server-Timing روی هر پاسخ
+    "SLOW_QUERY_MS": 200,  # لاگ config.instrumentation.slow_query
+    "SLOW_QUERY_STACK_SAMPLE_RATE": 0.1,  # سهم slow queryهایی که stack trace هم می‌گیرند
+    "SLOW_QUERY_STACK_DEPTH": 12,
 }
+
+# /api/health/outbox/ و /api/health/metrics برای staff یا با هدر Authorization: Token <MONITORING_TOKEN>
+MONITORING_TOKEN = os.environ.get("MONITORING_TOKEN", "")
+
+# outbox و worker آن (outbox/worker.py، manage.py run_outbox)
+OUTBOX = {
+    "BATCH_SIZE": 100,
+    "LEASE_SECONDS": 60,  # بعد از آن رویداد worker مرده دوباره claim می‌شود
+    "MAX_ATTEMPTS": 8,  # بعد از آن dead
+    "RETRY_BACKOFF": 5,  # ثانیه، دو برابر در هر تلاش
+    "RETRY_BACKOFF_MAX": 3600,
+}
+
+# rollup فروش روزانه (analytics/rollups.py، manage.py rollup_sales)
+ANALYTICS = {
+    "BATCH_SIZE": 500,  # سفارش در هر transaction
+    "LAG_SECONDS": 60,  # catch-up به paid_atهای تازه‌تر از این دست نمی‌زند (transactionهای باز)
+    "OVERLAP_SECONDS": 3600,  # هر catch-up این مقدار قبل از watermark را دوباره نگاه می‌کند
+}
+
+# هدر Idempotency-Key روی POST /api/orders/ و /api/payments/initiate/ (idempotency/keys.py)
+# کلیدهای منقضی با manage.py purge_idempotency_keys پاک می‌شوند
+IDEMPOTENCY = {
+    "TTL": timedelta(hours=24),  # مدت نگه‌داری پاسخ برای retry
+    "LEASE_SECONDS": 60,  # بعد از آن claim درخواستی که تمام نشده (پروسه‌ی مرده) دوباره گرفته می‌شود
+    "RETRY_AFTER": 1,  # ثانیه، برای 409 تکراری همزمان
+}
+
+# viewهای async برای مسیرهای خواندنی (config/async_views.py)؛ config/asgi.py روشنش می‌کند
+ASYNC_VIEWS = os.environ.get("DJANGO_ASYNC_VIEWS") == "1"
+
 MIDDLEWARE = [
+    "config.middleware.InstrumentationMiddleware",
+    "config.middleware.AdmissionControlMiddleware",
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -72,7 +244,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    "corsheaders.middleware.CorsMiddleware"
+    "corsheaders.middleware.CorsMiddleware",
+    "config.middleware.ReadYourWritesMiddleware",
 
 ]
 
@@ -99,13 +272,97 @@ WSGI_APPLICATION = 'config.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# با متغیرهای محیطی تنظیم می‌شود؛ بدون DB_ENGINE همان SQLite محلی (در حالت WAL).
+#   DB_ENGINE=postgresql DB_NAME DB_USER DB_PASSWORD DB_HOST DB_PORT
+#   DB_CONN_MAX_AGE   عمر اتصال پایدار (ثانیه)
+#   DB_POOL_MAX_SIZE  pool داخلی psycopg (نیاز به psycopg[pool])؛ با آن CONN_MAX_AGE صفر می‌شود
+#   DB_PGBOUNCER=1    پشت pgbouncer در حالت transaction pooling
+#   DB_REPLICA_HOSTS  لیست hostهای replica با کاما (خواندن‌های catalog/orders)
+#   DB_SQLITE_REPLICAS تعداد replica آزمایشی روی همان فایل SQLite (برای تست router)
+DB_ENGINE = os.environ.get("DB_ENGINE", "sqlite")
+
+if DB_ENGINE == "postgresql":
+    _primary = {
+        "ENGINE": "django.db.backends.postgresql",
+        "NAME": os.environ.get("DB_NAME", "shoe_store"),
+        "USER": os.environ.get("DB_USER", "postgres"),
+        "PASSWORD": os.environ.get("DB_PASSWORD", ""),
+        "HOST": os.environ.get("DB_HOST", "localhost"),
+        "PORT": os.environ.get("DB_PORT", "5432"),
+        "CONN_MAX_AGE": int(os.environ.get("DB_CONN_MAX_AGE", "60")),
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {},
     }
+    if os.environ.get("DB_POOL_MAX_SIZE"):
+        _primary["CONN_MAX_AGE"] = 0
+        _primary["OPTIONS"]["pool"] = {
+            "min_size": int(os.environ.get("DB_POOL_MIN_SIZE", "2")),
+            "max_size": int(os.environ["DB_POOL_MAX_SIZE"]),
+            "timeout": int(os.environ.get("DB_POOL_TIMEOUT", "10")),
+        }
+    if os.environ.get("DB_PGBOUNCER") == "1":
+        _primary["DISABLE_SERVER_SIDE_CURSORS"] = True
+    _replicas = [
+        {**_primary, "HOST": host.strip(), "OPTIONS": dict(_primary["OPTIONS"])}
+        for host in os.environ.get("DB_REPLICA_HOSTS", "").split(",")
+        if host.strip()
+    ]
+else:
+    _primary = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": os.environ.get("DB_NAME", BASE_DIR / "db.sqlite3"),
+        "OPTIONS": {
+            # WAL: خواننده‌ها نویسنده را بلاک نمی‌کنند؛ IMMEDIATE: قفل نوشتن از ابتدای transaction
+            # تا دو transaction هم‌زمان موقع ارتقای قفل به "database is locked" نخورند
+            "init_command": "PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL",
+            "transaction_mode": "IMMEDIATE",
+            "timeout": 20,
+        },
+        # دیتابیس تست روی فایل (نه :memory:) تا تست‌های همزمانی (payments) چند اتصال واقعی داشته باشند؛
+        # در پوشه‌ی temp، نه کنار سورس
+        "TEST": {"NAME": os.environ.get(
+            "DB_TEST_NAME", os.path.join(tempfile.gettempdir(), "shoe_store_test_db.sqlite3"),
+        )},
+    }
+    _replicas = [dict(_primary) for _ in range(int(os.environ.get("DB_SQLITE_REPLICAS", "0")))]
+
+DATABASES = {"default": _primary}
+for _i, _replica in enumerate(_replicas):
+    # در تست‌ها replica همان دیتابیس تست primary است
+    DATABASES[f"replica_{_i}"] = {**_replica, "TEST": {"MIRROR": "default"}}
+
+DATABASE_ROUTERS = ["config.db_router.PrimaryReplicaRouter"]
+# appهایی که خواندنشان (خارج از transaction) به replica می‌رود
+DATABASE_REPLICA_APPS = {"catalog", "orders"}
+# چند ثانیه بعد از درخواست نوشتنی، خواندن‌های همان کلاینت از primary (ReadYourWritesMiddleware)
+DATABASE_REPLICA_PIN_SECONDS = 5
+
+
+# hash رمز عبور (accounts/hashers.py)؛ POLICY برای hashهای جدید است و hash با الگوریتم/هزینه‌ی دیگر
+# با REHASH_ON_LOGIN در اولین ورود موفق بازنویسی می‌شود. مقایسه‌ی سیاست‌ها: manage.py bench_password_hashing
+PASSWORD_HASHING = {
+    "POLICY": os.environ.get("PASSWORD_HASH_POLICY", "scrypt"),  # scrypt | argon2 (argon2-cffi) | pbkdf2
+    "POOL_SIZE": int(os.environ.get("PASSWORD_HASH_THREADS", 2)),  # hash همزمان در هر پروسه (تعداد هسته)
+    "SCRYPT": {"work_factor": 2 ** 15, "block_size": 8, "parallelism": 1},
+    "ARGON2": {"time_cost": 2, "memory_cost": 19 * 1024, "parallelism": 1},  # KiB
+    "PBKDF2": {"iterations": 600_000},
+    # hash تازه همه‌ی توکن‌های کاربر را باطل می‌کند (CHECK_REVOKE_TOKEN)؛ پس با revocation خاموش است و hash
+    # قدیمی تا تغییر بعدی رمز می‌ماند. برای مهاجرت اجباری از الگوریتم ضعیف: PASSWORD_REHASH_ON_LOGIN=1
+    "REHASH_ON_LOGIN": (
+        os.environ.get("PASSWORD_REHASH_ON_LOGIN") == "1" or not SIMPLE_JWT["CHECK_REVOKE_TOKEN"]
+    ),
 }
-
+_PASSWORD_HASHERS = {
+    "scrypt": "accounts.hashers.ScryptPasswordHasher",
+    "argon2": "accounts.hashers.Argon2PasswordHasher",
+    "pbkdf2": "accounts.hashers.PBKDF2PasswordHasher",
+}
+PASSWORD_HASHERS = [
+    _PASSWORD_HASHERS[PASSWORD_HASHING["POLICY"]],
+    *(path for name, path in _PASSWORD_HASHERS.items() if name != PASSWORD_HASHING["POLICY"]),
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+]
+AUTHENTICATION_BACKENDS = ["accounts.backends.PooledModelBackend"]
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -128,6 +385,8 @@ CORS_ALLOWED_ORIGINS = [
     "http://localhost:5174",
     "http://127.0.0.1:5174",
 ]
+CORS_ALLOW_HEADERS = (*default_headers, "idempotency-key")
+CORS_EXPOSE_HEADERS = ["Idempotent-Replayed"]
 
 
 
@@ -147,3 +406,27 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/6.0/howto/static-files/
 
 STATIC_URL = 'static/'
+
+# فایل‌های آپلودی؛ در DEBUG همین Django سرو می‌کند (config/urls.py)، در production وب‌سرور
+MEDIA_URL = "/media/"
+MEDIA_ROOT = Path(os.environ.get("MEDIA_ROOT", BASE_DIR / "media"))
+
+# تصاویر محصول (catalog/images.py، manage.py render_images)
+# نام فایل‌ها به محتوا وابسته است؛ زیر URL می‌توان Cache-Control: public, max-age=31536000, immutable داد
+CATALOG_IMAGES = {
+    "ROOT": MEDIA_ROOT / "catalog",
+    "URL": MEDIA_URL + "catalog/",
+    # fit: cover برش به همان ابعاد، contain داخل کادر بدون بزرگ‌نمایی؛ تغییر اینها render دوباره می‌خواهد
+    "RENDITIONS": {
+        "thumbnail": {"width": 160, "height": 160, "fit": "cover"},
+        "card": {"width": 480, "height": 480, "fit": "cover"},
+        "zoom": {"width": 1600, "height": 1600, "fit": "contain"},
+    },
+    "FORMATS": {  # گزینه‌های Image.save در Pillow
+        "webp": {"quality": 80, "method": 4},
+        "jpeg": {"quality": 82, "optimize": True, "progressive": True},
+    },
+    "WORKERS": int(os.environ.get("IMAGE_WORKERS", 2)),  # پروسه‌های render (تعداد هسته)
+    "MAX_UPLOAD_BYTES": 20 * 1024 * 1024,
+    "MAX_PIXELS": 50_000_000,  # بیشتر از این decode نمی‌شود (decompression bomb)
+}
@@ -0,0 +1,153 @@
+"""
+محدودیت نرخ و admission control برای endpointهای گران (checkout، ورود و ثبت‌نام).
+
+- TokenBucketThrottle: throttle در DRF؛ برای هر throttle_scope یک سطل token به ازای IP و یک
+  سطل به ازای کاربر. شمارنده‌ها در cache مشترک (THROTTLE["CACHE"]) با incr اتمیک نگه‌داری
+  می‌شوند تا همه‌ی workerها یک سهمیه ببینند. رد شدن: 429 + Retry-After. IP از
+  X-Forwarded-For فقط پشت REST_FRAMEWORK["NUM_PROXIES"] proxy مورد اعتماد خوانده می‌شود.
+- ConcurrencyLimiter: تعداد درخواست‌های در حال اجرای هر پروسه (کل و هر scope)؛ اگر پر باشد
+  درخواست فوراً با 503 + Retry-After رد می‌شود تا threadها/worker پیش از صف شدن آزاد بمانند.
+تنظیمات: settings.THROTTLE
+"""
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+from .metrics import registry
+
+rejected_total = registry.counter(
+    "http_rejected_requests_total", "Requests refused by rate limiting or admission control.",
+    ("reason", "scope"),
+)
+in_flight_gauge = registry.gauge("http_requests_in_flight", "Requests running in this process.", ("scope",))
+
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def conf(name):
+    return settings.THROTTLE[name]
+
+
+def parse_rate(rate):
+    """
+    "30/min" -> توکن در ثانیه
+    """
+    num, period = rate.split("/")
+    return int(num) / PERIODS[period[0]]
+
+
+class TokenBucket:
+    """
+    سطل token روی cache با عملیات اتمیک (add/incr/decr).
+
+    به جای خود توکن‌ها تعداد مصرف‌شده (n) از لحظه‌ی ساخت سطل (epoch) شمرده می‌شود:
+    available = burst + rate * (now - epoch) - n
+    incr اتمیک است، پس دو درخواست همزمان یک توکن را نمی‌گیرند. اعتبار اضافه بر burst
+    (سطل بیکار) با incr روی n بریده می‌شود؛ در رقابت ممکن است کمی سخت‌گیرتر شود، نه آسان‌گیرتر.
+    سطلی که به اندازه‌ی پر شدن کامل بیکار بماند expire می‌شود (همان سطل پر).
+    """
+    def __init__(self, cache, key, rate, burst):
+        self.cache = cache
+        self.key = key
+        self.rate = rate
+        self.burst = burst
+        self.ttl = math.ceil(burst / rate) + 1
+
+    def consume(self, now=None):
+        """
+        خروجی: (allowed, retry_after_seconds)
+        """
+        now = time.time() if now is None else now
+        epoch_key, count_key = f"{self.key}:t", f"{self.key}:n"
+        # add هیچ‌وقت مقدار موجود را بازنویسی نمی‌کند؛ مصرف درخواست همزمان گم نمی‌شود
+        self.cache.add(epoch_key, now, self.ttl)
+        self.cache.add(count_key, 0, self.ttl)
+        epoch = self.cache.get(epoch_key, now)
+        try:
+            n = self.cache.incr(count_key)
+        except ValueError:
+            # شمارنده بین add و incr expire شده
+            n = 1 if self.cache.add(count_key, 1, self.ttl) else self.cache.incr(count_key)
+
+        available = self.burst + self.rate * (now - epoch) - (n - 1)
+        if available > self.burst:
+            excess = int(available - self.burst)
+            if excess:
+                self.cache.incr(count_key, excess)
+            available -= excess
+        if available >= 1:
+            self.cache.touch(epoch_key, self.ttl)
+            self.cache.touch(count_key, self.ttl)
+            return True, 0
+        self.cache.decr(count_key)
+        return False, (1 - available) / self.rate
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    برای viewهایی که throttle_scope دارند و آن scope در THROTTLE["SCOPES"] است؛ بقیه آزادند.
+    """
+    def allow_request(self, request, view):
+        self.wait_seconds = None
+        if not conf("ENABLED"):
+            return True
+        scope = getattr(view, "throttle_scope", None)
+        limits = conf("SCOPES").get(scope) if scope else None
+        if not limits:
+            return True
+
+        cache = caches[conf("CACHE")]
+        buckets = []
+        if limits.get("ip"):
+            buckets.append(("rate_limit_ip", f"ip:{self.get_ident(request)}", limits["ip"]))
+        if limits.get("user") and request.user and request.user.is_authenticated:
+            buckets.append(("rate_limit_user", f"user:{request.user.pk}", limits["user"]))
+
+        for reason, ident, limit in buckets:
+            bucket = TokenBucket(cache, f"throttle:{scope}:{ident}", parse_rate(limit["rate"]), limit["burst"])
+            allowed, wait = bucket.consume()
+            if not allowed:
+                rejected_total.inc(reason, scope)
+                self.wait_seconds = wait
+                return False
+        return True
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class ConcurrencyLimiter:
+    """
+    شمارنده‌ی درخواست‌های در حال اجرا در این پروسه؛ acquire غیرمسدودکننده است.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight = {}
+
+    def acquire(self, scope, limit):
+        with self._lock:
+            if self._in_flight.get(scope, 0) >= limit:
+                return False
+            self._in_flight[scope] = self._in_flight.get(scope, 0) + 1
+            return True
+
+    def release(self, scope):
+        with self._lock:
+            self._in_flight[scope] -= 1
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._in_flight)
+
+
+limiter = ConcurrencyLimiter()
+
+
+@registry.collector
+def collect_in_flight():
+    for scope, n in limiter.snapshot().items():
+        in_flight_gauge.set(scope, value=n)
@@ -14,6 +14,8 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
+from django.conf.urls.static import static
 from django.urls import path, include
 from django.contrib import admin
 
@@ -24,5 +26,8 @@ urlpatterns = [
     path("api/", include("orders.urls")),
     path("api/", include("payments.urls")),
     path("api/", include("accounts.urls")),
+    path("api/", include("analytics.urls")),
 
 ]
+# فقط در DEBUG؛ در production وب‌سرور MEDIA_ROOT را سرو می‌کند
+urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -0,0 +1,247 @@
+import asyncio
+import io
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+DEFAULT_PATHS = ["/api/health/ping/", "/api/products/"]
+
+
+class Stats:
+    def __init__(self):
+        self.latencies = []
+        self.errors = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def enter(self):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def leave(self):
+        with self._lock:
+            self.in_flight -= 1
+
+
+class Command(BaseCommand):
+    help = (
+        "Concurrent load against the read endpoints, to compare WSGI and ASGI workers.\n"
+        "With --url it drives a running server over keep-alive HTTP/1.1 connections, e.g.\n"
+        "  gunicorn config.wsgi -w 1 --threads 8   vs   uvicorn config.asgi:application --workers 1\n"
+        "Without --url it drives Django's handler in-process: WSGIHandler on a pool of --threads "
+        "(one gthread worker), or ASGIHandler on one event loop when DJANGO_ASYNC_VIEWS=1. "
+        "'held' is the most requests in flight at once: inside the worker in-process, "
+        "outstanding on the client with --url."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", help="Base URL of a running server (http://host:port).")
+        parser.add_argument("--paths", default=",".join(DEFAULT_PATHS))
+        parser.add_argument("--concurrency", default="1,10,100,500")
+        parser.add_argument("--duration", type=float, default=5.0, help="Seconds per level.")
+        parser.add_argument("--threads", type=int, default=8, help="In-process WSGI pool size.")
+        parser.add_argument(
+            "--db-latency-ms", type=float, default=0.0,
+            help="In-process only: add a sleep to every query to simulate a remote database.",
+        )
+
+    def handle(self, *args, **options):
+        paths = [p for p in options["paths"].split(",") if p]
+        levels = [int(c) for c in options["concurrency"].split(",")]
+
+        if options["url"]:
+            url = urlsplit(options["url"])
+            if url.scheme != "http" or not url.hostname:
+                raise CommandError("--url must look like http://host:port")
+            target = f"{url.hostname}:{url.port or 80}"
+            run = lambda path, c: asyncio.run(self.http_level(url.hostname, url.port or 80, path, c, options))
+        elif settings.ASYNC_VIEWS:
+            target = "in-process ASGIHandler"
+            run = lambda path, c: asyncio.run(self.asgi_level(path, c, options))
+        else:
+            target = f"in-process WSGIHandler, {options['threads']} threads"
+            run = lambda path, c: self.wsgi_level(path, c, options)
+
+        if options["db_latency_ms"] and not options["url"]:
+            self.add_db_latency(options["db_latency_ms"] / 1000)
+
+        self.stdout.write(f"{target}, {options['duration']:.0f}s per level")
+        for path in paths:
+            self.stdout.write(path)
+            for c in levels:
+                stats = run(path, c)
+                self.report(c, stats, options["duration"])
+
+    def report(self, concurrency, stats, duration):
+        if not stats.latencies:
+            self.stdout.write(f"  c={concurrency:<5} no successful requests, errors {stats.errors}")
+            return
+        lat = sorted(stats.latencies)
+        p99 = lat[min(len(lat) - 1, int(len(lat) * 0.99))]
+        self.stdout.write(
+            f"  c={concurrency:<5} {len(lat) / duration:9.1f} req/s   p50 {statistics.median(lat):8.2f} ms   "
+            f"p99 {p99:8.2f} ms   held {stats.max_in_flight:<5} errors {stats.errors}"
+        )
+
+    # --- in-process WSGI ---
+
+    def wsgi_level(self, path, concurrency, options):
+        handler = WSGIHandler()
+        stats = Stats()
+        deadline = time.perf_counter() + options["duration"]
+        path, _, query = path.partition("?")
+
+        def serve():
+            environ = {
+                "REQUEST_METHOD": "GET", "PATH_INFO": path, "QUERY_STRING": query,
+                "SERVER_NAME": "127.0.0.1", "SERVER_PORT": "80", "HTTP_HOST": "127.0.0.1",
+                "wsgi.input": io.BytesIO(), "wsgi.url_scheme": "http", "wsgi.errors": io.StringIO(),
+            }
+            status = []
+            stats.enter()
+            try:
+                response = handler(environ, lambda s, h, exc_info=None: status.append(s))
+                b"".join(response)
+                response.close()
+            finally:
+                stats.leave()
+            return status[0].startswith(("2", "3"))
+
+        # هر client یک اتصال است؛ worker فقط --threads درخواست را هم‌زمان سرو می‌کند و بقیه در صف می‌مانند
+        with ThreadPoolExecutor(options["threads"]) as pool:
+            def client():
+                while time.perf_counter() < deadline:
+                    start = time.perf_counter()
+                    self.record(stats, pool.submit(serve).result(), start)
+
+            clients = [threading.Thread(target=client) for _ in range(concurrency)]
+            for t in clients:
+                t.start()
+            for t in clients:
+                t.join()
+        connections.close_all()
+        return stats
+
+    # --- in-process ASGI ---
+
+    async def asgi_level(self, path, concurrency, options):
+        handler = ASGIHandler()
+        stats = Stats()
+        deadline = time.perf_counter() + options["duration"]
+        path, _, query = path.partition("?")
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+            "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": query.encode(),
+            "headers": [(b"host", b"127.0.0.1")], "server": ("127.0.0.1", 80), "client": ("127.0.0.1", 0),
+        }
+
+        async def client():
+            while time.perf_counter() < deadline:
+                body_sent = False
+                status = []
+
+                async def receive():
+                    nonlocal body_sent
+                    if not body_sent:
+                        body_sent = True
+                        return {"type": "http.request", "body": b"", "more_body": False}
+                    await asyncio.Future()  # قطع اتصال نداریم
+
+                async def send(message):
+                    if message["type"] == "http.response.start":
+                        status.append(message["status"])
+
+                start = time.perf_counter()
+                stats.enter()
+                try:
+                    await handler(dict(scope), receive, send)
+                finally:
+                    stats.leave()
+                self.record(stats, status[0] < 400, start)
+
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+        return stats
+
+    # --- HTTP ---
+
+    async def http_level(self, host, port, path, concurrency, options):
+        stats = Stats()
+        deadline = time.perf_counter() + options["duration"]
+        request = f"GET {path} HTTP/1.1\r\nHost: {host}\r\nConnection: keep-alive\r\n\r\n".encode()
+
+        async def client():
+            reader = writer = None
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                stats.enter()
+                try:
+                    if writer is None:
+                        reader, writer = await asyncio.open_connection(host, port)
+                    writer.write(request)
+                    ok, keep_alive = await self.read_response(reader)
+                except (OSError, asyncio.IncompleteReadError, ValueError):
+                    ok, keep_alive = False, False
+                finally:
+                    stats.leave()
+                self.record(stats, ok, start)
+                if not keep_alive and writer is not None:
+                    writer.close()
+                    reader = writer = None
+            if writer is not None:
+                writer.close()
+
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+        return stats
+
+    @staticmethod
+    async def read_response(reader):
+        status_line = await reader.readline()
+        if not status_line:
+            raise asyncio.IncompleteReadError(b"", None)
+        status = int(status_line.split()[1])
+        headers = {}
+        while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        if headers.get("transfer-encoding") == "chunked":
+            while size := int((await reader.readline()).split(b";")[0], 16):
+                await reader.readexactly(size + 2)
+            await reader.readline()
+        else:
+            await reader.readexactly(int(headers.get("content-length", 0)))
+        return status < 400, headers.get("connection", "").lower() != "close"
+
+    # --- helpers ---
+
+    @staticmethod
+    def record(stats, ok, start):
+        if ok:
+            stats.latencies.append((time.perf_counter() - start) * 1000)
+        else:
+            stats.errors += 1
+
+    @staticmethod
+    def add_db_latency(seconds):
+        def wrapper(execute, sql, params, many, context):
+            time.sleep(seconds)
+            return execute(sql, params, many, context)
+
+        def install(connection, **kwargs):
+            # با CONN_MAX_AGE=0 هر درخواست دوباره وصل می‌شود
+            if wrapper not in connection.execute_wrappers:
+                connection.execute_wrappers.append(wrapper)
+
+        connection_created.connect(install, weak=False)
+        for conn in connections.all():
+            install(conn)
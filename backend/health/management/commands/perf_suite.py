@@ -0,0 +1,222 @@
+import http.client
+import json
+import random
+import re
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+
+from catalog.models import Inventory, Product
+from orders.models import Order
+
+THRESHOLDS = Path(__file__).resolve().parents[2] / "perf_thresholds.json"
+SCENARIOS = ["list", "detail", "checkout", "payment_callback"]
+QUERIES = re.compile(r'db;[^,]*desc="(\d+) queries"')
+
+
+class HTTPTransport:
+    """
+    یک اتصال keep-alive برای هر thread.
+    """
+    def __init__(self, url):
+        url = urlsplit(url)
+        if url.scheme != "http" or not url.hostname:
+            raise CommandError("--url must look like http://host:port")
+        self.host, self.port = url.hostname, url.port or 80
+        self.local = threading.local()
+
+    def send(self, method, path, payload=None):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = self.local.conn = http.client.HTTPConnection(self.host, self.port, timeout=30)
+        body = json.dumps(payload).encode() if payload is not None else None
+        headers = {"Content-Type": "application/json"} if body else {}
+        try:
+            conn.request(method, path, body=body, headers=headers)
+            response = conn.getresponse()
+            data = response.read()
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            self.local.conn = None
+            raise
+        return response.status, response.getheader("Server-Timing", ""), data
+
+
+class InProcessTransport:
+    """
+    بدون سرور: Django test Client روی همین پروسه (برای CI).
+    """
+    def __init__(self):
+        self.local = threading.local()
+        if "testserver" not in settings.ALLOWED_HOSTS:
+            settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, "testserver"]
+        # یک IP برای همه‌ی درخواست‌ها؛ سطل checkout بلافاصله خالی می‌شود
+        settings.THROTTLE = {**settings.THROTTLE, "ENABLED": False}
+
+    def send(self, method, path, payload=None):
+        client = getattr(self.local, "client", None)
+        if client is None:
+            client = self.local.client = Client(raise_request_exception=False)
+        if method == "GET":
+            response = client.get(path)
+        else:
+            response = client.post(path, json.dumps(payload), content_type="application/json")
+        return response.status_code, response.get("Server-Timing", ""), response.content
+
+
+class Command(BaseCommand):
+    help = (
+        "Latency, throughput and query-count suite for list, detail, checkout and payment callback, "
+        "run against a local server (--url, same database as this settings module) or in-process. "
+        "Fails when a result crosses health/perf_thresholds.json. Seed data first with seed_perf_data. "
+        "Rate limits are switched off in-process; start the server with DJANGO_THROTTLE=0."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", help="Base URL of a running server (http://host:port).")
+        parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+        parser.add_argument("--requests", type=int, default=200, help="Measured requests per scenario.")
+        parser.add_argument("--concurrency", type=int, default=8)
+        parser.add_argument("--warmup", type=int, default=10)
+        parser.add_argument("--thresholds", default=str(THRESHOLDS))
+        parser.add_argument("--report", help="Write the results as JSON to this file.")
+        parser.add_argument("--seed", type=int, default=1)
+
+    def handle(self, *args, **options):
+        with open(options["thresholds"], encoding="utf-8") as f:
+            thresholds = json.load(f)
+        self.rng = random.Random(options["seed"])
+        self.transport = HTTPTransport(options["url"]) if options["url"] else InProcessTransport()
+        self.slugs = list(Product.objects.filter(slug__startswith="perf-", is_active=True).values_list("slug", flat=True))
+        self.variant_ids = list(
+            Inventory.objects
+            .filter(variant__sku__startswith="PERF-", quantity__gt=0)
+            .values_list("variant_id", flat=True)
+        )
+        if not self.slugs or not self.variant_ids:
+            raise CommandError("No perf data; run `manage.py seed_perf_data` first.")
+        self.order_ids = []
+
+        results, failures = {}, []
+        self.stdout.write(
+            f"{'scenario':<18} {'p50':>8} {'p95':>8} {'p99':>8} {'req/s':>8} {'queries':>8} {'errors':>7}  (ms)"
+        )
+        try:
+            for name in options["scenarios"].split(","):
+                if name not in SCENARIOS:
+                    raise CommandError(f"Unknown scenario: {name}")
+                result = results[name] = self.run(name, options)
+                self.stdout.write(
+                    f"{name:<18} {result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} {result['p99_ms']:>8.2f} "
+                    f"{result['rps']:>8.1f} {result['max_queries']:>8} {result['errors']:>7}"
+                )
+                failures += self.compare(name, result, thresholds.get(name, {}))
+        finally:
+            # سفارش‌های ساخته‌شده موجودی را hold کرده‌اند
+            Order.objects.filter(id__in=self.order_ids).delete()
+
+        if options["report"]:
+            with open(options["report"], "w", encoding="utf-8") as f:
+                json.dump(results, f, indent=2)
+        if failures:
+            raise CommandError("Performance regression:\n  " + "\n  ".join(failures))
+        self.stdout.write(self.style.SUCCESS("All scenarios within thresholds."))
+
+    # --- scenarios ---
+
+    def requests_for(self, name, count):
+        """
+        لیست (method, path, payload)؛ آماده‌سازی پرداخت (checkout و initiate) اندازه گرفته نمی‌شود.
+        """
+        if name == "list":
+            brands = [f"perf-brand-{n}" for n in range(5)]
+            return [
+                ("GET", self.rng.choice(["/api/products/", f"/api/products/?brand={self.rng.choice(brands)}",
+                                         "/api/products/?size=42&color=black"]), None)
+                for _ in range(count)
+            ]
+        if name == "detail":
+            return [("GET", f"/api/products/{self.rng.choice(self.slugs)}/", None) for _ in range(count)]
+        if name == "checkout":
+            return [("POST", "/api/orders/", self.cart()) for _ in range(count)]
+        return [("GET", f"/api/payments/mock-return/?authority={self.pending_payment()}&status=ok", None)
+                for _ in range(count)]
+
+    def cart(self):
+        return {"items": [{"variantId": v, "qty": 1} for v in self.rng.sample(self.variant_ids, 2)]}
+
+    def pending_payment(self):
+        status, _, body = self.transport.send("POST", "/api/orders/", self.cart())
+        if status != 201:
+            raise CommandError(f"Checkout failed while preparing payments: HTTP {status} {body[:200]!r}")
+        order_id = json.loads(body)["order_id"]
+        self.order_ids.append(order_id)
+        status, _, body = self.transport.send("POST", "/api/payments/initiate/", {"order_id": order_id})
+        if status not in (200, 201):
+            raise CommandError(f"Initiate failed while preparing payments: HTTP {status} {body[:200]!r}")
+        return json.loads(body)["authority"]
+
+    def run(self, name, options):
+        warmup = self.requests_for(name, options["warmup"])
+        measured = self.requests_for(name, options["requests"])
+        for request in warmup:
+            self.send(name, request)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(options["concurrency"]) as pool:
+            samples = list(pool.map(lambda request: self.send(name, request), measured))
+        elapsed = time.perf_counter() - start
+        if not options["url"]:
+            connections.close_all()
+
+        latencies = sorted(ms for ok, ms, _ in samples if ok)
+        errors = sum(not ok for ok, _, _ in samples)
+        if not latencies:
+            raise CommandError(f"{name}: every request failed.")
+        return {
+            "p50_ms": statistics.median(latencies),
+            "p95_ms": self.percentile(latencies, 0.95),
+            "p99_ms": self.percentile(latencies, 0.99),
+            "rps": len(samples) / elapsed,
+            "max_queries": max(queries for _, _, queries in samples),
+            "errors": errors,
+            "requests": len(samples),
+        }
+
+    def send(self, name, request):
+        method, path, payload = request
+        start = time.perf_counter()
+        try:
+            status, timing, body = self.transport.send(method, path, payload)
+        except (OSError, http.client.HTTPException):
+            return False, 0.0, 0
+        elapsed = (time.perf_counter() - start) * 1000
+        if name == "checkout" and status == 201:
+            self.order_ids.append(json.loads(body)["order_id"])
+        match = QUERIES.search(timing)
+        return status < 400, elapsed, int(match.group(1)) if match else 0
+
+    @staticmethod
+    def percentile(values, q):
+        return values[min(len(values) - 1, int(len(values) * q))]
+
+    @staticmethod
+    def compare(name, result, limits):
+        failures = []
+        if "p95_ms" in limits and result["p95_ms"] > limits["p95_ms"]:
+            failures.append(f"{name}: p95 {result['p95_ms']:.1f} ms > {limits['p95_ms']} ms")
+        if "min_rps" in limits and result["rps"] < limits["min_rps"]:
+            failures.append(f"{name}: {result['rps']:.1f} req/s < {limits['min_rps']} req/s")
+        if "max_queries" in limits and result["max_queries"] > limits["max_queries"]:
+            failures.append(f"{name}: {result['max_queries']} queries > {limits['max_queries']}")
+        if result["errors"] > result["requests"] * limits.get("max_error_rate", 0):
+            failures.append(f"{name}: {result['errors']} failed request(s)")
+        return failures
@@ -0,0 +1,13 @@
+from django.conf import settings
+from django.utils.crypto import constant_time_compare
+from rest_framework.permissions import BasePermission
+
+
+class MonitoringToken(BasePermission):
+    """
+    برای scraper/مانیتورینگ بدون کاربر: هدر Authorization: Token <MONITORING_TOKEN>
+    (Prometheus: authorization: {type: Token, credentials: ...}). بدون MONITORING_TOKEN فقط staff.
+    """
+    def has_permission(self, request, view):
+        token = settings.MONITORING_TOKEN
+        return bool(token) and constant_time_compare(request.headers.get("Authorization", ""), f"Token {token}")
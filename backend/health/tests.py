@@ -1,3 +1,78 @@
-from django.test import TestCase
+import re
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from config import instrumentation
+from config.metrics import Histogram
+
+SERVER_TIMING = re.compile(
+    r'^db;dur=\d+\.\d;desc="(\d+) queries", serialize;dur=\d+\.\d, app;dur=\d+\.\d$'
+)
+
+
+class InstrumentationTests(TestCase):
+    def test_queries_are_counted_through_the_execute_wrapper(self):
+        instrumentation.install()
+        stats, token = instrumentation.begin()
+        try:
+            User.objects.count()
+            list(User.objects.all())
+        finally:
+            instrumentation.end(token)
+        self.assertEqual(stats.queries, 2)
+        self.assertGreater(stats.db_time, 0)
+        User.objects.count()  # بیرون از درخواست شمرده نمی‌شود
+        self.assertEqual(stats.queries, 2)
+
+    def test_server_timing_header_matches_the_query_count(self):
+        with CaptureQueriesContext(connection) as queries:
+            r = self.client.get("/api/products/")
+        self.assertEqual(r.status_code, 200)
+        # perf_suite همین فرمت را parse می‌کند (health/management/commands/perf_suite.py)
+        match = SERVER_TIMING.match(r["Server-Timing"])
+        self.assertIsNotNone(match, r["Server-Timing"])
+        self.assertEqual(int(match.group(1)), len(queries))
+
+    @override_settings(INSTRUMENTATION={"SERVER_TIMING": True, "SLOW_QUERY_MS": 0,
+                                        "SLOW_QUERY_STACK_SAMPLE_RATE": 1, "SLOW_QUERY_STACK_DEPTH": 12})
+    def test_slow_queries_are_logged_with_view_and_stack(self):
+        with self.assertLogs("config.instrumentation.slow_query", "WARNING") as logs:
+            self.client.get("/api/products/")
+        self.assertRegex(logs.output[0], r"in ProductList(API|Async)View on default")
+        # stack فقط frameهای پروژه
+        output = "\n".join(logs.output)
+        self.assertIn(f'File "{settings.BASE_DIR}', output)
+        self.assertNotIn("site-packages", output)
+
+
+class MetricsTests(TestCase):
+    def test_histogram_buckets_are_cumulative_with_le(self):
+        h = Histogram("t_seconds", "Test.", ("view",), buckets=(1, 2.5))
+        for value in (0.5, 1, 2, 10):
+            h.observe("V", value=value)
+        self.assertEqual(h.render(), [
+            "# HELP t_seconds Test.",
+            "# TYPE t_seconds histogram",
+            't_seconds_bucket{view="V",le="1"} 2',
+            't_seconds_bucket{view="V",le="2.5"} 3',
+            't_seconds_bucket{view="V",le="+Inf"} 4',
+            't_seconds_sum{view="V"} 13.5',
+            't_seconds_count{view="V"} 4',
+        ])
+
+    def test_metrics_endpoint_needs_staff_or_token(self):
+        client = APIClient()
+        self.assertIn(client.get("/api/health/metrics").status_code, (401, 403))
+        client.force_authenticate(User.objects.create_user("staff", password="x", is_staff=True))
+        r = client.get("/api/health/metrics")
+        self.assertEqual(r.status_code, 200)
+        self.assertIn("# TYPE http_requests_total counter", r.content.decode())
+        self.assertIn('outbox_queue_depth{status="pending"}', r.content.decode())
+        with self.settings(MONITORING_TOKEN="s3cret"):
+            r = APIClient().get("/api/health/metrics", HTTP_AUTHORIZATION="Token s3cret")
+        self.assertEqual(r.status_code, 200)
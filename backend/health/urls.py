@@ -1,6 +1,9 @@
+from django.conf import settings
 from django.urls import path
-from .views import ping
+from .views import aping, metrics, outbox, ping
 
 urlpatterns = [
-    path("ping/", ping),
-]
\ No newline at end of file
+    path("ping/", aping if settings.ASYNC_VIEWS else ping),
+    path("outbox/", outbox),
+    path("metrics", metrics),  # مسیر پیش‌فرض scrape در Prometheus بدون / آخر است
+]
@@ -1,6 +1,41 @@
-from rest_framework.decorators import api_view
+from django.http import HttpResponse
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
+from config.async_views import render_json
+from config.metrics import registry
+from outbox.worker import queue_stats
+from .permissions import MonitoringToken
+
+outbox_depth = registry.gauge("outbox_queue_depth", "Outbox events by status (done excluded).", ("status",))
+outbox_lag = registry.gauge("outbox_lag_seconds", "Age of the oldest due pending outbox event.")
 
 @api_view(["GET"])
 def ping(request):
     return Response({"status": "ok"})
+
+async def aping(request):
+    # نسخه‌ی ASGI؛ بدون لایه‌ی DRF
+    return render_json({"status": "ok"})
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser | MonitoringToken])
+def outbox(request):
+    # عمق صف outbox و lag برای مانیتورینگ worker
+    return Response(queue_stats())
+
+
+@registry.collector
+def collect_outbox():
+    stats = queue_stats()
+    for status, n in stats["depth"].items():
+        outbox_depth.set(status, value=n)
+    outbox_lag.set(value=stats["lag_seconds"])
+
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser | MonitoringToken])
+def metrics(request):
+    # فرمت متنی Prometheus؛ شمارنده‌ها مال همین پروسه‌اند. هر scrape collect_outbox را اجرا می‌کند
+    # (دو کوئری روی index وضعیت outbox)، پس فقط staff یا scraper با MONITORING_TOKEN
+    return HttpResponse(registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,19 @@
+from django.contrib import admin
+
+from config.admin import LargeTableAdmin
+from .models import IdempotencyKey
+
+
+@admin.register(IdempotencyKey)
+class IdempotencyKeyAdmin(LargeTableAdmin):
+    # فقط idempotency/keys.py می‌نویسد؛ حذف یک کلید اجازه‌ی اجرای دوباره‌ی درخواست را می‌دهد
+    list_display = ("id", "scope", "owner", "key", "status", "response_status", "created_at", "expires_at")
+    list_filter = ("status", "scope")
+    search_fields = ("=key",)
+    readonly_fields = (
+        "scope", "owner", "key", "fingerprint", "status", "token", "locked_until", "response_status",
+        "response_body", "created_at", "expires_at",
+    )
+
+    def has_add_permission(self, request):
+        return False
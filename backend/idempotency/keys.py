@@ -0,0 +1,176 @@
+"""
+هدر Idempotency-Key برای POSTهایی که کلاینت روی شبکه‌ی ناپایدار retry می‌کند:
+
+    class OrderCreateAPIView(APIView):
+        @idempotent("orders.create", atomic=True)
+        def post(self, request): ...
+
+- درخواست بدون هدر مثل قبل اجرا می‌شود.
+- retry با همان کلید و همان بدنه: پاسخ ذخیره‌شده (با یک SELECT روی index یکتا)، هدر Idempotent-Replayed.
+- همان کلید با بدنه‌ی دیگر: 422.
+- تکراری همزمان: فوراً 409 با Retry-After؛ منتظر نمی‌ماند تا slot admission control (concurrency
+  همان scope) را نگه ندارد.
+- کلید هر کاربر جداست؛ کلید مهمان به IP (پشت NUM_PROXIES) و User-Agent او بسته است، پس دو مهمان با
+  یک کلید به هم نمی‌خورند. مهمانی که بین retryها IP عوض کند کلید تازه حساب می‌شود.
+- درخواست اصلی که پروسه‌اش مرده: بعد از LEASE_SECONDS کلید دوباره claim می‌شود.
+- خطای 5xx یا exception: کلید آزاد می‌شود تا retry کار را دوباره انجام دهد.
+
+atomic=True: view و ثبت پاسخ در یک transaction؛ اگر کلید در این فاصله از دست رفته باشد (lease تمام شده
+و درخواست دیگری claim کرده) کار rollback می‌شود و 409 برمی‌گردد، پس سفارش دو بار ساخته نمی‌شود.
+بدون atomic (مثلاً initiate پرداخت که درگاه HTTP صدا می‌زند و نباید transaction باز نگه دارد)
+خود view باید در برابر تکرار امن باشد؛ کلید فقط هزینه‌ی retry را برمی‌دارد.
+"""
+import functools
+import hashlib
+import json
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.throttling import BaseThrottle
+
+from .models import IdempotencyKey
+
+HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+# پاسخ‌هایی که به وضعیت لحظه‌ای بستگی دارند ذخیره نمی‌شوند
+TRANSIENT_STATUSES = {status.HTTP_409_CONFLICT, status.HTTP_429_TOO_MANY_REQUESTS}
+
+
+class KeyLost(Exception):
+    pass
+
+
+def conf(name):
+    return settings.IDEMPOTENCY[name]
+
+
+def fingerprint(request):
+    body = request.data
+    if hasattr(body, "lists"):  # QueryDict (form/multipart)
+        body = dict(body.lists())
+    raw = json.dumps([request.method, request.path, body], sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def owner_of(request):
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated:
+        return str(user.pk)
+    client = f"{BaseThrottle().get_ident(request)}|{request.headers.get('User-Agent', '')}"
+    return "guest:" + hashlib.sha256(client.encode()).hexdigest()[:48]
+
+
+def replay(row):
+    return Response(row.response_body, status=row.response_status, headers={REPLAYED_HEADER: "true"})
+
+
+def conflict(detail, code=status.HTTP_409_CONFLICT):
+    headers = {"Retry-After": str(conf("RETRY_AFTER"))} if code == status.HTTP_409_CONFLICT else None
+    return Response({"detail": detail}, status=code, headers=headers)
+
+
+def claim(scope, owner, key, digest):
+    """
+    خروجی: (row, token)؛ token برای claim موفق، None یعنی row مال درخواست دیگری است.
+    """
+    lookup = {"scope": scope, "owner": owner, "key": key}
+    token = uuid.uuid4().hex
+    now = timezone.now()
+    row = IdempotencyKey.objects.filter(**lookup).first()
+    if row is None:
+        try:
+            with transaction.atomic():
+                row = IdempotencyKey.objects.create(
+                    **lookup, fingerprint=digest, token=token,
+                    locked_until=now + timedelta(seconds=conf("LEASE_SECONDS")), expires_at=now + conf("TTL"),
+                )
+            return row, token
+        except IntegrityError:  # درخواست همزمان زودتر ثبت کرد
+            row = IdempotencyKey.objects.get(**lookup)
+
+    # کلید منقضی (که هنوز purge نشده) آزاد است؛ درخواست اصلی مرده فقط با همان بدنه ادامه داده می‌شود
+    stale = row.status == "processing" and row.locked_until <= now and row.fingerprint == digest
+    if stale or row.expires_at <= now:
+        # claim دوباره فقط اگر کسی زودتر از ما همین کار را نکرده باشد
+        taken = IdempotencyKey.objects.filter(id=row.id, token=row.token).update(
+            status="processing", fingerprint=digest, token=token,
+            locked_until=now + timedelta(seconds=conf("LEASE_SECONDS")),
+            response_status=None, response_body=None, expires_at=now + conf("TTL"),
+        )
+        if taken:
+            return row, token
+        row.refresh_from_db()
+    return row, None
+
+
+def finish(row, token, response):
+    """
+    پاسخ را برای retryها ثبت می‌کند (یا کلید را آزاد می‌کند). خروجی False یعنی کلید دیگر مال ما نیست.
+    """
+    mine = IdempotencyKey.objects.filter(id=row.id, token=token)
+    if response.status_code >= 500 or response.status_code in TRANSIENT_STATUSES:
+        return bool(mine.delete()[0])
+    return bool(mine.update(
+        status="done", locked_until=None, response_status=response.status_code,
+        response_body=getattr(response, "data", None),
+    ))
+
+
+def idempotent(scope, atomic=False):
+    """
+    decorator برای متد post در APIView.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            key = request.headers.get(HEADER)
+            if key is None:
+                return method(self, request, *args, **kwargs)
+            if not key or len(key) > IdempotencyKey._meta.get_field("key").max_length:
+                return Response({"detail": f"{HEADER} must be 1-255 characters."},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+            digest = fingerprint(request)
+            row, token = claim(scope, owner_of(request), key, digest)
+            if token is None:
+                if row.fingerprint != digest:
+                    return conflict(f"{HEADER} was already used with a different request.",
+                                    status.HTTP_422_UNPROCESSABLE_ENTITY)
+                if row.status == "done":
+                    return replay(row)
+                return conflict("A request with this Idempotency-Key is still in progress, retry.")
+
+            try:
+                if not atomic:
+                    response = method(self, request, *args, **kwargs)
+                    finish(row, token, response)
+                    return response
+                with transaction.atomic():
+                    response = method(self, request, *args, **kwargs)
+                    if not finish(row, token, response):
+                        raise KeyLost
+                return response
+            except KeyLost:
+                return conflict("A request with this Idempotency-Key is still in progress, retry.")
+            except BaseException:
+                IdempotencyKey.objects.filter(id=row.id, token=token).delete()
+                raise
+        return wrapper
+    return decorator
+
+
+def purge_expired(batch_size=1000, now=None):
+    """
+    یک دسته کلید منقضی را پاک می‌کند (manage.py purge_idempotency_keys). خروجی: تعداد.
+    """
+    now = now or timezone.now()
+    ids = list(IdempotencyKey.objects.filter(expires_at__lte=now).values_list("id", flat=True)[:batch_size])
+    if not ids:
+        return 0
+    # claim زنده پاک نمی‌شود (اگر TTL از LEASE_SECONDS کوتاه‌تر باشد)
+    return IdempotencyKey.objects.filter(id__in=ids).exclude(status="processing", locked_until__gt=now).delete()[0]
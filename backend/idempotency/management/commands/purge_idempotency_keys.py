@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from idempotency.keys import purge_expired
+
+
+class Command(BaseCommand):
+    help = "Delete Idempotency-Key records older than IDEMPOTENCY['TTL']."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--loop", action="store_true", help="Keep purging in the background.")
+        parser.add_argument("--interval", type=float, default=300.0, help="Seconds between sweeps with --loop.")
+
+    def handle(self, *args, **options):
+        while True:
+            purged = 0
+            while True:
+                n = purge_expired(batch_size=options["batch_size"])
+                purged += n
+                if n < options["batch_size"]:
+                    break
+
+            if purged or not options["loop"]:
+                self.stdout.write(f"Purged {purged} expired idempotency key(s).")
+            if not options["loop"]:
+                return
+            time.sleep(options["interval"])
@@ -0,0 +1,39 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+
+
+class IdempotencyKey(models.Model):
+    """
+    نتیجه‌ی یک درخواست POST با هدر Idempotency-Key (idempotency/keys.py).
+    processing: درخواست اصلی در جریان است (تا locked_until)؛ done: پاسخ ذخیره شده برای retryها.
+    """
+    STATUS_CHOICES = [
+        ("processing", "Processing"),
+        ("done", "Done"),
+    ]
+
+    scope = models.CharField(max_length=64)  # مثلاً orders.create
+    owner = models.CharField(max_length=64, blank=True, default="")  # id کاربر؛ guest:<hash IP و User-Agent> برای مهمان
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)  # sha256 مسیر و بدنه‌ی درخواست
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default="processing")
+
+    token = models.CharField(max_length=32)  # هر claim یک token؛ فقط صاحب آن نتیجه را ثبت می‌کند
+    locked_until = models.DateTimeField(null=True, blank=True)
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["scope", "owner", "key"], name="idempotency_key_unique"),
+        ]
+        indexes = [
+            # purge_idempotency_keys
+            models.Index(fields=["expires_at"], name="idempotency_expires_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.scope} {self.key} ({self.status})"
@@ -0,0 +1,110 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from catalog.models import Brand, Category, Inventory, Product, Variant
+from orders.models import Order
+from payments.models import PaymentTransaction
+from .models import IdempotencyKey
+
+
+class IdempotencyKeyTests(TestCase):
+    def setUp(self):
+        cache.clear()  # سطل‌های throttle checkout
+        self.addCleanup(cache.clear)
+        category = Category.objects.create(title="Shoes", slug="shoes")
+        brand = Brand.objects.create(title="Acme", slug="acme")
+        product = Product.objects.create(title="Runner", slug="runner", category=category, brand=brand)
+        self.variant = Variant.objects.create(product=product, sku="RUN-42", size="42", color="black", price=1000)
+        Inventory.objects.create(variant=self.variant, quantity=10)
+        self.client = APIClient()
+
+    def checkout(self, key, qty=2):
+        return self.client.post("/api/orders/", {"items": [{"variantId": self.variant.id, "qty": qty}]},
+                                format="json", HTTP_IDEMPOTENCY_KEY=key)
+
+    def held(self):
+        return Inventory.objects.get(variant=self.variant).reserved
+
+    def test_retried_checkout_replays_the_first_response(self):
+        first = self.checkout("k-1")
+        self.assertEqual(first.status_code, 201)
+        with self.assertNumQueries(1):  # فقط SELECT کلید
+            retry = self.checkout("k-1")
+        self.assertEqual((retry.status_code, retry.json()), (201, first.json()))
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual((Order.objects.count(), self.held()), (1, 2))
+
+        self.assertEqual(self.checkout("k-1", qty=3).status_code, 422)
+        self.assertEqual(self.checkout("k-2").status_code, 201)  # کلید دیگر: سفارش دیگر
+        self.assertEqual(self.client.post("/api/orders/", {"items": []}, format="json").status_code, 400)
+        self.assertEqual(Order.objects.count(), 2)
+
+    def test_checkout_errors_are_replayed_too(self):
+        self.assertEqual(self.checkout("k-1", qty=50).status_code, 400)
+        Inventory.objects.filter(variant=self.variant).update(quantity=100)
+        # همان درخواست همان پاسخ را می‌گیرد؛ سبد تازه کلید تازه می‌خواهد
+        self.assertEqual(self.checkout("k-1", qty=50).status_code, 400)
+        self.assertEqual(Order.objects.count(), 0)
+
+    def test_in_flight_duplicate_conflicts_at_once_and_dead_claims_are_taken_over(self):
+        self.checkout("k-1")
+        row = IdempotencyKey.objects.get()
+        # مثل درخواست اصلی که هنوز در جریان است
+        IdempotencyKey.objects.filter(id=row.id).update(
+            status="processing", locked_until=timezone.now() + timedelta(seconds=30), response_body=None,
+        )
+        with self.assertNumQueries(1):  # بدون poll؛ slot همزمانی checkout فوراً آزاد می‌شود
+            r = self.checkout("k-1")
+        self.assertEqual((r.status_code, r["Retry-After"]), (409, "1"))
+
+        # پروسه‌ی اصلی مرده و lease تمام شده: retry کار را انجام می‌دهد
+        IdempotencyKey.objects.filter(id=row.id).update(locked_until=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(self.checkout("k-1").status_code, 201)
+        self.assertEqual(IdempotencyKey.objects.get().status, "done")
+
+    def test_guest_keys_are_scoped_to_the_client(self):
+        first = self.checkout("k-1")
+        # مهمان دیگر (IP یا User-Agent دیگر) با همان کلید: سفارش خودش، نه 422 یا پاسخ مهمان اول
+        other_ip = self.client.post("/api/orders/", {"items": [{"variantId": self.variant.id, "qty": 3}]},
+                                    format="json", HTTP_IDEMPOTENCY_KEY="k-1", REMOTE_ADDR="203.0.113.7")
+        other_agent = self.client.post("/api/orders/", {"items": [{"variantId": self.variant.id, "qty": 2}]},
+                                       format="json", HTTP_IDEMPOTENCY_KEY="k-1", HTTP_USER_AGENT="phone")
+        self.assertEqual((first.status_code, other_ip.status_code, other_agent.status_code), (201, 201, 201))
+        self.assertNotIn("Idempotent-Replayed", other_agent)
+        self.assertEqual(len({first.json()["order_id"], other_ip.json()["order_id"], other_agent.json()["order_id"]}), 3)
+        # retry همان مهمان همچنان پاسخ خودش را می‌گیرد
+        self.assertEqual(self.checkout("k-1").json(), first.json())
+        self.assertEqual(IdempotencyKey.objects.count(), 3)
+
+        user = User.objects.create_user("buyer", password="x")
+        self.client.force_authenticate(user)
+        self.assertEqual(self.checkout("k-1").status_code, 201)
+        self.assertEqual(Order.objects.count(), 4)
+
+    def test_payment_initiation_and_purge(self):
+        order_id = self.checkout("k-1").json()["order_id"]
+        first = self.client.post("/api/payments/initiate/", {"order_id": order_id}, format="json",
+                                 HTTP_IDEMPOTENCY_KEY="p-1")
+        retry = self.client.post("/api/payments/initiate/", {"order_id": order_id}, format="json",
+                                 HTTP_IDEMPOTENCY_KEY="p-1")
+        self.assertEqual((first.status_code, retry.status_code), (201, 201))
+        self.assertEqual(retry.json()["transaction_id"], first.json()["transaction_id"])
+        self.assertEqual(PaymentTransaction.objects.count(), 1)
+
+        # خطای validation کلید را نگه نمی‌دارد
+        r = self.client.post("/api/payments/initiate/", {}, format="json", HTTP_IDEMPOTENCY_KEY="p-2")
+        self.assertEqual(r.status_code, 400)
+        self.assertFalse(IdempotencyKey.objects.filter(key="p-2").exists())
+
+        IdempotencyKey.objects.filter(key="k-1").update(expires_at=timezone.now())
+        out = StringIO()
+        call_command("purge_idempotency_keys", stdout=out)
+        self.assertIn("Purged 1 expired idempotency key(s).", out.getvalue())
+        self.assertEqual(list(IdempotencyKey.objects.values_list("key", flat=True)), ["p-1"])
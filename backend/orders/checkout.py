@@ -0,0 +1,152 @@
+from django.db.models import Case, F, Q, When
+from django.utils import timezone
+
+from catalog.models import Variant, Inventory
+from catalog.signals import stock_changed
+from .models import Order, OrderItem, StockReservation
+from .reservations import hold_expiry
+
+
+class CheckoutError(Exception):
+    """
+    خطای checkout؛ payload همان بدنه‌ی پاسخ 400 است.
+    """
+    def __init__(self, payload):
+        super().__init__(payload.get("detail", ""))
+        self.payload = payload
+
+
+def merge_lines(items):
+    """
+    آیتم‌های سبد را validate و خطوط تکراری variantId را ادغام می‌کند.
+    خروجی: dict {variant_id: qty} به ترتیب اولین حضور در سبد.
+    """
+    if not isinstance(items, list) or len(items) == 0:
+        raise CheckoutError({"detail": "Cart is empty."})
+
+    lines = {}
+    for i in items:
+        variant_id = i.get("variantId") if isinstance(i, dict) else None
+        qty = i.get("qty") if isinstance(i, dict) else None
+
+        if not isinstance(variant_id, int) or not isinstance(qty, int) or qty < 1:
+            raise CheckoutError(
+                {"detail": "Invalid items format. Each item needs variantId(int) and qty(int>=1)."}
+            )
+        lines[variant_id] = lines.get(variant_id, 0) + qty
+
+    return lines
+
+
+def _not_enough(variant, available, qty):
+    return CheckoutError({
+        "detail": "Not enough stock.",
+        "sku": variant.sku,
+        "available": available,
+        "requested": qty,
+    })
+
+
+def place_order(user, items):
+    """
+    کل سبد را در یک پاس ثبت می‌کند؛ تعداد کوئری‌ها به تعداد خطوط بستگی ندارد:
+      1) خواندن همه‌ی Variantها
+      2) قفل همه‌ی Inventoryها به ترتیب id (جلوگیری از deadlock بین سبدهای همزمان)
+      3) یک UPDATE شرطی برای رزرو موجودی (Inventory.reserved)
+      4) ساخت Order و bulk_create آیتم‌ها و holdها
+    موجودی تا پرداخت فقط hold می‌شود؛ کسر نهایی در orders/reservations.py است.
+    باید داخل transaction.atomic صدا زده شود؛ در صورت CheckoutError فراخواننده rollback می‌کند.
+    """
+    lines = merge_lines(items)
+    ids = list(lines)
+
+    variants = {
+        v.id: v
+        for v in (
+            Variant.objects
+            .select_related("product")
+            .filter(id__in=ids, is_active=True, product__is_active=True)
+            .only("id", "sku", "size", "color", "price", "product__title")
+        )
+    }
+    for variant_id in ids:
+        if variant_id not in variants:
+            raise CheckoutError({"detail": f"Variant {variant_id} not found/active."})
+
+    inventories = {
+        inv.variant_id: inv
+        for inv in (
+            Inventory.objects
+            .select_for_update()
+            .filter(variant_id__in=ids)
+            .order_by("id")
+            .only("id", "variant_id", "quantity", "reserved")
+        )
+    }
+
+    for variant_id, qty in lines.items():
+        inv = inventories.get(variant_id)
+        if inv is None:
+            raise CheckoutError({"detail": f"Inventory for variant {variant_id} not found."})
+        if inv.available < qty:
+            raise _not_enough(variants[variant_id], inv.available, qty)
+
+    # رزرو موجودی با یک UPDATE؛ شرط available >= qty روی هر ردیف دوباره چک می‌شود
+    guard = Q()
+    for variant_id, qty in lines.items():
+        guard |= Q(variant_id=variant_id, quantity__gte=F("reserved") + qty)
+    stamp = timezone.now()
+    updated = (
+        Inventory.objects
+        .filter(guard)
+        .update(
+            reserved=Case(
+                *[When(variant_id=variant_id, then=F("reserved") + qty) for variant_id, qty in lines.items()],
+                default=F("reserved"),
+            ),
+            updated_at=stamp,
+        )
+    )
+    if updated != len(lines):
+        # بدون row-lock (مثلاً SQLite) ممکن است سبد دیگری زودتر برداشته باشد.
+        # ردیف‌هایی که updated_at آنها stamp ما نیست همان خطوط کم‌موجودی‌اند (فراخواننده rollback می‌کند)
+        for variant_id, free, changed_at in (
+            Inventory.objects
+            .filter(variant_id__in=ids)
+            .annotate(free=F("quantity") - F("reserved"))
+            .values_list("variant_id", "free", "updated_at")
+        ):
+            if changed_at != stamp:
+                raise _not_enough(variants[variant_id], max(free, 0), lines[variant_id])
+        raise CheckoutError({"detail": "Not enough stock."})
+    stock_changed.send(sender=Inventory, variant_ids=ids)
+
+    total = 0
+    snapshots = []
+    for variant_id, qty in lines.items():
+        variant = variants[variant_id]
+        line_total = variant.price * qty
+        total += line_total
+        snapshots.append(OrderItem(
+            variant_id=variant.id,
+            sku=variant.sku,
+            title=variant.product.title,
+            size=variant.size,
+            color=variant.color,
+            unit_price=variant.price,
+            quantity=qty,
+            line_total=line_total,
+        ))
+
+    order = Order.objects.create(user=user, status="pending", total_amount=total)
+    for item in snapshots:
+        item.order = order
+    OrderItem.objects.bulk_create(snapshots)
+
+    expires_at = hold_expiry()
+    StockReservation.objects.bulk_create([
+        StockReservation(order=order, variant_id=variant_id, quantity=qty, expires_at=expires_at)
+        for variant_id, qty in lines.items()
+    ])
+
+    return order
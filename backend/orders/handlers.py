@@ -0,0 +1,22 @@
+"""
+handlerهای outbox برای رویدادهای سفارش (worker: run_outbox).
+"""
+from django.conf import settings
+from django.core.mail import send_mail
+
+from outbox.events import handler
+from .models import Order
+
+
+@handler("order.paid")
+def send_confirmation(payload, event):
+    order = Order.objects.select_related("user").filter(id=payload["order_id"]).first()
+    email = order and order.user and order.user.email
+    if not email:
+        return
+    send_mail(
+        subject=f"Order #{order.id} confirmed",
+        message=f"Payment received (ref {payload.get('ref_id', '')}). Total: {order.total_amount}.",
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        recipient_list=[email],
+    )
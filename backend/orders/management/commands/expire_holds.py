@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from orders.reservations import release_expired
+
+
+class Command(BaseCommand):
+    help = "Release expired stock holds and cancel their pending orders."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--loop", action="store_true", help="Keep sweeping in the background.")
+        parser.add_argument("--interval", type=float, default=30.0, help="Seconds between sweeps with --loop.")
+
+    def handle(self, *args, **options):
+        while True:
+            released = 0
+            while True:
+                n = release_expired(batch_size=options["batch_size"])
+                released += n
+                if n < options["batch_size"]:
+                    break
+
+            if released or not options["loop"]:
+                self.stdout.write(f"Released holds of {released} expired order(s).")
+            if not options["loop"]:
+                return
+            time.sleep(options["interval"])
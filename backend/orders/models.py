@@ -18,6 +18,15 @@ class Order(models.Model):
     total_amount = models.PositiveIntegerField(default=0)
 
     created_at = models.DateTimeField(auto_now_add=True)
+    paid_at = models.DateTimeField(null=True, blank=True)  # زمان تسویه؛ روز فروش در analytics
+
+    class Meta:
+        indexes = [
+            # /orders/my/: WHERE user_id = ? ORDER BY id DESC (keyset)
+            models.Index(fields=["user", "id"], name="order_user_id_idx"),
+            # catch-up analytics: WHERE status='paid' AND paid_at >= ?
+            models.Index(fields=["status", "paid_at"], name="order_status_paid_at_idx"),
+        ]
 
     def __str__(self):
         return f"Order#{self.id} ({self.status})"
@@ -39,3 +48,31 @@ class OrderItem(models.Model):
 
     def __str__(self):
         return f"Item({self.sku}) x{self.quantity}"
+
+
+class StockReservation(models.Model):
+    """
+    hold موجودی برای یک سفارش pending؛ تا پرداخت موفق یا انقضا.
+    """
+    STATUS_CHOICES = [
+        ("active", "Active"),
+        ("committed", "Committed"),
+        ("released", "Released"),
+    ]
+
+    order = models.ForeignKey(Order, related_name="reservations", on_delete=models.CASCADE)
+    variant = models.ForeignKey("catalog.Variant", related_name="reservations", on_delete=models.CASCADE)
+    quantity = models.PositiveIntegerField()
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default="active")
+
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = [("order", "variant")]
+        indexes = [
+            models.Index(fields=["status", "expires_at"]),
+        ]
+
+    def __str__(self):
+        return f"Hold(order={self.order_id}, variant={self.variant_id}) x{self.quantity} {self.status}"
@@ -0,0 +1,8 @@
+from catalog.pagination import KeysetPagination
+
+
+class OrderPagination(KeysetPagination):
+    # index (user_id, id)
+    ordering = ("-id",)
+    page_size = 20
+    max_page_size = 50
@@ -0,0 +1,104 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, When
+from django.utils import timezone
+
+from catalog.models import Inventory
+from catalog.signals import stock_changed
+from .models import Order, StockReservation
+
+
+def hold_expiry():
+    return timezone.now() + settings.STOCK_HOLD_TTL
+
+
+def _apply(totals, commit):
+    """
+    یک UPDATE برای همه‌ی variantها: reserved -= qty و در صورت commit، quantity -= qty.
+    ردیف‌ها قبلاً به ترتیب id قفل شده‌اند.
+    """
+    if not totals:
+        return
+    reserved = Case(
+        *[When(variant_id=variant_id, then=F("reserved") - qty) for variant_id, qty in totals.items()],
+        default=F("reserved"),
+    )
+    changes = {"reserved": reserved, "updated_at": timezone.now()}
+    if commit:
+        changes["quantity"] = Case(
+            *[When(variant_id=variant_id, then=F("quantity") - qty) for variant_id, qty in totals.items()],
+            default=F("quantity"),
+        )
+    Inventory.objects.filter(variant_id__in=list(totals)).update(**changes)
+    stock_changed.send(sender=Inventory, variant_ids=list(totals))
+
+
+def _settle(order_ids, new_status):
+    """
+    holdهای active سفارش‌ها را commit یا release می‌کند.
+    """
+    holds = list(
+        StockReservation.objects
+        .filter(order_id__in=order_ids, status="active")
+        .values_list("id", "variant_id", "quantity")
+    )
+    if not holds:
+        return
+
+    totals = defaultdict(int)
+    for _, variant_id, qty in holds:
+        totals[variant_id] += qty
+
+    # ترتیب قفل همان ترتیب checkout است (Inventory.id)
+    list(
+        Inventory.objects
+        .select_for_update()
+        .filter(variant_id__in=list(totals))
+        .order_by("id")
+        .values_list("id", flat=True)
+    )
+    _apply(totals, commit=(new_status == "committed"))
+
+    StockReservation.objects.filter(id__in=[h[0] for h in holds]).update(status=new_status)
+
+
+@transaction.atomic
+def commit_holds(order):
+    """
+    پرداخت موفق: holdها به کسر دائمی موجودی تبدیل می‌شوند.
+    """
+    _settle([order.id], "committed")
+
+
+@transaction.atomic
+def release_expired(batch_size=500, now=None):
+    """
+    holdهای منقضی را به صورت دسته‌ای آزاد می‌کند و سفارش‌های pending مربوط را canceled می‌کند.
+    خروجی: تعداد سفارش‌هایی که holdشان آزاد شد.
+    """
+    now = now or timezone.now()
+    candidate_ids = list(
+        StockReservation.objects
+        .filter(status="active", expires_at__lte=now, order__status="pending")
+        .order_by("order_id")
+        .values_list("order_id", flat=True)
+        .distinct()[:batch_size]
+    )
+    if not candidate_ids:
+        return 0
+
+    # قفل سفارش‌ها تا پرداخت همزمان و sweeper با هم تداخل نکنند
+    order_ids = list(
+        Order.objects
+        .select_for_update()
+        .filter(id__in=candidate_ids, status="pending")
+        .order_by("id")
+        .values_list("id", flat=True)
+    )
+
+    # سفارشی که بین دو کوئری پرداخت شده دیگر pending نیست و holdش دست نمی‌خورد
+    _settle(order_ids, "released")
+    Order.objects.filter(id__in=order_ids).update(status="canceled")
+    return len(order_ids)
@@ -1,4 +1,9 @@
+from django.db.models import Count, IntegerField, OuterRef, Prefetch, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
 from rest_framework import serializers
+
+from config.projection import Many, Projection
+
 from .models import Order, OrderItem
 
 
@@ -28,3 +33,80 @@ class OrderSerializer(serializers.ModelSerializer):
             "created_at",
             "items",
         ]
+
+
+class OrderSummarySerializer(serializers.ModelSerializer):
+    """
+    /orders/my/?mode=summary: بدون آیتم‌ها؛ شمارش‌ها با aggregate در SQL حساب می‌شوند.
+    """
+    item_count = serializers.IntegerField(read_only=True)
+    line_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Order
+        fields = [
+            "id",
+            "status",
+            "total_amount",
+            "created_at",
+            "item_count",
+            "line_count",
+        ]
+
+
+# مسیر سریع /orders/my/ (config/projection.py)؛ خروجی همان serializerهای بالا است - با هم تغییر کنند
+ORDER_ITEM_PROJECTION = Projection({
+    name: name for name in OrderItemReadSerializer.Meta.fields
+})
+
+_ORDER_FIELDS = {
+    "id": "id",
+    "status": "status",
+    "total_amount": "total_amount",
+    "created_at": ("created_at", serializers.DateTimeField().to_representation),
+}
+
+ORDER_PROJECTION = Projection({
+    **_ORDER_FIELDS,
+    "items": Many(OrderItem, ORDER_ITEM_PROJECTION, fk="order_id"),
+})
+
+ORDER_SUMMARY_PROJECTION = Projection({
+    **_ORDER_FIELDS,
+    "item_count": "item_count",
+    "line_count": "line_count",
+})
+
+
+def _item_aggregate(aggregate):
+    # subquery همبسته: فقط برای ردیف‌های همان صفحه اجرا می‌شود (بدون GROUP BY روی کل تاریخچه)
+    rows = (
+        OrderItem.objects
+        .filter(order=OuterRef("pk"))
+        .order_by()
+        .values("order")
+        .annotate(value=aggregate)
+        .values("value")
+    )
+    return Coalesce(Subquery(rows, output_field=IntegerField()), Value(0))
+
+
+def with_item_counts(queryset):
+    """
+    item_count و line_count برای OrderSummarySerializer و ORDER_SUMMARY_PROJECTION.
+    """
+    return queryset.annotate(item_count=_item_aggregate(Sum("quantity")), line_count=_item_aggregate(Count("id")))
+
+
+def serializer_queryset(user, summary):
+    """
+    queryset مرجع OrderSerializer/OrderSummarySerializer. /orders/my/ با projection سرو می‌شود؛ این فقط
+    برای مقایسه‌ی byte-identical (تست‌ها) و bench_serialization است.
+    """
+    queryset = Order.objects.filter(user=user).only("id", "status", "total_amount", "created_at")
+    if summary:
+        return with_item_counts(queryset)
+    items = OrderItem.objects.only(
+        "order_id", "sku", "title", "size", "color", "unit_price", "quantity", "line_total",
+    ).order_by("id")
+    return queryset.prefetch_related(Prefetch("items", queryset=items))
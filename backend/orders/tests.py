@@ -1,3 +1,197 @@
-from django.test import TestCase
+import json
+import os
+import subprocess
+import sys
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import AsyncRequestFactory, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from catalog.models import Brand, Category, Inventory, Product, Variant
+from config import throttling
+from config.renderers import FastJSONRenderer
+
+from .checkout import place_order
+from .models import Order, OrderItem, StockReservation
+from .reservations import release_expired
+from .serializers import OrderSerializer, OrderSummarySerializer, serializer_queryset
+from .views import MyOrdersAsyncView, my_order_rows, order_projection
+
+
+class MyOrdersTests(TestCase):
+    orders = 25
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("buyer", password="x")
+        other = User.objects.create_user("other", password="x")
+        for owner in (cls.user, other):
+            for n in range(cls.orders):
+                order = Order.objects.create(user=owner, status="paid", total_amount=6000)
+                OrderItem.objects.bulk_create(
+                    OrderItem(order=order, variant_id=i, sku=f"SKU-{i}", title="Runner", size="42", color="black",
+                              unit_price=1000, quantity=i, line_total=1000 * i)
+                    for i in (1, 2, 3)
+                )
+
+    def setUp(self):
+        self.token = str(AccessToken.for_user(self.user))
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.token}")
+
+    def walk(self, params, queries_per_page):
+        ids, url = [], "/api/orders/my/"
+        while url:
+            with self.assertNumQueries(queries_per_page):
+                r = self.client.get(url, params)
+            self.assertEqual(r.status_code, 200)
+            data = r.json()
+            ids += [o["id"] for o in data["results"]]
+            url, params = data["next"], None
+        return ids, data
+
+    def test_full_mode_pages_with_one_prefetch_query(self):
+        # کاربر (JWT) + صفحه‌ی سفارش‌ها + یک query آیتم‌ها، مستقل از تعداد سفارش و آیتم
+        ids, data = self.walk({"page_size": 10}, queries_per_page=3)
+        expected = list(Order.objects.filter(user=self.user).order_by("-id").values_list("id", flat=True))
+        self.assertEqual(ids, expected)
+        self.assertEqual([i["quantity"] for i in data["results"][0]["items"]], [1, 2, 3])
+
+    def test_summary_mode_aggregates_in_sql(self):
+        ids, data = self.walk({"mode": "summary"}, queries_per_page=2)
+        self.assertEqual(len(ids), self.orders)
+        row = data["results"][0]
+        self.assertNotIn("items", row)
+        self.assertEqual((row["item_count"], row["line_count"]), (6, 3))
+
+    def test_invalid_cursor_is_404(self):
+        self.assertEqual(self.client.get("/api/orders/my/", {"cursor": "not-a-cursor"}).status_code, 404)
+
+    def test_async_view_matches_sync_view(self):
+        view = async_to_sync(MyOrdersAsyncView.as_view())
+        for params in ({"page_size": 5}, {"mode": "summary", "page_size": 5}):
+            expected = self.client.get("/api/orders/my/", params).json()
+            request = AsyncRequestFactory().get("/api/orders/my/", params, headers={"Authorization": f"Bearer {self.token}"})
+            response = view(request)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(json.loads(response.content), expected)
+
+    @override_settings(TIME_ZONE="Asia/Tehran")
+    def test_projection_matches_serializers_byte_for_byte(self):
+        for summary, serializer in ((False, OrderSerializer), (True, OrderSummarySerializer)):
+            expected = JSONRenderer().render(serializer(serializer_queryset(self.user, summary).order_by("-id"), many=True).data)
+            rows = list(my_order_rows(self.user, summary).order_by("-id"))
+            self.assertEqual(FastJSONRenderer().render(order_projection(summary).serialize(rows)), expected)
+
+
+class CheckoutAdmissionTests(TestCase):
+    """
+    سبد خالی 400 می‌گیرد ولی از throttle رد شده است؛ همین برای شمردن کافی است.
+    """
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.client = APIClient()
+
+    def checkout(self):
+        return self.client.post("/api/orders/", {"items": []}, format="json")
+
+    def test_ip_bucket_allows_burst_then_429(self):
+        with self.settings(THROTTLE={**settings.THROTTLE, "SCOPES": {
+            "checkout": {"ip": {"rate": "1/min", "burst": 3}},
+        }}):
+            codes = [self.checkout().status_code for _ in range(3)]
+            r = self.checkout()
+        self.assertEqual(codes, [400, 400, 400])
+        self.assertEqual(r.status_code, 429)
+        self.assertGreaterEqual(int(r["Retry-After"]), 1)
+
+    def test_forwarded_for_does_not_open_new_buckets(self):
+        with self.settings(THROTTLE={**settings.THROTTLE, "SCOPES": {
+            "checkout": {"ip": {"rate": "1/min", "burst": 1}},
+        }}):
+            codes = [
+                self.client.post("/api/orders/", {"items": []}, format="json",
+                                 HTTP_X_FORWARDED_FOR=f"203.0.113.{i}").status_code
+                for i in range(5)
+            ]
+        self.assertEqual(codes, [400, 429, 429, 429, 429])
+
+    def test_trusted_proxy_forwarded_for_is_the_client(self):
+        rest = {**settings.REST_FRAMEWORK, "NUM_PROXIES": 1}
+        with self.settings(REST_FRAMEWORK=rest, THROTTLE={**settings.THROTTLE, "SCOPES": {
+            "checkout": {"ip": {"rate": "1/min", "burst": 1}},
+        }}):
+            codes = [
+                self.client.post("/api/orders/", {"items": []}, format="json",
+                                 HTTP_X_FORWARDED_FOR=f"spoofed, 203.0.113.{i}").status_code
+                for i in (1, 2, 1)
+            ]
+        self.assertEqual(codes, [400, 400, 429])
+
+    def test_local_throttle_cache_with_several_workers_fails_at_startup(self):
+        env = {**os.environ, "WEB_CONCURRENCY": "4", "REDIS_URL": "", "DJANGO_THROTTLE": "1"}
+        r = subprocess.run(
+            [sys.executable, "-c", "import config.settings"],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        )
+        self.assertNotEqual(r.returncode, 0)
+        self.assertIn("ImproperlyConfigured", r.stderr)
+
+    def test_full_scope_is_shed_with_503(self):
+        limit = settings.THROTTLE["SCOPES"]["checkout"]["concurrency"]
+        for _ in range(limit):
+            self.assertTrue(throttling.limiter.acquire("checkout", limit))
+        try:
+            r = self.checkout()
+        finally:
+            for _ in range(limit):
+                throttling.limiter.release("checkout")
+        self.assertEqual(r.status_code, 503)
+        self.assertEqual(r["Retry-After"], str(settings.THROTTLE["RETRY_AFTER"]))
+        self.assertEqual(self.checkout().status_code, 400)
+
+
+class StockHoldTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        category = Category.objects.create(title="Shoes", slug="shoes")
+        brand = Brand.objects.create(title="Acme", slug="acme")
+        product = Product.objects.create(title="Runner", slug="runner", category=category, brand=brand)
+        self.variants = []
+        for size, quantity in (("42", 5), ("43", 2)):
+            variant = Variant.objects.create(product=product, sku=f"RUN-{size}", size=size, color="black", price=1000)
+            Inventory.objects.create(variant=variant, quantity=quantity, reserved=1)
+            self.variants.append(variant)
+
+    def test_lost_reservation_race_reports_the_short_line(self):
+        # بررسی اولیه رد می‌شود، مثل سبدی که بین خواندن و UPDATE موجودی را برداشته
+        items = [{"variantId": self.variants[0].id, "qty": 2}, {"variantId": self.variants[1].id, "qty": 2}]
+        with mock.patch.object(Inventory, "available", 100):
+            r = APIClient().post("/api/orders/", {"items": items}, format="json")
+        self.assertEqual(r.status_code, 400)
+        self.assertEqual(r.json(), {"detail": "Not enough stock.", "sku": "RUN-43", "available": 1, "requested": 2})
+        self.assertEqual(list(Inventory.objects.order_by("id").values_list("reserved", flat=True)), [1, 1])
+        self.assertEqual(Order.objects.count(), 0)
+
+    def test_expired_holds_of_paid_orders_are_left_alone(self):
+        items = [{"variantId": self.variants[0].id, "qty": 2}]
+        paid, pending = place_order(None, items), place_order(None, items)
+        StockReservation.objects.update(expires_at=timezone.now())
+        # پرداخت بین اسکن sweeper و قفل سفارش: holdها هنوز active هستند
+        Order.objects.filter(id=paid.id).update(status="paid")
+        self.assertEqual(release_expired(), 1)
+        self.assertEqual(
+            dict(StockReservation.objects.values_list("order_id", "status")),
+            {paid.id: "active", pending.id: "released"},
+        )
+        self.assertEqual(Inventory.objects.get(variant=self.variants[0]).reserved, 3)
+        self.assertEqual(Order.objects.get(id=pending.id).status, "canceled")
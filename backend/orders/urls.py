@@ -1,7 +1,8 @@
+from django.conf import settings
 from django.urls import path
-from .views import OrderCreateAPIView, MyOrdersAPIView
+from .views import OrderCreateAPIView, MyOrdersAPIView, MyOrdersAsyncView
 
 urlpatterns = [
     path("orders/", OrderCreateAPIView.as_view()),
-    path("orders/my/", MyOrdersAPIView.as_view()),
-]
\ No newline at end of file
+    path("orders/my/", MyOrdersAsyncView.as_view() if settings.ASYNC_VIEWS else MyOrdersAPIView.as_view()),
+]
@@ -3,11 +3,13 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import AllowAny, IsAuthenticated
-from rest_framework.generics import ListAPIView
+from config.async_views import AsyncAPIView, render_json
+from idempotency.keys import idempotent
 
-from catalog.models import Variant, Inventory
-from .models import Order, OrderItem
-from .serializers import OrderSerializer  # برای /orders/my/
+from .checkout import CheckoutError, place_order
+from .models import Order
+from .pagination import OrderPagination
+from .serializers import ORDER_PROJECTION, ORDER_SUMMARY_PROJECTION, with_item_counts  # برای /orders/my/
 
 
 class OrderCreateAPIView(APIView):
@@ -21,91 +23,24 @@ class OrderCreateAPIView(APIView):
       ]
     }
 
-    نکته: قیمت از دیتابیس خوانده می‌شود و موجودی به صورت اتمیک کم می‌شود.
+    نکته: قیمت از دیتابیس خوانده می‌شود و موجودی سبد به صورت اتمیک تا STOCK_HOLD_TTL رزرو می‌شود؛
+    با پرداخت کم می‌شود و بدون پرداخت expire_holds آزادش می‌کند.
+    کل سبد در یک پاس پردازش می‌شود (orders/checkout.py).
+    با هدر Idempotency-Key، retry همان پاسخ را می‌گیرد و سفارش دوم ساخته نمی‌شود.
     """
     permission_classes = [AllowAny]
+    throttle_scope = "checkout"  # THROTTLE["SCOPES"]
 
+    @idempotent("orders.create", atomic=True)
     @transaction.atomic
     def post(self, request):
-        items = request.data.get("items", [])
-
-        if not isinstance(items, list) or len(items) == 0:
-            return Response({"detail": "Cart is empty."}, status=status.HTTP_400_BAD_REQUEST)
-
         user = request.user if request.user.is_authenticated else None
-        order = Order.objects.create(user=user, status="pending")
-
-        total = 0
-
-        for i in items:
-            variant_id = i.get("variantId")
-            qty = i.get("qty")
-
-            if not isinstance(variant_id, int) or not isinstance(qty, int) or qty < 1:
-                return Response(
-                    {"detail": "Invalid items format. Each item needs variantId(int) and qty(int>=1)."},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
-            # Variant باید فعال باشد
-            try:
-                variant = (
-                    Variant.objects
-                    .select_related("product")
-                    .get(id=variant_id, is_active=True, product__is_active=True)
-                )
-            except Variant.DoesNotExist:
-                transaction.set_rollback(True)
-                return Response(
-                    {"detail": f"Variant {variant_id} not found/active."},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
-            # Inventory را برای جلوگیری از race-condition قفل می‌کنیم
-            try:
-                inv = Inventory.objects.select_for_update().get(variant_id=variant.id)
-            except Inventory.DoesNotExist:
-                transaction.set_rollback(True)
-                return Response(
-                    {"detail": f"Inventory for variant {variant_id} not found."},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
-            if inv.quantity < qty:
-                transaction.set_rollback(True)
-                return Response(
-                    {
-                        "detail": "Not enough stock.",
-                        "sku": variant.sku,
-                        "available": inv.quantity,
-                        "requested": qty,
-                    },
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
-            # کم کردن موجودی
-            inv.quantity -= qty
-            inv.save(update_fields=["quantity"])
-
-            unit_price = variant.price
-            line_total = unit_price * qty
-            total += line_total
-
-            # Snapshot داخل OrderItem
-            OrderItem.objects.create(
-                order=order,
-                variant_id=variant.id,
-                sku=variant.sku,
-                title=variant.product.title,
-                size=variant.size,
-                color=variant.color,
-                unit_price=unit_price,
-                quantity=qty,
-                line_total=line_total,
-            )
-
-        order.total_amount = total
-        order.save(update_fields=["total_amount"])
+
+        try:
+            order = place_order(user, request.data.get("items", []))
+        except CheckoutError as e:
+            transaction.set_rollback(True)
+            return Response(e.payload, status=status.HTTP_400_BAD_REQUEST)
 
         return Response(
             {"order_id": order.id, "total": order.total_amount},
@@ -113,16 +48,46 @@ class OrderCreateAPIView(APIView):
         )
 
 
+def my_order_rows(user, summary):
+    """
+    سفارش‌های کاربر با projection (values()، آیتم‌ها با یک کوئری برای کل صفحه در serialize).
+    """
+    queryset = Order.objects.filter(user=user)
+    if summary:
+        queryset = with_item_counts(queryset)
+    return order_projection(summary).values(queryset)
+
+
+def order_projection(summary):
+    return ORDER_SUMMARY_PROJECTION if summary else ORDER_PROJECTION
+
+
+def is_summary(request):
+    return request.query_params.get("mode") == "summary"
 
 
-class MyOrdersAPIView(ListAPIView):
+class MyOrdersAPIView(APIView):
+    """
+    GET /api/orders/my/?cursor=...&page_size=...&mode=summary
+    خروجی با ORDER_PROJECTION/ORDER_SUMMARY_PROJECTION (همان شکل serializerها).
+    """
     permission_classes = [IsAuthenticated]
-    serializer_class = OrderSerializer
-
-    def get_queryset(self):
-        return (
-            Order.objects
-            .filter(user=self.request.user)
-            .prefetch_related("items")
-            .order_by("-id")
-        )
\ No newline at end of file
+
+    def get(self, request):
+        summary = is_summary(request)
+        paginator = OrderPagination()
+        rows = paginator.paginate_queryset(my_order_rows(request.user, summary), request, view=self)
+        return paginator.get_paginated_response(order_projection(summary).serialize(rows))
+
+
+class MyOrdersAsyncView(AsyncAPIView):
+    """
+    همان MyOrdersAPIView با ORM async (زیر ASGI).
+    """
+    authentication_required = True
+
+    async def get(self, request):
+        summary = is_summary(request)
+        paginator = OrderPagination()
+        rows = await paginator.apaginate_queryset(my_order_rows(request.user, summary), request)
+        return render_json(paginator.get_paginated_data(await order_projection(summary).aserialize(rows)))
@@ -0,0 +1,17 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import OutboxEvent
+
+
+@admin.register(OutboxEvent)
+class OutboxEventAdmin(admin.ModelAdmin):
+    list_display = ("id", "topic", "handler", "status", "attempts", "available_at", "created_at", "processed_at")
+    list_filter = ("status", "topic")
+    readonly_fields = ("locked_by", "locked_until", "last_error", "created_at", "processed_at")
+    actions = ["requeue"]
+
+    @admin.action(description="Requeue selected dead events")
+    def requeue(self, request, queryset):
+        n = queryset.filter(status="dead").update(status="pending", attempts=0, available_at=timezone.now())
+        self.message_user(request, f"{n} event(s) requeued.")
@@ -0,0 +1,43 @@
+"""
+outbox تراکنشی: side effectهای بعد از تغییر وضعیت (ایمیل، analytics، ...) به جای اجرا داخل
+درخواست، در همان transaction به صورت ردیف OutboxEvent ثبت می‌شوند؛ با rollback از بین می‌روند
+و با commit حتماً (دست‌کم یک بار) اجرا می‌شوند.
+
+    @handler("order.paid")
+    def send_confirmation(payload, event): ...
+
+    publish("order.paid", {"order_id": order.id})   # داخل transaction.atomic
+
+برای هر handler یک ردیف جدا ساخته می‌شود تا retry یکی، بقیه را دوباره اجرا نکند.
+handlerها باید idempotent باشند (event.id برای dedup).
+"""
+from .models import OutboxEvent
+
+_handlers = {}  # topic -> {name: func}
+
+
+def handler_name(func):
+    return f"{func.__module__}.{func.__qualname__}"
+
+
+def handler(topic):
+    """
+    ثبت handler برای topic؛ ماژول handlerها باید در AppConfig.ready import شود.
+    """
+    def register(func):
+        _handlers.setdefault(topic, {})[handler_name(func)] = func
+        return func
+    return register
+
+
+def get_handler(topic, name):
+    return _handlers.get(topic, {}).get(name)
+
+
+def publish(topic, payload):
+    """
+    payload باید JSON-serializable باشد. خروجی: ردیف‌های ساخته‌شده.
+    """
+    return OutboxEvent.objects.bulk_create(
+        OutboxEvent(topic=topic, handler=name, payload=payload) for name in _handlers.get(topic, {})
+    )
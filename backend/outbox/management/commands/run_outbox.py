@@ -0,0 +1,65 @@
+import signal
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from outbox.worker import purge_done, queue_stats, run_batch
+
+
+class Command(BaseCommand):
+    help = (
+        "Run outbox handlers. Without --loop it drains the queue once and exits; with --loop it keeps "
+        "polling and prints queue depth and lag every --metrics-interval seconds. "
+        "Several workers can run side by side."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None, help="Defaults to OUTBOX['BATCH_SIZE'].")
+        parser.add_argument("--lease", type=float, default=None, help="Seconds; defaults to OUTBOX['LEASE_SECONDS'].")
+        parser.add_argument("--loop", action="store_true", help="Keep polling in the background.")
+        parser.add_argument("--interval", type=float, default=1.0, help="Seconds to sleep when the queue is empty.")
+        parser.add_argument("--metrics-interval", type=float, default=60.0)
+        parser.add_argument("--purge-days", type=float, default=7.0, help="Delete done events older than this.")
+
+    def handle(self, *args, **options):
+        self.stopping = False
+        if options["loop"]:
+            # batch جاری تمام می‌شود، بعد خروج
+            for sig in (signal.SIGTERM, signal.SIGINT):
+                signal.signal(sig, self.stop)
+
+        totals = {"done": 0, "retry": 0, "dead": 0, "lost": 0}
+        next_metrics = time.monotonic() + options["metrics_interval"]
+        while not self.stopping:
+            counts = run_batch(options["batch_size"], options["lease"])
+            for key, n in counts.items():
+                totals[key] += n
+            handled = sum(counts.values())
+
+            if not options["loop"]:
+                if handled:
+                    continue
+                break
+
+            close_old_connections()
+            if time.monotonic() >= next_metrics:
+                self.report(totals)
+                purge_done(timedelta(days=options["purge_days"]))
+                next_metrics = time.monotonic() + options["metrics_interval"]
+            if not handled:
+                time.sleep(options["interval"])
+        self.report(totals)
+
+    def report(self, totals):
+        stats = queue_stats()
+        depth = " ".join(f"{status}={n}" for status, n in stats["depth"].items())
+        self.stdout.write(
+            f"outbox done={totals['done']} retried={totals['retry']} dead={totals['dead']} "
+            f"lost={totals['lost']} | "
+            f"depth {depth} | lag {stats['lag_seconds']:.1f}s"
+        )
+
+    def stop(self, *args):
+        self.stopping = True
@@ -0,0 +1,40 @@
+from django.db import models
+from django.utils import timezone
+
+
+class OutboxEvent(models.Model):
+    """
+    یک کار پس از commit برای یک handler؛ در همان transaction تغییر وضعیت ثبت می‌شود
+    و worker (run_outbox) آن را اجرا می‌کند.
+    """
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("processing", "Processing"),
+        ("done", "Done"),
+        ("dead", "Dead"),
+    ]
+
+    topic = models.CharField(max_length=64)
+    handler = models.CharField(max_length=200)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default="pending")
+
+    attempts = models.PositiveIntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now)  # retry بعدی
+    locked_by = models.CharField(max_length=64, blank=True, default="")
+    locked_until = models.DateTimeField(null=True, blank=True)  # lease worker
+    last_error = models.TextField(blank=True, default="")
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # claim: WHERE status='pending' AND available_at <= now ORDER BY id
+            models.Index(fields=["status", "available_at"], name="outbox_claim_idx"),
+            # leaseهای منقضی workerهای مرده
+            models.Index(fields=["status", "locked_until"], name="outbox_lease_idx"),
+        ]
+
+    def __str__(self):
+        return f"Event#{self.id} {self.topic} -> {self.handler} ({self.status})"
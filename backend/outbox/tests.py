@@ -0,0 +1,106 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .events import handler, publish
+from .models import OutboxEvent
+from .worker import claim, dispatch, purge_done, run_batch
+
+calls = []
+
+
+@handler("test.outbox")
+def record(payload, event):
+    calls.append(payload["n"])
+    if payload.get("fail"):
+        raise RuntimeError("boom")
+
+
+@override_settings(OUTBOX={"BATCH_SIZE": 100, "LEASE_SECONDS": 60, "MAX_ATTEMPTS": 3, "RETRY_BACKOFF": 10,
+                           "RETRY_BACKOFF_MAX": 3600})
+class OutboxWorkerTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_events_run_once_in_order(self):
+        for n in range(3):
+            publish("test.outbox", {"n": n})
+        self.assertEqual(run_batch(), {"done": 3, "retry": 0, "dead": 0, "lost": 0})
+        self.assertEqual(run_batch(), {"done": 0, "retry": 0, "dead": 0, "lost": 0})
+        self.assertEqual(calls, [0, 1, 2])
+        self.assertTrue(all(e.processed_at for e in OutboxEvent.objects.all()))
+
+    def test_claimed_events_are_leased_until_expiry(self):
+        publish("test.outbox", {"n": 1})
+        token, events = claim()
+        self.assertEqual(len(events), 1)
+        self.assertEqual(claim()[1], [])  # lease هنوز معتبر است
+
+        # worker اول مرده: بعد از locked_until رویداد دوباره claim می‌شود
+        OutboxEvent.objects.update(locked_until=timezone.now() - timedelta(seconds=1))
+        new_token, again = claim()
+        self.assertEqual((again[0].id, again[0].attempts), (events[0].id, 2))
+        self.assertEqual(dispatch(events[0], token), "lost")  # نتیجه‌ی worker قدیمی ثبت نمی‌شود
+        self.assertEqual(dispatch(again[0], new_token), "done")
+
+    def test_failures_back_off_then_go_dead(self):
+        publish("test.outbox", {"n": 1, "fail": True})
+        before = timezone.now()
+        self.assertEqual(run_batch()["retry"], 1)
+        event = OutboxEvent.objects.get()
+        self.assertEqual((event.status, event.attempts), ("pending", 1))
+        self.assertIn("RuntimeError: boom", event.last_error)
+        # backoff با jitter: بین نصف و کل RETRY_BACKOFF
+        self.assertGreaterEqual(event.available_at, before + timedelta(seconds=5))
+        self.assertLessEqual(event.available_at, timezone.now() + timedelta(seconds=10))
+        self.assertEqual(run_batch()["retry"], 0)  # هنوز موعدش نرسیده
+
+        for expected in ("retry", "dead"):
+            OutboxEvent.objects.update(available_at=timezone.now())
+            self.assertEqual(run_batch()[expected], 1)
+        event.refresh_from_db()
+        self.assertEqual((event.status, event.attempts), ("dead", 3))
+        self.assertEqual(calls, [1, 1, 1])
+
+    def test_unknown_handler_is_dead(self):
+        OutboxEvent.objects.create(topic="test.outbox", handler="outbox.tests.missing")
+        self.assertEqual(run_batch()["dead"], 1)
+        self.assertIn("No handler registered", OutboxEvent.objects.get().last_error)
+
+    def test_admin_requeues_dead_events(self):
+        publish("test.outbox", {"n": 1})
+        OutboxEvent.objects.update(status="dead", attempts=3)
+        done = OutboxEvent.objects.create(topic="test.outbox", handler="x", status="done")
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "x"))
+        self.client.post("/admin/outbox/outboxevent/", {
+            "action": "requeue", "_selected_action": list(OutboxEvent.objects.values_list("id", flat=True)),
+        })
+        self.assertEqual(
+            dict(OutboxEvent.objects.values_list("id", "status")),
+            {done.id: "done", OutboxEvent.objects.exclude(id=done.id).get().id: "pending"},
+        )
+        self.assertEqual(run_batch()["done"], 1)
+
+    def test_purge_done_keeps_recent_and_unfinished_events(self):
+        now = timezone.now()
+        old = OutboxEvent.objects.create(topic="t", handler="h", status="done", processed_at=now - timedelta(days=8))
+        OutboxEvent.objects.create(topic="t", handler="h", status="done", processed_at=now)
+        OutboxEvent.objects.create(topic="t", handler="h", status="dead", processed_at=now - timedelta(days=8))
+        self.assertEqual(purge_done(timedelta(days=7)), 1)
+        self.assertFalse(OutboxEvent.objects.filter(id=old.id).exists())
+        self.assertEqual(OutboxEvent.objects.count(), 2)
+
+    def test_queue_endpoint_is_staff_only(self):
+        client = APIClient()
+        self.assertIn(client.get("/api/health/outbox/").status_code, (401, 403))
+        client.force_authenticate(User.objects.create_user("staff", password="x", is_staff=True))
+        r = client.get("/api/health/outbox/")
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(set(r.json()), {"depth", "lag_seconds"})
+        with self.settings(MONITORING_TOKEN="s3cret"):
+            self.assertEqual(APIClient().get("/api/health/outbox/", HTTP_AUTHORIZATION="Token s3cret").status_code, 200)
+            self.assertIn(APIClient().get("/api/health/outbox/", HTTP_AUTHORIZATION="Token nope").status_code,
+                          (401, 403))
@@ -0,0 +1,126 @@
+"""
+worker outbox: claim دسته‌ای رویدادها با lease و اجرای handlerها بیرون از transaction claim.
+
+claim روی PostgreSQL با SELECT ... FOR UPDATE SKIP LOCKED انجام می‌شود تا workerهای همزمان
+روی ردیف‌های هم منتظر نمانند؛ روی SQLite (بدون قفل ردیفی) همان UPDATE شرطی با token کافی است.
+رویدادی که workerش مرده بعد از locked_until دوباره قابل claim است (at-least-once).
+خطای handler تا OUTBOX["MAX_ATTEMPTS"] با backoff نمایی دوباره تلاش می‌شود و بعد dead می‌ماند.
+"""
+import logging
+import random
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Min, Q
+from django.utils import timezone
+
+from .events import get_handler
+from .models import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+
+def _conf(name):
+    return settings.OUTBOX[name]
+
+
+def _claimable(now):
+    return Q(status="pending", available_at__lte=now) | Q(status="processing", locked_until__lt=now)
+
+
+def claim(batch_size=None, lease_seconds=None):
+    """
+    خروجی: (token, رویدادهای claim شده به ترتیب id)
+    """
+    batch_size = batch_size or _conf("BATCH_SIZE")
+    lease = timedelta(seconds=lease_seconds or _conf("LEASE_SECONDS"))
+    token = uuid.uuid4().hex
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            OutboxEvent.objects
+            .select_for_update(skip_locked=True)
+            .filter(_claimable(now))
+            .order_by("id")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            return token, []
+        # شرط دوباره تکرار می‌شود: بدون قفل ردیفی فقط یک worker ردیف را برمی‌دارد
+        OutboxEvent.objects.filter(_claimable(now), id__in=ids).update(
+            status="processing", locked_by=token, locked_until=now + lease, attempts=F("attempts") + 1,
+        )
+    return token, list(OutboxEvent.objects.filter(locked_by=token, status="processing").order_by("id"))
+
+
+def _retry_delay(attempts):
+    delay = min(_conf("RETRY_BACKOFF") * 2 ** (attempts - 1), _conf("RETRY_BACKOFF_MAX"))
+    return timedelta(seconds=delay * (0.5 + random.random() / 2))
+
+
+def _finish(event, token, **fields):
+    # اگر lease منقضی شده و worker دیگری برداشته، نتیجه‌ی ما ثبت نمی‌شود
+    return OutboxEvent.objects.filter(id=event.id, locked_by=token, status="processing").update(
+        locked_by="", locked_until=None, **fields,
+    )
+
+
+def dispatch(event, token):
+    """
+    خروجی: "done"، "retry"، "dead" یا "lost" (lease به worker دیگری رسیده و نتیجه ثبت نشد)
+    """
+    func = get_handler(event.topic, event.handler)
+    if func is None:
+        _finish(event, token, status="dead", last_error=f"No handler registered: {event.handler}")
+        return "dead"
+    if event.attempts > _conf("MAX_ATTEMPTS"):
+        # lease بارها منقضی شده (مثلاً handler worker را می‌کشد)
+        _finish(event, token, status="dead", last_error=event.last_error or "Lease expired too many times.")
+        return "dead"
+
+    try:
+        with transaction.atomic():
+            func(event.payload, event)
+    except Exception:
+        error = traceback.format_exc(limit=5)
+        logger.warning("outbox event %s (%s) failed, attempt %s", event.id, event.handler, event.attempts,
+                       exc_info=True)
+        if event.attempts >= _conf("MAX_ATTEMPTS"):
+            return "dead" if _finish(event, token, status="dead", last_error=error) else "lost"
+        retry_at = timezone.now() + _retry_delay(event.attempts)
+        return "retry" if _finish(event, token, status="pending", last_error=error, available_at=retry_at) else "lost"
+
+    return "done" if _finish(event, token, status="done", processed_at=timezone.now()) else "lost"
+
+
+def run_batch(batch_size=None, lease_seconds=None):
+    """
+    خروجی: شمارش نتیجه‌ها {"done": n, "retry": n, "dead": n, "lost": n}
+    """
+    token, events = claim(batch_size, lease_seconds)
+    counts = {"done": 0, "retry": 0, "dead": 0, "lost": 0}
+    for event in events:
+        counts[dispatch(event, token)] += 1
+    return counts
+
+
+def queue_stats(now=None):
+    """
+    عمق صف به تفکیک وضعیت و lag: سن قدیمی‌ترین رویداد pending که موعدش رسیده (ثانیه).
+    """
+    now = now or timezone.now()
+    rows = OutboxEvent.objects.exclude(status="done").values("status").annotate(n=Count("id"))
+    depth = {status: 0 for status, _ in OutboxEvent.STATUS_CHOICES if status != "done"}
+    depth.update({row["status"]: row["n"] for row in rows})
+    oldest = OutboxEvent.objects.filter(status="pending", available_at__lte=now).aggregate(t=Min("created_at"))["t"]
+    return {"depth": depth, "lag_seconds": (now - oldest).total_seconds() if oldest else 0.0}
+
+
+def purge_done(older_than):
+    """
+    رویدادهای done قدیمی‌تر از older_than (timedelta) را پاک می‌کند.
+    """
+    return OutboxEvent.objects.filter(status="done", processed_at__lt=timezone.now() - older_than).delete()[0]
@@ -0,0 +1,141 @@
+"""
+درگاه جعلی محلی با پروتکل زرین‌پال v4 برای تست‌ها و bench_payment_callbacks.
+
+کندی (delay) و خطای 503 (error_rate یا fail_next) قابل تزریق است تا رفتار retry، timeout
+و tail latency را بدون درگاه واقعی بسنجیم.
+
+    with FakeGateway(delay=0.2) as fake:
+        fake.base_url        # برای OPTIONS["base_url"] درگاه zarinpal
+        fake.mark_paid(authority)   # کاربر در صفحه‌ی درگاه پرداخت کرده
+"""
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        fake = self.server.fake
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if fake.delay:
+            time.sleep(fake.delay)
+        if fake.should_fail():
+            return self.reply(503, {"data": [], "errors": {"code": -1, "message": "Service unavailable"}})
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            return self.reply(400, {"data": [], "errors": {"code": -9, "message": "Invalid JSON"}})
+
+        if self.path.endswith("/payment/request.json"):
+            return self.reply(200, fake.request(payload))
+        if self.path.endswith("/payment/verify.json"):
+            return self.reply(200, fake.verify(payload))
+        return self.reply(404, {"data": [], "errors": {"code": -404, "message": "Not found"}})
+
+    def reply(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class FakeGateway:
+    def __init__(self, host="127.0.0.1", port=0, delay=0.0, error_rate=0.0, merchant_id="fake-merchant", seed=None):
+        self.delay = delay
+        self.error_rate = error_rate
+        self.merchant_id = merchant_id
+        self.payments = {}  # authority -> {"amount", "paid", "verified", "ref_id"}
+        self.requests = 0
+        self._fail_next = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), _Handler)
+        self.server.daemon_threads = True
+        self.server.fake = self
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def start_pay_url(self):
+        return f"{self.base_url}/pg/StartPay/"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # --- کنترل از سمت تست ---
+
+    def fail_next(self, count):
+        with self._lock:
+            self._fail_next = count
+
+    def mark_paid(self, authority, paid=True):
+        with self._lock:
+            self.payments[authority]["paid"] = paid
+
+    def should_fail(self):
+        with self._lock:
+            self.requests += 1
+            if self._fail_next:
+                self._fail_next -= 1
+                return True
+            return self.error_rate and self._random.random() < self.error_rate
+
+    # --- پروتکل ---
+
+    @staticmethod
+    def error(code, message):
+        return {"data": [], "errors": {"code": code, "message": message}}
+
+    def request(self, payload):
+        if payload.get("merchant_id") != self.merchant_id:
+            return self.error(-9, "Invalid merchant_id")
+        if not isinstance(payload.get("amount"), int) or not payload.get("callback_url"):
+            return self.error(-9, "Validation error")
+        authority = "A" + uuid.uuid4().hex[:35]
+        with self._lock:
+            self.payments[authority] = {"amount": payload["amount"], "paid": False, "verified": False, "ref_id": None}
+        return {"data": {"code": 100, "message": "Success", "authority": authority, "fee_type": "Merchant", "fee": 0},
+                "errors": []}
+
+    def verify(self, payload):
+        with self._lock:
+            payment = self.payments.get(payload.get("authority"))
+            if payment is None or payload.get("merchant_id") != self.merchant_id:
+                return self.error(-9, "Validation error")
+            if payload.get("amount") != payment["amount"]:
+                return self.error(-50, "Amount mismatch")
+            if not payment["paid"]:
+                return self.error(-51, "Payment is not successful")
+            code = 101 if payment["verified"] else 100
+            if not payment["verified"]:
+                payment["verified"] = True
+                payment["ref_id"] = self._random.randint(10 ** 8, 10 ** 9)
+            return {"data": {"code": code, "message": "Verified", "ref_id": payment["ref_id"],
+                             "card_pan": "502229******5995", "fee_type": "Merchant", "fee": 0},
+                    "errors": []}
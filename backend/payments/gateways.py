@@ -0,0 +1,255 @@
+"""
+لایه‌ی درگاه پرداخت.
+
+هر درگاه initiate / verify / refund دارد و با نامش (PaymentTransaction.gateway) از registry
+(settings.PAYMENT_GATEWAYS) گرفته می‌شود. instance هر درگاه یک بار ساخته می‌شود و pool اتصال‌های
+HTTP آن (payments/http.py) بین همه‌ی درخواست‌ها مشترک است.
+averify نسخه‌ی async همان verify است تا callback زیر ASGI worker را معطل درگاه کند نه thread را.
+"""
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from .http import RETRY_STATUSES, AsyncHTTPSession, GatewayHTTPError, HTTPSession
+
+
+class GatewayError(Exception):
+    pass
+
+
+@dataclass
+class InitiateResult:
+    authority: str
+    payment_url: str
+
+
+@dataclass
+class VerifyResult:
+    ok: bool
+    ref_id: str = ""
+    detail: str = ""
+
+
+class Gateway(ABC):
+    # ثانیه؛ تراکنش initiated که بعد از این مدت authority ندارد رها شده است (payments/settlement.py)
+    initiate_timeout = 30
+
+    def __init__(self, name, **options):
+        self.name = name
+        self.options = options
+
+    @abstractmethod
+    def initiate(self, tx, callback_url):
+        """
+        تراکنش را نزد درگاه ثبت می‌کند؛ خروجی: InitiateResult
+        """
+
+    @abstractmethod
+    def payment_url(self, tx):
+        """
+        لینک صفحه‌ی پرداخت برای authority ثبت‌شده (retry کلاینت).
+        """
+
+    @abstractmethod
+    def authority_from(self, params):
+        """
+        authority از query string بازگشت از درگاه.
+        """
+
+    @abstractmethod
+    def verify(self, tx, params):
+        """
+        خروجی: VerifyResult؛ باید idempotent باشد (callback تکراری).
+        """
+
+    async def averify(self, tx, params):
+        return await sync_to_async(self.verify, thread_sensitive=False)(tx, params)
+
+    def refund(self, tx):
+        raise GatewayError(f"Gateway {self.name} does not support refunds.")
+
+
+class MockGateway(Gateway):
+    """
+    درگاه ساختگی فرانت (/pay/mock)؛ نتیجه از پارامتر status می‌آید.
+    """
+    def initiate(self, tx, callback_url):
+        authority = str(uuid.uuid4())
+        return InitiateResult(authority, f"/pay/mock?authority={authority}")
+
+    def payment_url(self, tx):
+        return f"/pay/mock?authority={tx.authority}"
+
+    def authority_from(self, params):
+        return params.get("authority", "")
+
+    def verify(self, tx, params):
+        if params.get("status", "ok") != "ok":
+            return VerifyResult(False, detail="Payment failed")
+        return VerifyResult(True, ref_id=str(uuid.uuid4())[:12])
+
+    async def averify(self, tx, params):
+        # I/O ندارد
+        return self.verify(tx, params)
+
+    def refund(self, tx):
+        pass
+
+
+class ZarinpalGateway(Gateway):
+    """
+    زرین‌پال (REST v4). OPTIONS:
+      merchant_id, base_url, start_pay_url, currency (IRR/IRT)، access_token و refund_path برای refund،
+      timeout، max_connections، retries، backoff
+    initiate بدون retry فرستاده می‌شود (ممکن است دو authority بسازد)؛ verify در درگاه idempotent است
+    (کد 101 برای تأیید تکراری) و retry می‌شود.
+    """
+    REQUEST_PATH = "/pg/v4/payment/request.json"
+    VERIFY_PATH = "/pg/v4/payment/verify.json"
+
+    def __init__(self, name, merchant_id, base_url="https://payment.zarinpal.com",
+                 start_pay_url="https://payment.zarinpal.com/pg/StartPay/", currency=None,
+                 access_token=None, refund_path="/pg/v4/payment/refund.json",
+                 timeout=10.0, max_connections=20, retries=2, backoff=0.2, description="Order {order_id}"):
+        super().__init__(name)
+        self.merchant_id = merchant_id
+        self.start_pay_url = start_pay_url
+        self.currency = currency
+        self.access_token = access_token
+        self.refund_path = refund_path
+        self.description = description
+        # انتظار برای slot اتصال + خود درخواست (initiate بدون retry)
+        self.initiate_timeout = 2 * timeout + 5
+        pool = {"timeout": timeout, "max_connections": max_connections, "retries": retries, "backoff": backoff}
+        self.session = HTTPSession(base_url, **pool)
+        self.asession = AsyncHTTPSession(base_url, **pool)
+
+    # --- payloads ---
+
+    def _request_payload(self, tx, callback_url):
+        payload = {
+            "merchant_id": self.merchant_id,
+            "amount": tx.amount,
+            "callback_url": callback_url,
+            "description": self.description.format(order_id=tx.order_id),
+            "metadata": {"order_id": str(tx.order_id)},
+        }
+        if self.currency:
+            payload["currency"] = self.currency
+        return payload
+
+    def _verify_payload(self, tx):
+        return {"merchant_id": self.merchant_id, "amount": tx.amount, "authority": tx.authority}
+
+    @staticmethod
+    def _data(status, body):
+        """
+        پاسخ v4: {"data": {...}, "errors": []} یا {"data": [], "errors": {"code", "message"}}
+        """
+        body = body or {}
+        data = body.get("data") if isinstance(body.get("data"), dict) else {}
+        errors = body.get("errors")
+        if errors and isinstance(errors, dict):
+            return None, f"{errors.get('code')}: {errors.get('message', '')}".strip()
+        if status >= 400 or not data:
+            return None, f"Unexpected gateway response (HTTP {status})."
+        return data, None
+
+    def _verify_result(self, status, body):
+        data, error = self._data(status, body)
+        if error:
+            return VerifyResult(False, detail=error)
+        if data.get("code") in (100, 101):
+            return VerifyResult(True, ref_id=str(data.get("ref_id", "")))
+        return VerifyResult(False, detail=str(data.get("message") or data.get("code")))
+
+    @staticmethod
+    def _checked(status, body):
+        # 5xx/429 بعد از retryها یعنی درگاه در دسترس نیست، نه رد پرداخت
+        if status in RETRY_STATUSES:
+            raise GatewayError(f"Gateway unavailable (HTTP {status}).")
+        return status, body
+
+    def _post(self, path, payload, **kwargs):
+        try:
+            return self._checked(*self.session.request("POST", path, payload, **kwargs))
+        except GatewayHTTPError as e:
+            raise GatewayError(str(e)) from e
+
+    async def _apost(self, path, payload, **kwargs):
+        try:
+            return self._checked(*await self.asession.request("POST", path, payload, **kwargs))
+        except GatewayHTTPError as e:
+            raise GatewayError(str(e)) from e
+
+    # --- interface ---
+
+    def initiate(self, tx, callback_url):
+        status, body = self._post(self.REQUEST_PATH, self._request_payload(tx, callback_url), retries=0)
+        data, error = self._data(status, body)
+        if error or data.get("code") != 100 or not data.get("authority"):
+            raise GatewayError(error or f"Gateway rejected the request ({data.get('code')}).")
+        return InitiateResult(data["authority"], f"{self.start_pay_url}{data['authority']}")
+
+    def payment_url(self, tx):
+        return f"{self.start_pay_url}{tx.authority}"
+
+    def authority_from(self, params):
+        return params.get("Authority", "")
+
+    def verify(self, tx, params):
+        if params.get("Status") != "OK":
+            # کاربر پرداخت را لغو کرده؛ verify لازم نیست
+            return VerifyResult(False, detail="Payment canceled")
+        status, body = self._post(self.VERIFY_PATH, self._verify_payload(tx))
+        return self._verify_result(status, body)
+
+    async def averify(self, tx, params):
+        if params.get("Status") != "OK":
+            return VerifyResult(False, detail="Payment canceled")
+        status, body = await self._apost(self.VERIFY_PATH, self._verify_payload(tx))
+        return self._verify_result(status, body)
+
+    def refund(self, tx):
+        if not self.access_token:
+            raise GatewayError("Refunds need an access_token.")
+        status, body = self._post(
+            self.refund_path,
+            {"merchant_id": self.merchant_id, "authority": tx.authority, "amount": tx.amount},
+            headers={"Authorization": f"Bearer {self.access_token}"}, retries=0,
+        )
+        _, error = self._data(status, body)
+        if error:
+            raise GatewayError(error)
+
+
+_gateways = {}
+_gateways_lock = threading.Lock()
+
+
+def get_gateway(name):
+    gateway = _gateways.get(name)
+    if gateway is None:
+        with _gateways_lock:
+            gateway = _gateways.get(name)
+            if gateway is None:
+                conf = getattr(settings, "PAYMENT_GATEWAYS", {}).get(name)
+                if conf is None:
+                    raise GatewayError(f"Unknown gateway: {name}")
+                gateway = _gateways[name] = import_string(conf["BACKEND"])(name, **conf.get("OPTIONS", {}))
+    return gateway
+
+
+@receiver(setting_changed)
+def _reset_gateways(setting, **kwargs):
+    # override_settings در تست‌ها و benchmark
+    if setting == "PAYMENT_GATEWAYS":
+        with _gateways_lock:
+            _gateways.clear()
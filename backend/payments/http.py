@@ -0,0 +1,223 @@
+"""
+کلاینت HTTP درگاه‌ها: اتصال‌های keep-alive در یک pool مشترک برای هر درگاه، timeout و retry با backoff.
+
+HTTPSession برای مسیر sync (thread-safe) و AsyncHTTPSession برای مسیر async (یک pool برای هر
+event loop) است؛ هر دو JSON می‌فرستند و JSON برمی‌گردانند.
+فقط خطای شبکه، 429 و 5xx دوباره تلاش می‌شوند؛ پس فقط درخواست‌های idempotent (مثل verify) را
+با retries > 0 بفرستید.
+"""
+import asyncio
+import http.client
+import json
+import queue
+import random
+import ssl
+import threading
+import time
+import weakref
+from urllib.parse import urlsplit
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class GatewayHTTPError(Exception):
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+def _decode(status, body):
+    try:
+        return json.loads(body) if body else None
+    except ValueError:
+        raise GatewayHTTPError(f"Invalid JSON from gateway (HTTP {status}).", status)
+
+
+class _BaseSession:
+    def __init__(self, base_url, timeout=10.0, max_connections=10, retries=2, backoff=0.2, headers=None):
+        url = urlsplit(base_url)
+        if url.scheme not in ("http", "https") or not url.hostname:
+            raise ValueError(f"Invalid gateway base_url: {base_url}")
+        self.scheme = url.scheme
+        self.host = url.hostname
+        self.port = url.port or (443 if url.scheme == "https" else 80)
+        self.prefix = url.path.rstrip("/")
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.retries = retries
+        self.backoff = backoff
+        self.headers = {
+            "Host": self.host if url.port is None else f"{self.host}:{url.port}",
+            "Accept": "application/json",
+            "Content-Type": "application/json",
+            "Connection": "keep-alive",
+            **(headers or {}),
+        }
+
+    def delay(self, attempt):
+        # exponential backoff با jitter تا retryهای همزمان روی هم نیفتند
+        return self.backoff * (2 ** attempt) * (0.5 + random.random() / 2)
+
+    def encode(self, method, path, payload, headers):
+        body = json.dumps(payload).encode() if payload is not None else b""
+        return self.prefix + path, body, {**self.headers, **(headers or {}), "Content-Length": str(len(body))}
+
+
+class HTTPSession(_BaseSession):
+    """
+    pool اتصال‌های http.client؛ حداکثر max_connections اتصال باز، بقیه منتظر می‌مانند.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.max_connections)
+
+    def _connect(self):
+        if self.scheme == "https":
+            return http.client.HTTPSConnection(self.host, self.port, timeout=self.timeout)
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def request(self, method, path, payload=None, headers=None, retries=None):
+        """
+        خروجی: (status, داده‌ی JSON)؛ retries=0 برای درخواست‌های غیر idempotent
+        """
+        path, body, headers = self.encode(method, path, payload, headers)
+        retries = self.retries if retries is None else retries
+        for attempt in range(retries + 1):
+            last = attempt == retries
+            try:
+                status, data = self._send(method, path, body, headers)
+            except (OSError, http.client.HTTPException) as e:
+                if last:
+                    raise GatewayHTTPError(f"Gateway unreachable: {e}") from e
+            else:
+                if status not in RETRY_STATUSES or last:
+                    return status, _decode(status, data)
+            time.sleep(self.delay(attempt))
+
+    def _send(self, method, path, body, headers):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise TimeoutError("No free gateway connection.")
+        conn = None
+        try:
+            try:
+                conn, reused = self._idle.get_nowait(), True
+            except queue.Empty:
+                conn, reused = self._connect(), False
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                response = conn.getresponse()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                if not reused:
+                    raise
+                # سرور اتصال keep-alive بیکار را بسته؛ درخواست پردازش نشده، یک بار با اتصال تازه
+                conn.close()
+                conn = self._connect()
+                conn.request(method, path, body=body, headers=headers)
+                response = conn.getresponse()
+            data = response.read()
+            if response.will_close:
+                conn.close()
+            else:
+                self._idle.put(conn)
+            conn = None
+            return response.status, data
+        finally:
+            if conn is not None:
+                # اتصال خراب (مثلاً keep-alive بسته شده سمت سرور) دوباره استفاده نمی‌شود
+                conn.close()
+            self._slots.release()
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class AsyncHTTPSession(_BaseSession):
+    """
+    نسخه‌ی asyncio با همان رفتار؛ اتصال‌ها به event loop وابسته‌اند، پس pool برای هر loop جداست.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._pools = weakref.WeakKeyDictionary()  # loop -> (idle list, semaphore)
+
+    def _pool(self):
+        loop = asyncio.get_running_loop()
+        pool = self._pools.get(loop)
+        if pool is None:
+            pool = self._pools[loop] = ([], asyncio.Semaphore(self.max_connections))
+        return pool
+
+    async def request(self, method, path, payload=None, headers=None, retries=None):
+        path, body, headers = self.encode(method, path, payload, headers)
+        raw = (
+            f"{method} {path} HTTP/1.1\r\n"
+            + "".join(f"{k}: {v}\r\n" for k, v in headers.items())
+            + "\r\n"
+        ).encode() + body
+        retries = self.retries if retries is None else retries
+        for attempt in range(retries + 1):
+            last = attempt == retries
+            try:
+                status, data = await asyncio.wait_for(self._send(raw), self.timeout)
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError) as e:
+                if last:
+                    raise GatewayHTTPError(f"Gateway unreachable: {e!r}") from e
+            else:
+                if status not in RETRY_STATUSES or last:
+                    return status, _decode(status, data)
+            await asyncio.sleep(self.delay(attempt))
+
+    async def _send(self, raw):
+        idle, slots = self._pool()
+        async with slots:
+            if idle:
+                stream = idle.pop()
+                try:
+                    return await self._exchange(stream, idle, raw)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    # مثل نسخه‌ی sync: اتصال بیکار بسته شده بود، یک بار با اتصال تازه
+                    pass
+            ctx = ssl.create_default_context() if self.scheme == "https" else None
+            stream = await asyncio.open_connection(self.host, self.port, ssl=ctx)
+            return await self._exchange(stream, idle, raw)
+
+    async def _exchange(self, stream, idle, raw):
+        reader, writer = stream
+        try:
+            writer.write(raw)
+            status, keep_alive, data = await self._read_response(reader)
+        except BaseException:
+            writer.close()
+            raise
+        if keep_alive:
+            idle.append(stream)
+        else:
+            writer.close()
+        return status, data
+
+    @staticmethod
+    async def _read_response(reader):
+        status_line = await reader.readline()
+        if not status_line:
+            raise asyncio.IncompleteReadError(b"", None)
+        version, status = status_line.split()[:2]
+        headers = {}
+        while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while size := int((await reader.readline()).split(b";")[0], 16):
+                chunks.append(await reader.readexactly(size))
+                await reader.readline()
+            await reader.readline()
+            data = b"".join(chunks)
+        else:
+            data = await reader.readexactly(int(headers.get("content-length", 0)))
+        connection = headers.get("connection", "").lower()
+        keep_alive = connection == "keep-alive" if version == b"HTTP/1.0" else connection != "close"
+        return int(status), keep_alive, data
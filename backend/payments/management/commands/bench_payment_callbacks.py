@@ -0,0 +1,135 @@
+import asyncio
+import statistics
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections, transaction
+from django.test import override_settings
+
+from catalog.models import Brand, Category, Inventory, Product, Variant
+from orders.checkout import place_order
+from orders.models import Order
+from payments.fakegateway import FakeGateway
+from payments.models import PaymentTransaction
+from payments.settlement import averify_payment, start_payment, verify_payment
+
+
+class Command(BaseCommand):
+    help = (
+        "Callback throughput and tail latency of the zarinpal adapter against the local fake gateway "
+        "(payments/fakegateway.py): sync verify_payment on a pool of --threads vs averify_payment on "
+        "one event loop. --delay-ms and --error-rate inject gateway slowness and 503s (retried)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--callbacks", type=int, default=500, help="Paid orders per mode.")
+        parser.add_argument("--delay-ms", type=float, default=50.0, help="Gateway latency per request.")
+        parser.add_argument("--error-rate", type=float, default=0.0, help="Share of gateway calls answered with 503.")
+        parser.add_argument("--threads", type=int, default=8, help="Sync mode pool size (gthread worker).")
+        parser.add_argument("--concurrency", type=int, default=100, help="Async mode callbacks in flight.")
+        parser.add_argument("--max-connections", type=int, default=20, help="Gateway HTTP pool size.")
+        parser.add_argument("--keep", action="store_true", help="Do not delete the bench orders.")
+
+    def handle(self, *args, **options):
+        with FakeGateway(delay=options["delay_ms"] / 1000, error_rate=options["error_rate"], seed=1) as fake:
+            gateways = {
+                "zarinpal": {
+                    "BACKEND": "payments.gateways.ZarinpalGateway",
+                    "OPTIONS": {
+                        "merchant_id": fake.merchant_id, "base_url": fake.base_url,
+                        "start_pay_url": fake.start_pay_url, "max_connections": options["max_connections"],
+                        "backoff": 0.05,
+                    },
+                },
+            }
+            with override_settings(PAYMENT_GATEWAYS=gateways):
+                variant = self.seed(options["callbacks"] * 2)
+                try:
+                    self.stdout.write(
+                        f"gateway delay {options['delay_ms']:.0f} ms, error rate {options['error_rate']:.0%}, "
+                        f"{options['callbacks']} callbacks per mode"
+                    )
+                    # initiate بدون کندی و خطا (retry نمی‌شود)؛ فقط verify اندازه گرفته می‌شود
+                    fake.delay, fake.error_rate = 0, 0
+                    sync_params = self.initiate(fake, options["callbacks"])
+                    async_params = self.initiate(fake, options["callbacks"])
+                    fake.delay, fake.error_rate = options["delay_ms"] / 1000, options["error_rate"]
+
+                    self.report(f"sync  threads={options['threads']:<4}", *self.run_sync(sync_params, options))
+                    self.report(f"async c={options['concurrency']:<8}", *asyncio.run(self.run_async(async_params, options)))
+                    self.stdout.write(f"gateway requests {fake.requests}")
+                finally:
+                    if not options["keep"]:
+                        self.cleanup(variant)
+
+    # --- data ---
+
+    def seed(self, count):
+        tag = uuid.uuid4().hex[:8]
+        category, _ = Category.objects.get_or_create(slug="bench-payments", defaults={"title": "Bench payments"})
+        brand, _ = Brand.objects.get_or_create(slug="bench-payments", defaults={"title": "Bench payments"})
+        product = Product.objects.create(
+            title=f"Bench {tag}", slug=f"bench-pay-{tag}", category=category, brand=brand,
+        )
+        variant = Variant.objects.create(product=product, sku=f"BENCH-PAY-{tag}", size="42", color="black", price=1000)
+        Inventory.objects.create(variant=variant, quantity=count)
+        self.orders = []
+        for _ in range(count):
+            with transaction.atomic():
+                self.orders.append(place_order(None, [{"variantId": variant.id, "qty": 1}]))
+        return variant
+
+    def initiate(self, fake, count):
+        params = []
+        for order in self.orders[:count]:
+            tx, _, _ = start_payment(order, "zarinpal", "http://127.0.0.1/pay/result?gateway=zarinpal")
+            fake.mark_paid(tx.authority)
+            params.append({"Authority": tx.authority, "Status": "OK"})
+        self.orders = self.orders[count:]
+        return params
+
+    def cleanup(self, variant):
+        orders = Order.objects.filter(items__variant_id=variant.id)
+        PaymentTransaction.objects.filter(order__in=orders).delete()
+        orders.delete()
+        variant.product.delete()
+
+    # --- modes ---
+
+    def run_sync(self, params, options):
+        def callback(p):
+            start = time.perf_counter()
+            try:
+                _, code = verify_payment("zarinpal", p)
+            finally:
+                connections.close_all()
+            return code, (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(options["threads"]) as pool:
+            results = list(pool.map(callback, params))
+        return results, time.perf_counter() - start
+
+    async def run_async(self, params, options):
+        slots = asyncio.Semaphore(options["concurrency"])
+
+        async def callback(p):
+            async with slots:
+                start = time.perf_counter()
+                _, code = await averify_payment("zarinpal", p)
+                return code, (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(callback(p) for p in params))
+        return results, time.perf_counter() - start
+
+    def report(self, label, results, elapsed):
+        lat = sorted(ms for _, ms in results)
+        errors = sum(code != 200 for code, _ in results)
+        p99 = lat[min(len(lat) - 1, int(len(lat) * 0.99))]
+        self.stdout.write(
+            f"  {label} {len(lat) / elapsed:9.1f} callbacks/s   p50 {statistics.median(lat):8.2f} ms   "
+            f"p99 {p99:8.2f} ms   not settled {errors}"
+        )
@@ -1,6 +1,9 @@
 from django.db import models
 from orders.models import Order
 
+# تراکنش زنده: initiated یا paid؛ برای هر سفارش حداکثر یکی (payment_one_live_tx_per_order)
+LIVE_STATUSES = ("initiated", "paid")
+
 class PaymentTransaction(models.Model):
     STATUS_CHOICES = [
         ("initiated", "Initiated"),
@@ -19,5 +22,17 @@ class PaymentTransaction(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["order"], condition=models.Q(status__in=LIVE_STATUSES),
+                name="payment_one_live_tx_per_order",
+            ),
+        ]
+        indexes = [
+            # callback درگاه با authority پیدا می‌شود
+            models.Index(fields=["authority"], name="payment_authority_idx"),
+        ]
+
     def __str__(self):
         return f"Pay#{self.id} order={self.order_id} {self.status}"
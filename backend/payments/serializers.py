@@ -2,3 +2,4 @@ from rest_framework import serializers
 
 class InitiatePaymentSerializer(serializers.Serializer):
     order_id = serializers.IntegerField()
+    gateway = serializers.CharField(required=False, max_length=32)
@@ -0,0 +1,194 @@
+"""
+شروع و تأیید پرداخت.
+
+تماس با درگاه (initiate/verify) بیرون از transaction و بدون قفل است؛ فقط اعمال نتیجه
+(settle_payment) قفل می‌گیرد. ترتیب قفل در همه‌ی مسیرها ثابت است:
+PaymentTransaction -> Order -> Inventory (به ترتیب id)، پس callback درگاه، refresh کاربر و
+expire_holds به deadlock نمی‌خورند.
+هر تغییر وضعیت یک UPDATE شرطی است (WHERE status='initiated')؛ حتی جایی که قفل ردیفی
+نداریم (SQLite) فقط یک درخواست می‌تواند تراکنش را تسویه کند.
+"""
+import uuid
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.db import IntegrityError, transaction
+from django.http import Http404
+from django.utils import timezone
+
+from orders.models import Order
+from orders.reservations import commit_holds
+from outbox.events import publish
+from .gateways import GatewayError, get_gateway
+from .models import LIVE_STATUSES, PaymentTransaction
+
+
+def _live_transaction(order, gateway):
+    """
+    خروجی: (tx, created)؛ تراکنش initiated یک درگاه دیگر کنار گذاشته می‌شود، و همین‌طور تراکنشی
+    که بعد از initiate_timeout هنوز authority ندارد (پروسه‌اش وسط initiate مرده).
+    """
+    gateway_name = gateway.name
+    for _ in range(2):
+        try:
+            with transaction.atomic():
+                tx = PaymentTransaction.objects.create(
+                    order=order, amount=order.total_amount, gateway=gateway_name, status="initiated",
+                )
+            return tx, True
+        except IntegrityError:
+            # payment_one_live_tx_per_order: درخواست همزمان یا retry کلاینت
+            tx = PaymentTransaction.objects.filter(order=order, status__in=LIVE_STATUSES).first()
+            if tx is None:
+                continue
+            if _abandoned(tx, gateway):
+                continue
+            if tx.gateway == gateway_name or tx.status != "initiated":
+                return tx, False
+            _transition(tx, "failed")
+    raise IntegrityError("Could not create a payment transaction.")
+
+
+def _abandoned(tx, gateway):
+    """
+    تراکنش initiated بدون authority و قدیمی‌تر از initiate_timeout را failed می‌کند.
+    شرط authority="" در UPDATE است تا initiate دیرِ زنده را failed نکنیم.
+    """
+    cutoff = timezone.now() - timedelta(seconds=gateway.initiate_timeout)
+    if tx.status != "initiated" or tx.authority or tx.created_at > cutoff:
+        return False
+    return bool(
+        PaymentTransaction.objects.filter(id=tx.id, status="initiated", authority="").update(status="failed")
+    )
+
+
+def start_payment(order, gateway_name, callback_url):
+    """
+    خروجی: (tx, payment_url, created)
+    payment_url برای تراکنشی که initiate آن هنوز در جریان است None است.
+    """
+    gateway = get_gateway(gateway_name)
+    tx, created = _live_transaction(order, gateway)
+    if not created:
+        return tx, (gateway.payment_url(tx) if tx.authority else None), False
+
+    try:
+        result = gateway.initiate(tx, callback_url)
+    except Exception:
+        # هر خطایی (نه فقط GatewayError)؛ وگرنه تراکنش initiated بی‌authority سفارش را قفل می‌کند
+        _transition(tx, "failed")
+        raise
+    PaymentTransaction.objects.filter(id=tx.id).update(authority=result.authority)
+    tx.authority = result.authority
+    return tx, result.payment_url, True
+
+
+def _transition(tx, new_status, **fields):
+    updated = (
+        PaymentTransaction.objects
+        .filter(id=tx.id, status="initiated")
+        .update(status=new_status, **fields)
+    )
+    if updated:
+        tx.status = new_status
+        for name, value in fields.items():
+            setattr(tx, name, value)
+    return bool(updated)
+
+
+def outcome(tx, detail="Payment failed"):
+    """
+    خروجی: (payload, http_status) برای وضعیت نهایی تراکنش.
+    """
+    if tx.status == "paid":
+        return {"ok": True, "order_id": tx.order_id, "ref_id": tx.ref_id}, 200
+    return {"ok": False, "detail": detail, "order_id": tx.order_id}, 400
+
+
+def _unavailable(tx, error):
+    # تراکنش initiated می‌ماند تا callback بعدی دوباره verify کند
+    return {"ok": False, "detail": f"Gateway unavailable: {error}", "order_id": tx.order_id}, 502
+
+
+def _find(gateway, params):
+    authority = gateway.authority_from(params)
+    if not authority:
+        raise Http404
+    return PaymentTransaction.objects.filter(authority=authority, gateway=gateway.name)
+
+
+def verify_payment(gateway_name, params):
+    """
+    params: query string بازگشت از درگاه. خروجی: (payload, http_status)
+    """
+    try:
+        gateway = get_gateway(gateway_name)
+    except GatewayError:
+        raise Http404
+    tx = _find(gateway, params).first()
+    if tx is None:
+        raise Http404
+    if tx.status != "initiated":
+        return outcome(tx)
+    try:
+        result = gateway.verify(tx, params)
+    except GatewayError as e:
+        return _unavailable(tx, e)
+    return settle_payment(tx.id, result.ok, result.ref_id, result.detail)
+
+
+async def averify_payment(gateway_name, params):
+    """
+    نسخه‌ی async: انتظار برای درگاه روی event loop است و فقط settle به thread می‌رود.
+    """
+    try:
+        gateway = get_gateway(gateway_name)
+    except GatewayError:
+        raise Http404
+    tx = await _find(gateway, params).afirst()
+    if tx is None:
+        raise Http404
+    if tx.status != "initiated":
+        return outcome(tx)
+    try:
+        result = await gateway.averify(tx, params)
+    except GatewayError as e:
+        return _unavailable(tx, e)
+    return await sync_to_async(settle_payment)(tx.id, result.ok, result.ref_id, result.detail)
+
+
+@transaction.atomic
+def settle_payment(tx_id, success, ref_id="", detail=""):
+    """
+    نتیجه‌ی درگاه را یک بار و فقط یک بار اعمال می‌کند؛ callbackهای تکراری نتیجه‌ی قبلی را می‌گیرند.
+    خروجی: (payload, http_status)
+    """
+    tx = PaymentTransaction.objects.select_for_update().get(id=tx_id)
+    if tx.status != "initiated":
+        return outcome(tx)
+
+    if not success:
+        if not _transition(tx, "failed"):
+            tx.refresh_from_db()
+        return outcome(tx, detail=detail or "Payment failed")
+
+    # سفارش بعد از تراکنش قفل می‌شود تا با expire_holds همزمان نشود
+    order = Order.objects.select_for_update().get(id=tx.order_id)
+    if order.status != "pending":
+        # holdها منقضی شده و سفارش لغو شده است
+        if not _transition(tx, "failed"):
+            tx.refresh_from_db()
+            return outcome(tx)
+        return outcome(tx, detail="Order is not pending.")
+
+    if not _transition(tx, "paid", ref_id=ref_id or str(uuid.uuid4())[:12]):
+        # درخواست دیگری زودتر تسویه کرده است
+        tx.refresh_from_db()
+        return outcome(tx)
+
+    # موفق: holdها به کسر دائمی موجودی تبدیل می‌شوند
+    commit_holds(order)
+    Order.objects.filter(id=order.id, status="pending").update(status="paid", paid_at=timezone.now())
+    # side effectها (ایمیل و ...) در همین transaction صف می‌شوند و worker اجرایشان می‌کند
+    publish("order.paid", {"order_id": order.id, "payment_id": tx.id, "ref_id": tx.ref_id, "amount": tx.amount})
+    return outcome(tx)
@@ -1,3 +1,243 @@
-from django.test import TestCase
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.db import connection, connections
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from catalog.models import Brand, Category, Inventory, Product, Variant
+from orders.checkout import place_order
+from orders.models import Order, StockReservation
+from .fakegateway import FakeGateway
+from .gateways import MockGateway
+from .models import PaymentTransaction
+from .settlement import averify_payment
+
+# حداقل throughput قابل قبول برای callbackها (PAYMENT_STRESS_MIN_RPS)
+MIN_CALLBACKS_PER_SECOND = float(os.environ.get("PAYMENT_STRESS_MIN_RPS", "100"))
+
+
+def make_variant(quantity):
+    category = Category.objects.create(title="Shoes", slug="shoes")
+    brand = Brand.objects.create(title="Brand", slug="brand")
+    product = Product.objects.create(title="Runner", slug="runner", category=category, brand=brand)
+    variant = Variant.objects.create(product=product, sku="RUN-42", size="42", color="black", price=1000)
+    Inventory.objects.create(variant=variant, quantity=quantity)
+    return variant
+
+
+class PaymentSettlementTests(TestCase):
+    def setUp(self):
+        self.variant = make_variant(quantity=10)
+        self.order = place_order(None, [{"variantId": self.variant.id, "qty": 2}])
+        self.client = APIClient()
+
+    def initiate(self):
+        return self.client.post("/api/payments/initiate/", {"order_id": self.order.id}, format="json")
+
+    def test_initiate_is_idempotent_per_order(self):
+        first = self.initiate()
+        second = self.initiate()
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(first.data["authority"], second.data["authority"])
+        self.assertEqual(PaymentTransaction.objects.filter(order=self.order).count(), 1)
+
+    def test_repeated_callbacks_settle_once(self):
+        authority = self.initiate().data["authority"]
+        for _ in range(3):
+            r = self.client.get("/api/payments/mock-return/", {"authority": authority, "status": "ok"})
+            self.assertEqual(r.status_code, 200)
+            self.assertTrue(r.json()["ok"])
+        # fail بعد از paid چیزی را عوض نمی‌کند
+        r = self.client.get("/api/payments/mock-return/", {"authority": authority, "status": "fail"})
+        self.assertTrue(r.json()["ok"])
+
+        inventory = Inventory.objects.get(variant=self.variant)
+        self.assertEqual((inventory.quantity, inventory.reserved), (8, 0))
+        self.assertEqual(Order.objects.get(id=self.order.id).status, "paid")
+
+    def test_client_cannot_pick_a_gateway_outside_the_allowlist(self):
+        with override_settings(PAYMENT_CLIENT_GATEWAYS=["zarinpal"]):
+            r = self.client.post("/api/payments/initiate/", {"order_id": self.order.id, "gateway": "mock"},
+                                 format="json")
+        self.assertEqual(r.status_code, 400)
+        with override_settings(PAYMENT_GATEWAYS={}):  # تولید بدون PAYMENT_MOCK_ENABLED
+            self.assertEqual(self.initiate().status_code, 400)
+            r = self.client.get("/api/payments/mock/verify/", {"authority": "x", "status": "ok"})
+            self.assertEqual(r.status_code, 404)
+        self.assertFalse(PaymentTransaction.objects.exists())
+
+    def test_failed_payment_can_be_retried(self):
+        authority = self.initiate().data["authority"]
+        r = self.client.get("/api/payments/mock-return/", {"authority": authority, "status": "fail"})
+        self.assertEqual(r.status_code, 400)
+        r = self.client.get("/api/payments/mock-return/", {"authority": authority, "status": "ok"})
+        self.assertFalse(r.json()["ok"])
+
+        retry = self.initiate()
+        self.assertEqual(retry.status_code, 201)
+        self.assertNotEqual(retry.data["authority"], authority)
+
+    def test_unexpected_initiate_error_fails_the_transaction(self):
+        with mock.patch.object(MockGateway, "initiate", side_effect=AttributeError("'list' object has no attribute 'get'")):
+            with self.assertRaises(AttributeError):
+                self.initiate()
+        self.assertEqual(PaymentTransaction.objects.get().status, "failed")
+        self.assertEqual(self.initiate().status_code, 201)
+
+    def test_abandoned_initiation_is_replaced(self):
+        # پروسه بین ساخت تراکنش و ثبت authority مرده
+        tx = PaymentTransaction.objects.create(order=self.order, amount=self.order.total_amount, gateway="mock")
+        r = self.initiate()
+        self.assertEqual((r.status_code, r.json()["detail"]), (409, "Payment is being initiated, retry."))
+
+        stale = timezone.now() - timedelta(seconds=MockGateway.initiate_timeout + 1)
+        PaymentTransaction.objects.filter(id=tx.id).update(created_at=stale)
+        r = self.initiate()
+        self.assertEqual(r.status_code, 201)
+        self.assertNotEqual(r.data["transaction_id"], tx.id)
+        self.assertEqual(PaymentTransaction.objects.get(id=tx.id).status, "failed")
+
+
+class ZarinpalGatewayTests(TestCase):
+    """
+    آداپتر زرین‌پال در برابر درگاه جعلی محلی (payments/fakegateway.py).
+    """
+    @classmethod
+    def setUpClass(cls):
+        cls.fake = FakeGateway().start()
+        cls.addClassCleanup(cls.fake.stop)
+        cls.enterClassContext(override_settings(PAYMENT_GATEWAYS={
+            "zarinpal": {
+                "BACKEND": "payments.gateways.ZarinpalGateway",
+                "OPTIONS": {
+                    "merchant_id": cls.fake.merchant_id, "base_url": cls.fake.base_url,
+                    "start_pay_url": cls.fake.start_pay_url, "timeout": 2, "retries": 2, "backoff": 0.01,
+                },
+            },
+        }, PAYMENT_CLIENT_GATEWAYS=["zarinpal"]))
+        super().setUpClass()
+
+    def setUp(self):
+        self.fake.fail_next(0)
+        self.variant = make_variant(quantity=10)
+        self.order = place_order(None, [{"variantId": self.variant.id, "qty": 1}])
+        r = self.client.post("/api/payments/initiate/", {"order_id": self.order.id, "gateway": "zarinpal"},
+                             content_type="application/json")
+        self.assertEqual(r.status_code, 201, r.content)
+        self.authority = r.json()["authority"]
+        self.assertEqual(r.json()["payment_url"], self.fake.start_pay_url + self.authority)
+
+    def verify(self, status="OK"):
+        return self.client.get("/api/payments/zarinpal/verify/", {"Authority": self.authority, "Status": status})
+
+    def test_verify_settles_once(self):
+        self.fake.mark_paid(self.authority)
+        first, second = self.verify().json(), self.verify().json()
+        self.assertTrue(first["ok"])
+        self.assertEqual(first, second)
+        self.assertEqual(Order.objects.get(id=self.order.id).status, "paid")
+        self.assertEqual(Inventory.objects.get(variant=self.variant).quantity, 9)
+
+    def test_transient_gateway_errors_are_retried(self):
+        self.fake.mark_paid(self.authority)
+        self.fake.fail_next(2)
+        self.assertTrue(self.verify().json()["ok"])
+
+    def test_gateway_outage_leaves_transaction_open(self):
+        self.fake.mark_paid(self.authority)
+        self.fake.fail_next(3)
+        r = self.verify()
+        self.assertEqual(r.status_code, 502)
+        self.assertEqual(PaymentTransaction.objects.get(authority=self.authority).status, "initiated")
+        self.assertTrue(self.verify().json()["ok"])
+
+    def test_unpaid_or_canceled_payment_fails(self):
+        self.assertEqual(self.verify(status="NOK").status_code, 400)
+        self.assertEqual(PaymentTransaction.objects.get(authority=self.authority).status, "failed")
+        self.assertEqual(Order.objects.get(id=self.order.id).status, "pending")
+
+    async def test_async_verify(self):
+        self.fake.mark_paid(self.authority)
+        payload, code = await averify_payment("zarinpal", {"Authority": self.authority, "Status": "OK"})
+        self.assertEqual(code, 200)
+        self.assertTrue(payload["ok"])
+
+
+class PaymentCallbackStressTests(TransactionTestCase):
+    """
+    هزاران callback همزمان (ok و fail درهم) برای تعدادی سفارش؛ هر سفارش باید دقیقاً یک بار
+    تسویه شود و موجودی دقیقاً یک بار کم شود.
+    """
+    orders = 50
+    callbacks_per_order = 40
+    workers = 16
+
+    def setUp(self):
+        if connection.vendor == "sqlite" and connection.is_in_memory_db():
+            self.skipTest("needs concurrent connections (PostgreSQL, or SQLite with a file TEST NAME)")
+        self.variant = make_variant(quantity=self.orders)
+        self.authorities = {}
+        for _ in range(self.orders):
+            order = place_order(None, [{"variantId": self.variant.id, "qty": 1}])
+            r = APIClient().post("/api/payments/initiate/", {"order_id": order.id}, format="json")
+            self.authorities[r.data["authority"]] = order.id
+
+    def callback(self, authority, st):
+        try:
+            r = APIClient().get("/api/payments/mock-return/", {"authority": authority, "status": st})
+            return authority, st, r.status_code, r.json()
+        finally:
+            connections.close_all()
+
+    def test_concurrent_callbacks_settle_exactly_once(self):
+        rnd = random.Random(7)
+        calls = [
+            (authority, "fail" if rnd.random() < 0.2 else "ok")
+            for authority in self.authorities
+            for _ in range(self.callbacks_per_order)
+        ]
+        rnd.shuffle(calls)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(self.workers) as pool:
+            results = list(pool.map(lambda c: self.callback(*c), calls))
+        elapsed = time.perf_counter() - start
+
+        by_authority = {}
+        for authority, st, code, data in results:
+            self.assertIn(code, (200, 400), data)
+            by_authority.setdefault(authority, set()).add((code, data.get("ok"), data.get("ref_id")))
+
+        txs = {tx.authority: tx for tx in PaymentTransaction.objects.all()}
+        paid = 0
+        for authority, order_id in self.authorities.items():
+            tx = txs[authority]
+            # همه‌ی پاسخ‌های موفق یک تراکنش همان ref_id را دارند؛ تراکنش failed هیچ پاسخ موفقی ندارد
+            if tx.status == "paid":
+                paid += 1
+                successes = {r for r in by_authority[authority] if r[1]}
+                self.assertEqual(successes, {(200, True, tx.ref_id)})
+                self.assertEqual(Order.objects.get(id=order_id).status, "paid")
+                self.assertEqual(
+                    set(StockReservation.objects.filter(order_id=order_id).values_list("status", flat=True)),
+                    {"committed"},
+                )
+            else:
+                self.assertEqual(tx.status, "failed")
+                self.assertFalse(any(r[1] for r in by_authority[authority]))
+                self.assertEqual(Order.objects.get(id=order_id).status, "pending")
+
+        self.assertEqual(PaymentTransaction.objects.filter(status="paid").count(), paid)
+        inventory = Inventory.objects.get(variant=self.variant)
+        self.assertEqual(inventory.quantity, self.orders - paid)
+        self.assertEqual(inventory.reserved, self.orders - paid)
+
+        throughput = len(calls) / elapsed
+        self.assertGreater(throughput, MIN_CALLBACKS_PER_SECOND, f"{throughput:.0f} callbacks/s")
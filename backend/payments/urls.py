@@ -1,7 +1,17 @@
+from django.conf import settings
 from django.urls import path
-from .views import InitiatePaymentAPIView, MockReturnAPIView
+from .views import GatewayVerifyAPIView, GatewayVerifyAsyncView, InitiatePaymentAPIView, MockReturnAPIView
+
+# زیر ASGI (config/asgi.py) verify به صورت async
+if settings.ASYNC_VIEWS:
+    mock_return, gateway_verify = GatewayVerifyAsyncView.as_view(), GatewayVerifyAsyncView.as_view()
+else:
+    mock_return, gateway_verify = MockReturnAPIView.as_view(), GatewayVerifyAPIView.as_view()
 
 urlpatterns = [
     path("payments/initiate/", InitiatePaymentAPIView.as_view()),
-    path("payments/mock-return/", MockReturnAPIView.as_view()),
+    path("payments/<str:gateway>/verify/", gateway_verify),
 ]
+# درگاه ساختگی فقط وقتی فعال است (PAYMENT_MOCK_ENABLED)
+if "mock" in settings.PAYMENT_GATEWAYS:
+    urlpatterns.insert(1, path("payments/mock-return/", mock_return, {"gateway": "mock"}))
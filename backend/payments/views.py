@@ -1,73 +1,87 @@
-import uuid
-from django.db import transaction
+from django.conf import settings
 from django.shortcuts import get_object_or_404
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 
+from config.async_views import AsyncAPIView, render_json
+from idempotency.keys import idempotent
 from orders.models import Order
-from .models import PaymentTransaction
+from .gateways import GatewayError
+from .settlement import averify_payment, start_payment, verify_payment
 from .serializers import InitiatePaymentSerializer
 
 
 class InitiatePaymentAPIView(APIView):
     """
-    ایجاد تراکنش و برگرداندن payment_url برای درگاه mock
+    ایجاد تراکنش و برگرداندن payment_url درگاه (پیش‌فرض PAYMENT_DEFAULT_GATEWAY)
+    Body: {"order_id": 12, "gateway": "zarinpal"}   gateway اختیاری و فقط از PAYMENT_CLIENT_GATEWAYS
+    هدر Idempotency-Key: retry پاسخ ذخیره‌شده را می‌گیرد، بدون قفل و صدا زدن درگاه.
     """
+    @idempotent("payments.initiate")
     def post(self, request):
         s = InitiatePaymentSerializer(data=request.data)
         s.is_valid(raise_exception=True)
 
+        requested = s.validated_data.get("gateway")
+        gateway = requested or settings.PAYMENT_DEFAULT_GATEWAY
+        allowed = not requested or requested in settings.PAYMENT_CLIENT_GATEWAYS
+        if not allowed or gateway not in settings.PAYMENT_GATEWAYS:
+            return Response({"gateway": "Unknown gateway."}, status=status.HTTP_400_BAD_REQUEST)
+
         order = get_object_or_404(Order, id=s.validated_data["order_id"])
 
         if order.status != "pending":
             return Response({"detail": "Order is not pending."}, status=status.HTTP_400_BAD_REQUEST)
 
-        tx = PaymentTransaction.objects.create(
-            order=order,
-            amount=order.total_amount,
-            gateway="mock",
-            status="initiated",
-            authority=str(uuid.uuid4()),
-        )
-
-        # درگاه mock: یک URL برمی‌گردانیم که فرانت به آن navigate کند
-        payment_url = f"/pay/mock?authority={tx.authority}"
+        # retry یا درخواست همزمان تراکنش دوم نمی‌سازد (payments/settlement.py)
+        try:
+            tx, payment_url, created = start_payment(order, gateway, callback_url(request, gateway))
+        except GatewayError as e:
+            return Response({"detail": f"Gateway error: {e}"}, status=status.HTTP_502_BAD_GATEWAY)
+        if tx.status != "initiated":
+            return Response({"detail": "Order is not pending."}, status=status.HTTP_400_BAD_REQUEST)
+        if payment_url is None:
+            return Response({"detail": "Payment is being initiated, retry."}, status=status.HTTP_409_CONFLICT)
 
         return Response(
-            {"transaction_id": tx.id, "authority": tx.authority, "payment_url": payment_url},
-            status=status.HTTP_201_CREATED,
+            {"transaction_id": tx.id, "gateway": tx.gateway, "authority": tx.authority, "payment_url": payment_url},
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
         )
 
 
+def callback_url(request, gateway):
+    # درگاه کاربر را به صفحه‌ی نتیجه‌ی فرانت برمی‌گرداند و آن صفحه /api/payments/<gateway>/verify/ را صدا می‌زند
+    base = settings.PAYMENT_CALLBACK_URL or request.build_absolute_uri("/pay/result")
+    return f"{base}{'&' if '?' in base else '?'}gateway={gateway}"
+
+
 class MockReturnAPIView(APIView):
     """
     شبیه‌سازی callback/verify:
     GET /api/payments/mock-return/?authority=...&status=ok|fail
+    ترتیب قفل: تراکنش، سفارش، موجودی.
     """
-    @transaction.atomic
-    def get(self, request):
-        authority = request.query_params.get("authority", "")
-        st = request.query_params.get("status", "ok")
+    def get(self, request, gateway="mock"):
+        # تسویه‌ی دقیقاً یک‌باره؛ callbackهای همزمان/تکراری همان نتیجه را می‌گیرند
+        payload, code = verify_payment(gateway, request.query_params)
+        return Response(payload, status=code)
 
-        tx = get_object_or_404(PaymentTransaction, authority=authority, gateway="mock")
 
-        # اگر قبلاً پرداخت شده، idempotent
-        if tx.status == "paid":
-            return Response({"ok": True, "order_id": tx.order_id, "ref_id": tx.ref_id})
-
-        if st != "ok":
-            tx.status = "failed"
-            tx.save(update_fields=["status"])
-            return Response({"ok": False, "detail": "Payment failed", "order_id": tx.order_id}, status=400)
-
-        # موفق
-        tx.status = "paid"
-        tx.ref_id = str(uuid.uuid4())[:12]
-        tx.save(update_fields=["status", "ref_id"])
+class GatewayVerifyAPIView(APIView):
+    """
+    GET /api/payments/<gateway>/verify/?<پارامترهای بازگشت درگاه>
+    مثلاً زرین‌پال: ?Authority=...&Status=OK|NOK
+    """
+    def get(self, request, gateway):
+        payload, code = verify_payment(gateway, request.query_params)
+        return Response(payload, status=code)
 
-        order = tx.order
-        order.status = "paid"
-        order.save(update_fields=["status"])
 
-        return Response({"ok": True, "order_id": order.id, "ref_id": tx.ref_id})
+class GatewayVerifyAsyncView(AsyncAPIView):
+    """
+    همان GatewayVerifyAPIView زیر ASGI؛ انتظار برای verify درگاه thread نمی‌گیرد.
+    """
+    async def get(self, request, gateway):
+        payload, code = await averify_payment(gateway, request.query_params)
+        return render_json(payload, status=code)
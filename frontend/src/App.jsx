@@ -20,22 +20,30 @@ export default function App() {
   const { user, logout } = useAuth();
 
   const [products, setProducts] = useState([]);
+  const [next, setNext] = useState(null);
   const [err, setErr] = useState(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
 
-  useEffect(() => {
-    setLoading(true);
-    fetch("/api/products/")
+  // صفحه‌بندی cursor: next لینک صفحه‌ی بعد است (مثل MyOrders)
+  function load(url, append) {
+    (append ? setLoadingMore : setLoading)(true);
+    fetch(url)
       .then((r) => {
         if (!r.ok) throw new Error("HTTP " + r.status);
         return r.json();
       })
       .then((data) => {
-        setProducts(data);
+        setProducts((prev) => (append ? [...prev, ...data.results] : data.results));
+        setNext(data.next);
         setErr(null);
       })
       .catch((e) => setErr(String(e)))
-      .finally(() => setLoading(false));
+      .finally(() => (append ? setLoadingMore : setLoading)(false));
+  }
+
+  useEffect(() => {
+    load("/api/products/", false);
   }, []);
 
   const cartCount = items.reduce((s, i) => s + i.qty, 0);
@@ -166,6 +174,16 @@ export default function App() {
                   ))}
                 </div>
               )}
+
+              {!loading && next && (
+                <button
+                  onClick={() => load(next, true)}
+                  disabled={loadingMore}
+                  style={{ marginTop: 16, padding: "8px 14px", borderRadius: 8, border: "1px solid #ddd", background: "#fff", cursor: "pointer" }}
+                >
+                  {loadingMore ? "..." : "محصولات بیشتر"}
+                </button>
+              )}
             </div>
           }
         />
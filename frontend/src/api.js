@@ -1,9 +1,10 @@
 export const API_BASE = "http://localhost:8000/api";
 
-export async function fetchProducts() {
-  const r = await fetch(`${API_BASE}/products/`);
+// صفحه‌بندی cursor: url صفحه‌ی بعد همان next پاسخ قبلی است
+export async function fetchProducts(url = `${API_BASE}/products/`) {
+  const r = await fetch(url);
   if (!r.ok) throw new Error(`HTTP ${r.status}`);
-  return r.json();
+  return r.json(); // {next, results}
 }
 
 export async function fetchProductBySlug(slug) {
@@ -5,19 +5,26 @@ import { apiFetch } from "../api/client.js";
 export default function MyOrders() {
   const { access } = useAuth();
   const [orders, setOrders] = useState([]);
+  const [next, setNext] = useState(null);
   const [err, setErr] = useState(null);
   const [loading, setLoading] = useState(true);
 
+  // صفحه‌بندی cursor: next لینک صفحه‌ی بعد است
+  function load(url, append) {
+    setLoading(true);
+    apiFetch(url)
+      .then((data) => {
+        setOrders((prev) => (append ? [...prev, ...data.results] : data.results));
+        setNext(data.next);
+        setErr(null);
+      })
+      .catch((e) => setErr(String(e?.message || e)))
+      .finally(() => setLoading(false));
+  }
+
   useEffect(() => {
-  setLoading(true);
-  apiFetch("/api/orders/my/")
-    .then((data) => {
-      setOrders(data);
-      setErr(null);
-    })
-    .catch((e) => setErr(String(e?.message || e)))
-    .finally(() => setLoading(false));
-}, []);
+    load("/api/orders/my/", false);
+  }, []);
 
 
   return (
@@ -64,6 +71,15 @@ export default function MyOrders() {
           </div>
         ))}
       </div>
+
+      {next && !loading && (
+        <button
+          onClick={() => load(next, true)}
+          style={{ marginTop: 16, padding: "8px 14px", borderRadius: 8, border: "1px solid #ddd", background: "#fff", cursor: "pointer" }}
+        >
+          سفارش‌های بیشتر
+        </button>
+      )}
     </div>
   );
 }
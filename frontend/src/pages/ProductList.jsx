@@ -4,10 +4,20 @@ import { fetchProducts } from "../api";
 
 export default function ProductList() {
   const [items, setItems] = useState([]);
+  const [next, setNext] = useState(null);
   const [err, setErr] = useState(null);
 
+  function load(url, append) {
+    fetchProducts(url)
+      .then((data) => {
+        setItems((prev) => (append ? [...prev, ...data.results] : data.results));
+        setNext(data.next);
+      })
+      .catch((e) => setErr(String(e)));
+  }
+
   useEffect(() => {
-    fetchProducts().then(setItems).catch((e) => setErr(String(e)));
+    load(undefined, false);
   }, []);
 
   return (
@@ -38,6 +48,12 @@ export default function ProductList() {
           </Link>
         ))}
       </div>
+
+      {next && (
+        <button onClick={() => load(next, true)} style={{ marginTop: 16 }}>
+          محصولات بیشتر
+        </button>
+      )}
     </div>
   );
 }